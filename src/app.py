@@ -15,9 +15,19 @@ from atproto import Client, models
 from PIL import Image
 import json
 import logging
+import queue
+import atexit
+from logging.handlers import QueueHandler, QueueListener
 from datetime import datetime
 from flask import Flask, render_template, jsonify, send_file, request, Response
 from flask_cors import CORS
+
+# orjson encodes stream events several times faster than json; the stdlib is the fallback
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 try:
     from .bluesky_bot import BlueskyBot
     from .ai_config import generate_ai_reply as generate_ai_reply_adapter, get_ai_config_manager
@@ -27,15 +37,24 @@ except ImportError:
     from ai_config import generate_ai_reply as generate_ai_reply_adapter, get_ai_config_manager
     import config
 
-# Configure logging
+# Configure logging - records are handed to a queue so request threads never block
+# on file/stderr writes; a background listener does the actual I/O
+_log_handlers = [
+    logging.FileHandler(os.path.join(os.path.dirname(__file__), '..', 'bluesky_app.log')),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+
+_log_queue = queue.Queue(-1)
 logging.basicConfig(
     level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(os.path.join(os.path.dirname(__file__), '..', 'bluesky_app.log')),
-        logging.StreamHandler()
-    ]
+    format='%(message)s',
+    handlers=[QueueHandler(_log_queue)]
 )
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__, 
@@ -50,9 +69,6 @@ logger.info("Rate limiting disabled - app will be more responsive")
 bluesky_bot = None
 temp_dir = None
 
-# Pagination state management - in production, this should be stored in a database or Redis
-pagination_state = {}  # {session_id: {'cursor': cursor, 'seen_posts': set_of_post_uris}}
-
 # Initialize the bot
 def init_bot():
     global bluesky_bot, temp_dir
@@ -91,25 +107,6 @@ def get_session_id():
     timestamp = str(int(time.time() / 1800))  # 30-minute windows
     return hashlib.md5(f"{client_ip}_{timestamp}".encode()).hexdigest()
 
-def get_pagination_state(session_id):
-    """Get pagination state for a session"""
-    if session_id not in pagination_state:
-        pagination_state[session_id] = {
-            'cursor': None,
-            'seen_posts': set()
-        }
-    return pagination_state[session_id]
-
-def update_pagination_state(session_id, cursor, new_posts):
-    """Update pagination state with new cursor and seen posts"""
-    state = get_pagination_state(session_id)
-    state['cursor'] = cursor
-    # Add new post URIs to seen posts
-    for post in new_posts:
-        if 'post' in post and 'uri' in post['post']:
-            state['seen_posts'].add(post['post']['uri'])
-    return state
-
 # Using OpenAI API instead of local models
 
 @app.route('/')
@@ -139,43 +136,38 @@ def get_posts():
         if max_fetches < 1 or max_fetches > 2000:
             return jsonify({'error': 'max_fetches must be between 1 and 2000'}), 400
         
-        # Get session ID and pagination state
+        # Get session ID - the bot keeps each session's cursor and seen posts
         # Use provided session_id if available, otherwise generate one
         if session_id_param:
             session_id = session_id_param
         else:
             session_id = get_session_id()
-        pagination_state = get_pagination_state(session_id)
         
         if is_fetch_more:
             # For fetch more, we want to get NEW posts, not replace existing ones
             # So we fetch the same number of posts but starting from where we left off
             logger.info(f"Fetching MORE {target_count} posts (max_fetches={max_fetches}) with max {max_posts_per_user} per user from followed users only (pagination mode)")
             
-            result = bluesky_bot.fetch_posts_with_images_web_paginated(
+            result = bluesky_bot.next_page(
+                session_id,
                 target_count=target_count,
                 max_fetches=max_fetches,
-                max_posts_per_user=max_posts_per_user,
-                start_cursor=pagination_state['cursor'],
-                seen_post_uris=pagination_state['seen_posts']
+                max_posts_per_user=max_posts_per_user
             )
             
-            # Update pagination state
-            update_pagination_state(session_id, result['cursor'], result['posts'])
-            
-            logger.info(f"Successfully fetched {len(result['posts'])} NEW posts with images from followed users (pagination mode)")
+            logger.info(f"Successfully fetched {len(result.posts)} NEW posts with images from followed users (pagination mode)")
             
             return jsonify({
                 'success': True,
-                'posts': result['posts'],
-                'count': len(result['posts']),
+                'posts': result.posts,
+                'count': len(result.posts),
                 'max_per_user': max_posts_per_user,
                 'max_fetches': max_fetches,
                 'source': 'custom_feed_followed_users_only',
                 'pagination': {
-                    'cursor': result['cursor'],
-                    'total_checked': result['total_checked'],
-                    'fetch_count': result['fetch_count']
+                    'cursor': result.cursor,
+                    'total_checked': result.total_checked,
+                    'fetch_count': result.fetch_count
                 },
                 'is_fetch_more': True
             })
@@ -184,33 +176,27 @@ def get_posts():
             logger.info(f"Fetching {target_count} posts (max_fetches={max_fetches}) with max {max_posts_per_user} per user from followed users only (refresh mode)")
             
             # Reset pagination state for fresh start
-            pagination_state['cursor'] = None
-            pagination_state['seen_posts'] = set()
-            
-            result = bluesky_bot.fetch_posts_with_images_web_paginated(
+            result = bluesky_bot.next_page(
+                session_id,
                 target_count=target_count,
                 max_fetches=max_fetches,
                 max_posts_per_user=max_posts_per_user,
-                start_cursor=None,
-                seen_post_uris=set()
+                reset=True
             )
             
-            # Update pagination state
-            update_pagination_state(session_id, result['cursor'], result['posts'])
-            
-            logger.info(f"Successfully fetched {len(result['posts'])} posts with images from followed users (refresh mode)")
+            logger.info(f"Successfully fetched {len(result.posts)} posts with images from followed users (refresh mode)")
             
             return jsonify({
                 'success': True,
-                'posts': result['posts'],
-                'count': len(result['posts']),
+                'posts': result.posts,
+                'count': len(result.posts),
                 'max_per_user': max_posts_per_user,
                 'max_fetches': max_fetches,
                 'source': 'custom_feed_followed_users_only',
                 'pagination': {
-                    'cursor': result['cursor'],
-                    'total_checked': result['total_checked'],
-                    'fetch_count': result['fetch_count']
+                    'cursor': result.cursor,
+                    'total_checked': result.total_checked,
+                    'fetch_count': result.fetch_count
                 },
                 'is_fetch_more': False
             })
@@ -423,6 +409,12 @@ def reset_ai_config():
 
 # Removed endpoints related to local model lifecycle
 
+def sse_event(event):
+    """Encode one event as a compact Server-Sent Events message"""
+    if orjson is not None:
+        return b"data: " + orjson.dumps(event, option=orjson.OPT_NON_STR_KEYS) + b"\n\n"
+    return f"data: {json.dumps(event, separators=(',', ':'))}\n\n"
+
 @app.route('/api/posts/stream')
 def get_posts_stream():
     """API endpoint to fetch posts with images with real-time progress updates (includes reposts from followed users)"""
@@ -458,105 +450,53 @@ def get_posts_stream():
         if max_fetches < 1 or max_fetches > 2000:
             return jsonify({'error': 'max_fetches must be between 1 and 2000'}), 400
         
-        # Get session ID and pagination state from request context
+        # Get session ID from request context - the bot keeps each session's cursor and seen posts
         # Use provided session_id if available, otherwise generate one
         if session_id_param:
             session_id = session_id_param
         else:
             session_id = get_session_id()
-        pagination_state = get_pagination_state(session_id)
-        
-        logger.info(f"Stream request - session_id: {session_id}, fetch_more: {is_fetch_more}, pagination_state: cursor={pagination_state['cursor'] is not None}, seen_posts={len(pagination_state['seen_posts'])}")
         
-        # Store results for pagination state update after streaming
-        stream_results = {'cursor': None, 'posts': []}
+        logger.info(f"Stream request - session_id: {session_id}, fetch_more: {is_fetch_more}")
         
         def generate():
             try:
-                
                 if is_fetch_more:
-                    # Send initial progress for fetch more
-                    yield f"data: {json.dumps({'type': 'start', 'message': f'Fetching MORE {target_count} posts with images from followed users only (filtered mode)...', 'max_fetches': max_fetches})}\n\n"
-                    
-                    # Send intermediate progress update to show activity
-                    yield f"data: {json.dumps({'type': 'progress', 'message': 'Searching for new posts with images...', 'posts_found': 0, 'posts_checked': 0, 'current_batch': 1, 'progress_percent': 25})}\n\n"
-                    
-                    # Small delay to make progress visible
-                    time.sleep(0.5)
-                    
-                    # Use the streaming generator for real-time progress updates
-                    for progress_update in bluesky_bot.fetch_posts_with_images_web_stream_generator(
-                        target_count=target_count,
-                        max_fetches=max_fetches,
-                        max_posts_per_user=max_posts_per_user
-                    ):
-                        if progress_update['type'] == 'progress':
-                            # Forward progress updates to the client
-                            yield f"data: {json.dumps(progress_update)}\n\n"
-                        elif progress_update['type'] == 'complete':
-                            # Store results for later pagination state update
-                            result = {
-                                'posts': progress_update['posts'],
-                                'cursor': progress_update.get('cursor'),
-                                'total_checked': progress_update.get('total_checked', 0),
-                                'fetch_count': progress_update.get('fetch_count', 0)
-                            }
-                            stream_results['cursor'] = result['cursor']
-                            stream_results['posts'] = result['posts']
-                            break
-                    
-                    # Update pagination state immediately for fetch_more
-                    update_pagination_state(session_id, result['cursor'], result['posts'])
-                    logger.info(f"Updated pagination state for fetch_more - session_id: {session_id}, new cursor: {result['cursor'] is not None}, new seen_posts: {len(result.get('seen_uris', set()))}")
-                    
-                    # Send final complete message
-                    yield f"data: {json.dumps({'type': 'complete', 'posts': result['posts'], 'count': len(result['posts']), 'is_fetch_more': True})}\n\n"
-                    
+                    start_message = f'Fetching MORE {target_count} posts with images from followed users only (filtered mode)...'
                 else:
-                    # Send initial progress for refresh
-                    yield f"data: {json.dumps({'type': 'start', 'message': f'Starting search for {target_count} posts with images from followed users only (filtered mode)...', 'max_fetches': max_fetches})}\n\n"
-                    
-                    # Reset pagination state for fresh start
-                    pagination_state['cursor'] = None
-                    pagination_state['seen_posts'] = set()
-                    
-                    # Use the streaming generator for real-time progress updates
-                    for progress_update in bluesky_bot.fetch_posts_with_images_web_stream_generator(
-                        target_count=target_count,
-                        max_fetches=max_fetches,
-                        max_posts_per_user=max_posts_per_user
-                    ):
-                        if progress_update['type'] == 'progress':
-                            # Forward progress updates to the client
-                            yield f"data: {json.dumps(progress_update)}\n\n"
-                        elif progress_update['type'] == 'complete':
-                            # Store results for later pagination state update
-                            result = {
-                                'posts': progress_update['posts'],
-                                'cursor': progress_update.get('cursor'),
-                                'total_checked': progress_update.get('total_checked', 0),
-                                'fetch_count': progress_update.get('fetch_count', 0)
-                            }
-                            stream_results['cursor'] = result['cursor']
-                            stream_results['posts'] = result['posts']
-                            break
-                    
-                    # Send final complete message
-                    yield f"data: {json.dumps({'type': 'complete', 'posts': result['posts'], 'count': len(result['posts']), 'is_fetch_more': False})}\n\n"
+                    start_message = f'Starting search for {target_count} posts with images from followed users only (filtered mode)...'
+                yield sse_event({'type': 'start', 'message': start_message, 'max_fetches': max_fetches})
+                
+                # Forward every event as soon as the bot yields it - keepalives included, so the
+                # client's connection timeout is reset while a long search is still running
+                for progress_update in bluesky_bot.fetch_posts_with_images_web_stream_generator(
+                    target_count=target_count,
+                    max_fetches=max_fetches,
+                    max_posts_per_user=max_posts_per_user,
+                    session_id=session_id,
+                    reset=not is_fetch_more
+                ):
+                    if progress_update['type'] == 'complete':
+                        logger.info(f"Stream complete - session_id: {session_id}, new cursor: {progress_update.get('cursor') is not None}")
+                        yield sse_event({'type': 'complete', 'posts': progress_update['posts'],
+                                         'count': len(progress_update['posts']), 'is_fetch_more': is_fetch_more})
+                        break
+                    yield sse_event(progress_update)
                 
             except Exception as e:
                 logger.error(f"Error in stream: {e}")
-                yield f"data: {json.dumps({'type': 'error', 'error': str(e)})}\n\n"
+                yield sse_event({'type': 'error', 'error': str(e)})
         
         # Create the streaming response
         response = Response(generate(), mimetype='text/event-stream', headers={
             'Cache-Control': 'no-cache',
             'Connection': 'keep-alive',
             'Access-Control-Allow-Origin': '*',
-            'Access-Control-Allow-Headers': 'Cache-Control'
+            'Access-Control-Allow-Headers': 'Cache-Control',
+            'X-Accel-Buffering': 'no'  # Stop reverse proxies from holding events until the stream ends
         })
         
-        # Pagination state is now updated during streaming to ensure it's available for subsequent requests
+        # Pagination state is saved on the bot when the stream completes so it's available for subsequent requests
         
         return response
         
@@ -863,8 +803,8 @@ def test_initialization():
             )
             posts_result = {
                 'success': True,
-                'posts_count': len(result['posts']),
-                'cursor': result['cursor'] is not None
+                'posts_count': len(result.posts),
+                'cursor': result.cursor is not None
             }
         else:
             posts_result = {'success': False, 'error': 'Bot not initialized'}
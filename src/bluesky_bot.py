@@ -6,18 +6,30 @@ Includes both CLI and web functionality
 
 import os
 import tempfile
+import io
+import atexit
+import weakref
+import sqlite3
 import requests
-from typing import List, Dict, Any, Optional, Set
+import httpx
+from typing import List, Dict, Any, Optional, Set, FrozenSet, NamedTuple
 from pathlib import Path
 import boto3
 from atproto import Client, models
-from PIL import Image
+from atproto_client.models.utils import get_or_create, get_model_as_dict
+from atproto_client.exceptions import RateLimitExceededError
+from atproto_client.request import Request
+from PIL import Image, ImageFile
 import json
 import logging
 from datetime import datetime, timedelta
 import time
-import hashlib
-from functools import lru_cache
+import threading
+from dataclasses import dataclass, asdict
+from operator import attrgetter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, wait
+from collections import Counter, OrderedDict, deque
+from itertools import islice
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 try:
@@ -25,73 +37,352 @@ try:
 except ImportError:
     import config
 
+# HTTP/2 is optional - httpx only speaks it with the h2 extra installed
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Bots still alive at exit get closed - held weakly so registering doesn't keep every bot alive
+_live_bots = weakref.WeakSet()
+
+
+@atexit.register
+def _close_live_bots():
+    for bot in list(_live_bots):
+        bot.close()
+
+# Record embed types that can carry media - used to pre-filter raw timeline JSON
+_MEDIA_EMBED_TYPES = frozenset({
+    'app.bsky.embed.images',
+    'app.bsky.embed.external',
+    'app.bsky.embed.video',
+})
+
+# C-level accessors for the feed item fields read for every post in the search loops
+_get_post_handle = attrgetter('post.author.handle')
+_get_post_author_did = attrgetter('post.author.did')
+_get_post_uri = attrgetter('post.uri')
+
+# Blob CID accessors for image embeds and link/video thumbnails
+_get_image_blob_link = attrgetter('image.ref.link')
+_get_blob_link = attrgetter('ref.link')
+
+# getBlob URL for a (did, cid) pair - shared by every embed type so a CDN change happens in one place
+_blob_url = "https://bsky.social/xrpc/com.atproto.sync.getBlob?did={}&cid={}".format
+
+
+class LookupCache(OrderedDict):
+    """Key -> (value, expires_at) entries plus the lock guarding them across worker threads"""
+    
+    def __init__(self):
+        super().__init__()
+        self.lock = threading.Lock()
+
+
+class RecentUris(OrderedDict):
+    """Set of post URIs that forgets the least recently added ones past max_entries"""
+    
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.max_entries = max_entries
+    
+    def add(self, uri: str):
+        self[uri] = None
+        self.move_to_end(uri)
+        while len(self) > self.max_entries:
+            self.popitem(last=False)
+    
+    def discard(self, uri: str):
+        self.pop(uri, None)
+
+
+class TimelinePage(NamedTuple):
+    """One page of feed posts plus the cursor for the page after it"""
+    feed: List[models.AppBskyFeedDefs.FeedViewPost]
+    cursor: Optional[str]
+
+
+class SessionCursor(NamedTuple):
+    """Saved position of a web session in the timeline"""
+    cursor: Optional[str]
+    seen_uris: FrozenSet[str]
+    last_used: float
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """Posts found by a paginated web fetch plus the state needed to resume it"""
+    posts: List[Dict[str, Any]]
+    cursor: Optional[str]
+    seen_uris: FrozenSet[str]
+    total_checked: int
+    fetch_count: int
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary for JSON serialization"""
+        data = asdict(self)
+        data['seen_uris'] = list(self.seen_uris)
+        return data
+
 
 class BlueskyBot:
+    # One HTTP session (and connection pool) shared by every bot instance
+    _shared_http_session = None
+    _shared_http2_client = None
+    _http_session_lock = threading.Lock()
+    _http_pool_warmed = False
+    
+    # Hosts image downloads come from - connections to these are opened ahead of time
+    _warmup_urls = ('https://cdn.bsky.app/',)
+    
+    # Image download statuses worth retrying, and how - shared by the requests session's Retry
+    # policy and the HTTP/2 client, whose transport only retries failed connections
+    _retry_status_codes = (429, 500, 502, 503, 504)
+    _retry_status_attempts = 3
+    _retry_backoff_factor = 0.3
+    _retry_backoff_max = 2
+    
+    # SSM parameter name -> (time.monotonic() when fetched, value), shared by every bot in the process
+    # so re-created bots and repeated logins skip the AWS round trip
+    _ssm_cache = {}
+    
     def __init__(self):
         self.client = None
         self.temp_dir = None
         self.ssm_client = boto3.client('ssm', region_name=config.AWS_REGION)
         
         # API optimization components
-        self._timeline_cache = {}  # Cache for timeline data
-        self._cache_ttl = 300  # 5 minutes cache TTL
+        self._timeline_cache = OrderedDict()  # LRU cache for timeline data
+        self._timeline_cache_lock = threading.Lock()  # Shared by the prefetch and format pools and web requests
+        # Cache TTLs in seconds per kind of data - home timelines churn fast (the top page fastest,
+        # but a short window still absorbs repeated refreshes), a post's CID never changes
+        self._cache_policies = {
+            'timeline_first_page': 15,
+            'timeline_home': 60,
+            'post_cid': 3600,
+            'did_handle': 3600,
+        }
+        self._cache_stale_max_age = 3600  # Expired timelines are kept this long to serve if the API fails
+        self._stale_cache_hits = 0
+        self._inflight = {}  # Cache key -> Future for timeline requests currently in flight
+        self._inflight_lock = threading.Lock()
+        self._cache_max_entries = 256  # Bound memory when many cursors are cached
+        # On-disk second level behind the in-memory cache so a restarted process starts warm.
+        # It holds the private home timeline, so it lives in the user's own cache directory
+        self._disk_cache_path = os.path.join(config.CACHE_DIR, 'timeline_cache.sqlite3')
+        self._disk_cache = None
+        self._disk_cache_lock = threading.Lock()
+        # Disk writes happen off the request path, on one thread so they land in order
+        self._disk_cache_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='disk-cache')
         self._last_api_call = 0
         self._min_api_interval = 0.5  # Minimum 500ms between API calls
+        self._keepalive_expiry = 75  # Seconds an idle API or CDN connection is kept open for reuse
+        self._last_timeline_call = 0.0  # time.monotonic() start of the last timeline request
+        self._timeline_pacing_lock = threading.Lock()
         self._consecutive_errors = 0
         self._max_consecutive_errors = 3
-        
-        # Setup optimized HTTP session for image downloads
-        self._setup_http_session()
-        
-        # Media-focused feed URIs (can be customized)
-        self._media_feed_uris = [
+        # Latest budget reported by the RateLimit-* response headers; once it runs low the
+        # remaining calls are spread over what is left of the window instead of hitting 429s
+        self._rate_limit_remaining = None
+        self._rate_limit_reset = 0.0  # Epoch seconds when the current window resets
+        self._rate_limit_floor = 10
+        self._max_rate_limit_wait = 30  # Never stall a single request longer than this
+        
+        # Media-focused feed URIs (can be customized) - a dict keeps insertion order with O(1) membership
+        self._media_feed_uris: Dict[str, None] = {
             # Add custom feed URIs here when available
-            # "at://did:plc:your-feed-did/app.bsky.feed.generator/media-posts"
-        ]
+            # "at://did:plc:your-feed-did/app.bsky.feed.generator/media-posts": None,
+        }
         
         # API usage tracking
         self._api_call_count = 0
-        self._api_call_window_start = time.time()
+        self._api_call_window_start = time.monotonic()
         self._max_calls_per_window = 50  # Conservative limit
         self._window_duration = 300  # 5 minutes
         
+        # Index of post URI -> like record key so unlikes don't have to scan the like history.
+        # Record keys belong to one account, so each account gets its own file, opened on login
+        self._like_uri_index = OrderedDict()
+        self._like_index_max_entries = 1024
+        self._like_index_dir = os.path.join(os.path.dirname(__file__), '..')
+        self._like_index_file = None
+        self._like_index_lock = threading.Lock()  # Posts are formatted on several threads
+        # Changes are saved together a moment later rather than rewriting the file per like
+        self._like_index_save_delay = 2.0
+        self._like_index_save_timer = None
+        
+        # Append-only log of posted replies. Readers skip entries past the retention window and the
+        # file is compacted on a process's first write, then every so many writes
+        self._replies_file = os.path.join(os.path.dirname(__file__), '..', 'replies_tracking.jsonl')
+        self._replies_retention_days = 30
+        self._replies_compact_every = 50
+        self._replies_since_compact = self._replies_compact_every
+        self._replies_lock = threading.Lock()
+        self._replies_migrated = False
+        self._replied_uris_cache = None  # ((mtime_ns, size, hour) of the log read, replied post URIs)
+        
+        # Short-lived lookup caches: post URI -> (value, expires_at). Misses expire quickly so
+        # retries don't hammer the API but new records still show up
+        self._cid_cache = LookupCache()
+        self._like_status_cache = LookupCache()
+        self._like_status_ttl = 60  # Likes made here update the cache directly, so only outside changes wait this long
+        self._did_handle_cache = LookupCache()
+        self._lookup_cache_max_entries = 512
+        self._lookup_miss_ttl = 2
+        
+        # Post URIs already returned by the non-paginated web fetchers, so repeated calls
+        # don't download and format the same posts again. Bounded, since it lives as long as
+        # the process; web sessions keep their own seen URIs with their cursors
+        self._seen_post_uris = RecentUris(max_entries=2048)
+        
+        # Per-session pagination state, kept here so web callers only need to pass a session ID.
+        # Idle sessions expire after the web layer's 30 minute session window
+        self._session_cursors = OrderedDict()
+        self._session_cursors_lock = threading.Lock()  # Web requests for different sessions run on several threads
+        self._session_cursor_idle_ttl = 1800
+        self._session_cursor_max_entries = 256
+        
+        # Handles the user follows, once a complete list has been fetched, for filtering web results
+        self._followed_handles = None
+        # The web search stops after this many batches in a row only held posts from capped users
+        self._max_stalled_batches = 3
+        self._progress_interval = 0.5  # Seconds between batch progress events in web searches
+        self._progress_every_batches = 8
+        
         # Media user caching for optimization
-        self._media_user_cache = {}  # Cache users who frequently post media
+        self._media_user_cache = LookupCache()  # Handle -> (posts media frequently, expires at), bounded like the lookup caches
         self._media_user_cache_ttl = 3600  # 1 hour cache TTL
+        self._embed_info_cache = {}  # Post CID -> (whether it embeds media, image count)
+        self._embed_info_cache_max_entries = 4096
         self._media_user_threshold = 0.3  # Users with >30% media posts are cached
+        self._max_concurrent_user_fetches = 8  # Author feeds fetched at once by fetch_posts_from_media_users
         
         # Optimized batch sizes for different operations
         self._timeline_batch_size = 20  # Optimized for media filtering efficiency
         self._media_focused_batch_size = 10  # Smaller batches when specifically looking for media
         self._max_concurrent_downloads = 8  # Optimal for image downloads
+        self._max_image_bytes = 10 * 1024 * 1024  # 10MB limit per image
+        
+        # Setup optimized HTTP session for image downloads
+        self._setup_http_session()
+        
+        # Long-lived download pool so image fetches reuse warm threads across posts
+        self._download_executor = ThreadPoolExecutor(
+            max_workers=self._max_concurrent_downloads,
+            thread_name_prefix='img-dl'
+        )
+        # Separate pool for formatting whole posts - each format waits on the download pool, so
+        # sharing that pool could deadlock
+        self._format_executor = ThreadPoolExecutor(
+            max_workers=self._max_concurrent_downloads,
+            thread_name_prefix='post-format'
+        )
+        _live_bots.add(self)
+    
+    def close(self):
+        """Save pending like index changes and shut down the worker pools and the disk cache"""
+        self._flush_like_index()
+        self._format_executor.shutdown(wait=True)
+        self._download_executor.shutdown(wait=True)
+        self._disk_cache_executor.shutdown(wait=True)
+        with self._disk_cache_lock:
+            if self._disk_cache is not None:
+                self._disk_cache.close()
+                self._disk_cache = None
     
     def _setup_http_session(self):
-        """Setup optimized HTTP session with connection pooling and retry strategy"""
-        self.http_session = requests.Session()
+        """Attach the shared HTTP session, creating it on first use"""
+        with BlueskyBot._http_session_lock:
+            if BlueskyBot._shared_http_session is None:
+                BlueskyBot._shared_http_session = self._create_http_session()
+            if HTTP2_AVAILABLE and config.IMAGE_DOWNLOAD_HTTP2 and BlueskyBot._shared_http2_client is None:
+                BlueskyBot._shared_http2_client = self._create_http2_client()
+        self.http_session = BlueskyBot._shared_http_session
+        # Image downloads go over HTTP/2 when available so parallel fetches share one connection per host
+        self.http2_client = BlueskyBot._shared_http2_client if config.IMAGE_DOWNLOAD_HTTP2 else None
+    
+    def _warm_http_pool(self):
+        """Open pooled connections to the image CDN in the background, once per process"""
+        with BlueskyBot._http_session_lock:
+            if BlueskyBot._http_pool_warmed:
+                return
+            BlueskyBot._http_pool_warmed = True
+        
+        def warm():
+            for url in self._warmup_urls:
+                try:
+                    # DNS, TCP and TLS setup happen here; the connection goes back to the pool
+                    if self.http2_client is not None:
+                        self.http2_client.head(url, timeout=5)
+                    else:
+                        self.http_session.head(url, timeout=(5, 5))
+                except Exception as e:
+                    logger.debug("Connection warmup for %s failed: %s", url, e)
+        
+        threading.Thread(target=warm, name='http-warmup', daemon=True).start()
+    
+    def _create_http_session(self) -> requests.Session:
+        """Create an optimized HTTP session with connection pooling and retry strategy"""
+        http_session = requests.Session()
         
-        # Configure retry strategy
+        # Configure retry strategy. Transient CDN errors are worth retrying, connection failures
+        # less so, and backoff is capped so one flaky image can't stall a post for seconds
         retry_strategy = Retry(
             total=3,
-            backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"]
+            connect=2,
+            read=2,
+            status=self._retry_status_attempts,
+            backoff_factor=self._retry_backoff_factor,
+            backoff_max=self._retry_backoff_max,
+            status_forcelist=list(self._retry_status_codes),
+            allowed_methods=frozenset({"GET"}),
+            respect_retry_after_header=True,
+            raise_on_status=False
         )
         
-        # Mount adapter with retry strategy
+        # Mount adapter with retry strategy. The pool is sized above the download concurrency so
+        # connections are reused; it doesn't block, since requests has no bound on that wait
         adapter = HTTPAdapter(
             max_retries=retry_strategy,
-            pool_connections=10,
-            pool_maxsize=20
+            pool_connections=16,
+            pool_maxsize=max(self._max_concurrent_downloads * 2, 16)
         )
         
-        self.http_session.mount("http://", adapter)
-        self.http_session.mount("https://", adapter)
+        http_session.mount("http://", adapter)
+        http_session.mount("https://", adapter)
         
         # Set reasonable timeouts
-        self.http_session.timeout = (10, 30)  # (connect, read)
+        http_session.timeout = (10, 30)  # (connect, read)
+        return http_session
+    
+    def _create_http2_client(self) -> 'httpx.Client':
+        """Create an HTTP/2 client for image downloads"""
+        # httpx ignores the client's limits once a transport is given, so they go on the transport
+        transport = httpx.HTTPTransport(
+            http2=True,
+            retries=2,
+            limits=httpx.Limits(max_connections=16, max_keepalive_connections=16, keepalive_expiry=self._keepalive_expiry)
+        )
+        return httpx.Client(
+            timeout=httpx.Timeout(30, connect=10),
+            follow_redirects=True,
+            transport=transport
+        )
+    
+    def _create_api_request(self) -> Request:
+        """Create the atproto transport, keeping PDS connections alive between user actions"""
+        # httpx closes idle connections after 5s by default, which meant a fresh TLS handshake
+        # for nearly every click in the web UI
+        return Request(
+            http2=HTTP2_AVAILABLE,
+            limits=httpx.Limits(max_connections=64, max_keepalive_connections=16, keepalive_expiry=self._keepalive_expiry),
+            event_hooks={'response': [self._on_api_response]}
+        )
     
     def _check_rate_limit(self) -> bool:
         """Rate limiting disabled for better user experience"""
@@ -101,71 +392,219 @@ class BlueskyBot:
         """API call tracking disabled for better user experience"""
         pass
     
-    def _get_cache_key(self, method: str, **kwargs) -> str:
+    def _record_rate_limit(self, headers):
+        """Remember the rate-limit budget advertised by a Bluesky response"""
+        remaining, reset = headers.get('ratelimit-remaining'), headers.get('ratelimit-reset')
+        if remaining is None or reset is None:
+            return
+        try:
+            self._rate_limit_remaining, self._rate_limit_reset = int(remaining), float(reset)
+        except ValueError:
+            logger.debug("Ignoring malformed rate-limit headers: %s / %s", remaining, reset)
+    
+    def _on_api_response(self, response: 'httpx.Response'):
+        """httpx response hook that tracks the rate-limit headers of every API call"""
+        self._record_rate_limit(response.headers)
+    
+    def _rate_limit_interval(self) -> float:
+        """Spacing that spreads a low remaining budget evenly until the window resets"""
+        if self._rate_limit_remaining is None or self._rate_limit_remaining > self._rate_limit_floor:
+            return 0.0
+        window_left = self._rate_limit_reset - time.time()
+        if window_left <= 0:
+            return 0.0
+        return min(self._max_rate_limit_wait, window_left / max(self._rate_limit_remaining, 1))
+    
+    def _pace_timeline_call(self):
+        """Wait only for whatever is left of the minimum interval since the last timeline request started"""
+        interval = max(self._min_api_interval, self._rate_limit_interval())
+        with self._timeline_pacing_lock:
+            now = time.monotonic()
+            next_allowed = max(now, self._last_timeline_call + interval)
+            self._last_timeline_call = next_allowed
+        
+        if next_allowed > now:
+            time.sleep(next_allowed - now)
+    
+    def _get_cache_key(self, method: str, **kwargs) -> tuple:
         """Generate a cache key for API calls"""
-        # Create a deterministic key from method and parameters
-        key_data = f"{method}:{sorted(kwargs.items())}"
-        return hashlib.md5(key_data.encode()).hexdigest()
+        # Keys are only used in-process, so the parameter tuple is hashed directly
+        return (method, tuple(sorted(kwargs.items())))
     
-    def _is_cache_valid(self, cache_entry: Dict[str, Any]) -> bool:
+    def _is_cache_valid(self, cache_entry: Dict[str, Any], policy: str = 'timeline_home', now: Optional[float] = None) -> bool:
         """Check if a cache entry is still valid"""
         if not cache_entry:
             return False
         
+        # Timeline entries are also persisted to disk, so they carry wall-clock timestamps
         cache_time = cache_entry.get('timestamp', 0)
-        return time.time() - cache_time < self._cache_ttl
+        return (now if now is not None else time.time()) - cache_time < self._cache_policies[policy]
     
-    def _get_cached_timeline(self, limit: int, cursor: Optional[str] = None, algorithm: str = 'home') -> Optional[Dict[str, Any]]:
-        """Get timeline data from cache if available and valid"""
-        cache_key = self._get_cache_key('get_timeline', limit=limit, cursor=cursor, algorithm=algorithm)
-        cache_entry = self._timeline_cache.get(cache_key)
-        
-        if self._is_cache_valid(cache_entry):
-            logger.debug(f"Cache hit for timeline: {cache_key}")
-            return cache_entry.get('data')
+    def _get_cached_timeline(self, limit: int, cursor: Optional[str] = None, algorithm: str = 'home', media_only: bool = False,
+                             policy: str = 'timeline_home', allow_stale: bool = False) -> Optional[Dict[str, Any]]:
+        """Get timeline data from cache if available and valid (or merely present, with allow_stale)"""
+        cache_key = self._get_cache_key('get_timeline', limit=limit, cursor=cursor, algorithm=algorithm, media_only=media_only)
+        with self._timeline_cache_lock:
+            cache_entry = self._timeline_cache.get(cache_key)
+        
+        # Fall back to the disk cache and promote hits into memory
+        from_disk = cache_entry is None
+        if from_disk:
+            cache_entry = self._read_disk_cache(cache_key)
+            if cache_entry is None:
+                return None
         
-        return None
+        now = time.time()
+        with self._timeline_cache_lock:
+            if from_disk:
+                self._timeline_cache[cache_key] = cache_entry
+                self._evict_timeline_cache()
+            
+            if not self._is_cache_valid(cache_entry, policy, now):
+                # Expired entries are kept for a while as a fallback, then purged lazily when looked up
+                if now - cache_entry['timestamp'] >= self._cache_stale_max_age:
+                    self._timeline_cache.pop(cache_key, None)
+                    return None
+                if not allow_stale:
+                    return None
+            
+            if cache_key in self._timeline_cache:
+                self._timeline_cache.move_to_end(cache_key)
+        logger.debug("Cache hit for timeline: %s", cache_key)
+        return cache_entry.get('data')
     
-    def _cache_timeline(self, limit: int, cursor: Optional[str] = None, algorithm: str = 'home', data: Any = None):
+    def _cache_timeline(self, limit: int, cursor: Optional[str] = None, algorithm: str = 'home', data: Any = None, media_only: bool = False):
         """Cache timeline data"""
-        cache_key = self._get_cache_key('get_timeline', limit=limit, cursor=cursor, algorithm=algorithm)
-        self._timeline_cache[cache_key] = {
+        cache_key = self._get_cache_key('get_timeline', limit=limit, cursor=cursor, algorithm=algorithm, media_only=media_only)
+        cache_entry = {
             'data': data,
             'timestamp': time.time()
         }
+        with self._timeline_cache_lock:
+            self._timeline_cache[cache_key] = cache_entry
+            self._timeline_cache.move_to_end(cache_key)
+            self._evict_timeline_cache()
         
-        # Clean up old cache entries
-        self._cleanup_cache()
+        self._submit_disk_cache_task(self._write_disk_cache, self._disk_cache_key(cache_key), cache_entry)
     
-    def _cleanup_cache(self):
-        """Remove expired cache entries"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, entry in self._timeline_cache.items()
-            if current_time - entry.get('timestamp', 0) > self._cache_ttl
-        ]
-        
-        for key in expired_keys:
-            del self._timeline_cache[key]
+    def _evict_timeline_cache(self):
+        """Evict least recently used entries once the cache is full (caller holds _timeline_cache_lock)"""
+        while len(self._timeline_cache) > self._cache_max_entries:
+            self._timeline_cache.popitem(last=False)
+    
+    def _invalidate_cached_timeline(self, limit: int, cursor: Optional[str] = None, algorithm: str = 'home', media_only: bool = False):
+        """Drop a timeline page from both cache levels"""
+        cache_key = self._get_cache_key('get_timeline', limit=limit, cursor=cursor, algorithm=algorithm, media_only=media_only)
+        with self._timeline_cache_lock:
+            self._timeline_cache.pop(cache_key, None)
+        # Queued behind any pending write of the same page, so that write can't bring it back
+        self._submit_disk_cache_task(self._delete_disk_cache, self._disk_cache_key(cache_key))
+    
+    def _submit_disk_cache_task(self, fn, *args):
+        """Run a disk cache write in the background"""
+        if not self._disk_cache_path:
+            return
+        try:
+            self._disk_cache_executor.submit(fn, *args)
+        except RuntimeError:
+            pass  # Closed, so the entry stays memory-only
+    
+    def _get_disk_cache(self) -> Optional[sqlite3.Connection]:
+        """Open the on-disk timeline cache, or return None if it is unavailable"""
+        with self._disk_cache_lock:
+            if self._disk_cache is None and self._disk_cache_path:
+                try:
+                    self._create_private_file(self._disk_cache_path)
+                    connection = sqlite3.connect(self._disk_cache_path, check_same_thread=False)
+                    connection.execute(
+                        'CREATE TABLE IF NOT EXISTS timeline_cache (key TEXT PRIMARY KEY, data TEXT, timestamp REAL)'
+                    )
+                    connection.execute('DELETE FROM timeline_cache WHERE timestamp < ?', (time.time() - self._cache_stale_max_age,))
+                    connection.commit()
+                    self._disk_cache = connection
+                except (OSError, sqlite3.Error) as e:
+                    logger.warning("Disk timeline cache unavailable, using memory only: %s", e)
+                    self._disk_cache_path = None
+            return self._disk_cache
+    
+    @staticmethod
+    def _create_private_file(path: str):
+        """Create a file only the current user can read, refusing one planted by someone else"""
+        os.makedirs(os.path.dirname(path), mode=0o700, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | getattr(os, 'O_NOFOLLOW', 0), 0o600)
+        try:
+            if hasattr(os, 'getuid') and os.fstat(fd).st_uid != os.getuid():
+                raise OSError(f"{path} is owned by another user")
+            if hasattr(os, 'fchmod'):
+                os.fchmod(fd, 0o600)
+        finally:
+            os.close(fd)
+    
+    def _disk_cache_key(self, cache_key: tuple) -> str:
+        """Namespace a cache key by account, since disk entries outlive the session"""
+        account_did = getattr(getattr(self.client, 'me', None), 'did', None)
+        return f"{account_did if isinstance(account_did, str) else ''}:{cache_key!r}"
+    
+    def _read_disk_cache(self, cache_key: tuple) -> Optional[Dict[str, Any]]:
+        """Load a timeline cache entry from disk"""
+        disk_cache = self._get_disk_cache()
+        if disk_cache is None:
+            return None
+        try:
+            with self._disk_cache_lock:
+                row = disk_cache.execute(
+                    'SELECT data, timestamp FROM timeline_cache WHERE key = ?', (self._disk_cache_key(cache_key),)
+                ).fetchone()
+            if row is None:
+                return None
+            data = json.loads(row[0])
+            data['feed'] = [get_or_create(item, models.AppBskyFeedDefs.FeedViewPost, strict=False) for item in data['feed']]
+            return {'data': data, 'timestamp': row[1]}
+        except (sqlite3.Error, ValueError, KeyError) as e:
+            logger.debug("Ignoring unreadable disk cache entry: %s", e)
+            return None
+    
+    def _write_disk_cache(self, disk_key: str, cache_entry: Dict[str, Any]):
+        """Persist a timeline cache entry to disk (runs on the disk cache thread)"""
+        disk_cache = self._get_disk_cache()
+        if disk_cache is None:
+            return
+        try:
+            data = cache_entry['data']
+            payload = json.dumps({
+                'feed': [get_model_as_dict(post) for post in data['feed']],
+                'cursor': data.get('cursor')
+            })
+            with self._disk_cache_lock:
+                disk_cache.execute(
+                    'INSERT OR REPLACE INTO timeline_cache (key, data, timestamp) VALUES (?, ?, ?)',
+                    (disk_key, payload, cache_entry['timestamp'])
+                )
+                disk_cache.commit()
+        except Exception as e:
+            # Entries that can't be serialized simply stay memory-only
+            logger.debug("Skipping disk cache write: %s", e)
+    
+    def _delete_disk_cache(self, disk_key: str):
+        """Drop a timeline cache entry from disk (runs on the disk cache thread)"""
+        disk_cache = self._get_disk_cache()
+        if disk_cache is None:
+            return
+        try:
+            with self._disk_cache_lock:
+                disk_cache.execute('DELETE FROM timeline_cache WHERE key = ?', (disk_key,))
+                disk_cache.commit()
+        except sqlite3.Error as e:
+            logger.debug("Could not invalidate disk cache entry: %s", e)
     
     def _is_media_user_cached(self, user_handle: str) -> bool:
         """Check if user is cached as a frequent media poster"""
-        if user_handle not in self._media_user_cache:
-            return False
-        
-        cache_entry = self._media_user_cache[user_handle]
-        if time.time() - cache_entry['timestamp'] > self._media_user_cache_ttl:
-            del self._media_user_cache[user_handle]
-            return False
-        
-        return cache_entry['is_media_user']
+        found, is_media_user = self._get_lookup(self._media_user_cache, user_handle)
+        return found and is_media_user
     
     def _cache_media_user(self, user_handle: str, is_media_user: bool):
         """Cache whether a user frequently posts media"""
-        self._media_user_cache[user_handle] = {
-            'is_media_user': is_media_user,
-            'timestamp': time.time()
-        }
+        self._store_lookup(self._media_user_cache, user_handle, is_media_user, self._media_user_cache_ttl)
     
     def _analyze_user_media_ratio(self, user_handle: str, sample_size: int = 20) -> float:
         """Analyze a user's media posting ratio from recent posts"""
@@ -179,77 +618,84 @@ class BlueskyBot:
             if not author_feed or not hasattr(author_feed, 'feed'):
                 return 0.0
             
-            media_posts = 0
-            total_posts = len(author_feed.feed)
-            
-            for post in author_feed.feed:
-                if self._has_media(post):
-                    media_posts += 1
-            
-            ratio = media_posts / total_posts if total_posts > 0 else 0.0
-            return ratio
+            feed = author_feed.feed
+            total_posts = len(feed)
+            return sum(map(self._has_media, feed)) / total_posts if total_posts else 0.0
             
         except Exception as e:
-            logger.warning(f"Failed to analyze media ratio for {user_handle}: {e}")
+            logger.warning("Failed to analyze media ratio for %s: %s", user_handle, e)
             return 0.0
     
     def _has_media(self, post) -> bool:
         """Check if a post has embedded media (images or external links with thumbnails)"""
+        return self._embed_info(post)[0]
+    
+    def _get_safe_image_count(self, post) -> int:
+        """Safely get the number of images in a post"""
+        return self._embed_info(post)[1]
+    
+    def _embed_info(self, post) -> tuple:
+        """Return (has media, image count) for a post's record embed"""
+        # The same post is checked when its page is fetched and again when it is selected, and
+        # pages overlap between searches - a post's CID pins its content, so the answer is reused
+        cid = getattr(getattr(post, 'post', None), 'cid', None)
+        if not isinstance(cid, str):
+            return self._inspect_embed(post)
+        
+        info = self._embed_info_cache.get(cid)
+        if info is None:
+            info = self._inspect_embed(post)
+            self._embed_info_cache[cid] = info
+            if len(self._embed_info_cache) > self._embed_info_cache_max_entries:
+                # Drop the oldest entry; another thread may have removed it already
+                self._embed_info_cache.pop(next(iter(self._embed_info_cache)), None)
+        return info
+    
+    def _inspect_embed(self, post) -> tuple:
+        """Walk a post's record embed once for images, or link/video cards with thumbnails"""
         try:
-            if not hasattr(post, 'post') or not hasattr(post.post, 'record'):
-                return False
-            
-            record = post.post.record
-            if not hasattr(record, 'embed') or not record.embed:
-                return False
-            
-            embed = record.embed
-            
+            record = getattr(getattr(post, 'post', None), 'record', None)
+            embed = getattr(record, 'embed', None)
+            if not embed:
+                return False, 0
+            
+            # Models carry their lexicon type, so a single check picks the one field worth probing
+            embed_type = getattr(embed, 'py_type', None)
+            if embed_type == 'app.bsky.embed.images':
+                image_count = len(embed.images) if embed.images else 0
+                return image_count > 0, image_count
+            if embed_type == 'app.bsky.embed.external':
+                return bool(getattr(embed.external, 'thumb', None)), 0
+            if embed_type == 'app.bsky.embed.video':
+                return bool(getattr(embed.video, 'thumb', None)), 0
+            if isinstance(embed_type, str):
+                return False, 0  # Record embeds and other types carry no media of their own
+            
+            # Untyped embeds - probe each kind of media
             # Check for images
-            if hasattr(embed, 'images') and embed.images:
-                return True
+            images = getattr(embed, 'images', None)
+            if images:
+                return True, len(images)
             
             # Check for external links with thumbnails
-            if hasattr(embed, 'external') and embed.external:
-                if hasattr(embed.external, 'thumb') and embed.external.thumb:
-                    return True
+            external = getattr(embed, 'external', None)
+            if external and getattr(external, 'thumb', None):
+                return True, 0
             
             # Check for video embeds with thumbnails
-            if hasattr(embed, 'video') and embed.video:
-                if hasattr(embed.video, 'thumb') and embed.video.thumb:
-                    return True
-            
-            return False
-            
-        except Exception as e:
-            logger.debug(f"Error checking media in post: {e}")
-            return False
-    
-    def _get_safe_image_count(self, post) -> int:
-        """Safely get the number of images in a post"""
-        try:
-            if not hasattr(post, 'post') or not hasattr(post.post, 'record'):
-                return 0
+            video = getattr(embed, 'video', None)
+            if video and getattr(video, 'thumb', None):
+                return True, 0
             
-            record = post.post.record
-            if not hasattr(record, 'embed') or not record.embed:
-                return 0
+            return False, 0
             
-            embed = record.embed
-            if hasattr(embed, 'images') and embed.images:
-                return len(embed.images)
-            
-            return 0
         except Exception as e:
-            logger.debug(f"Error getting image count: {e}")
-            return 0
-        
-        if expired_keys:
-            logger.debug(f"Cleaned up {len(expired_keys)} expired cache entries")
+            logger.debug("Error inspecting post embed: %s", e)
+            return False, 0
     
     def get_api_usage_stats(self) -> Dict[str, Any]:
         """Get current API usage statistics"""
-        current_time = time.time()
+        current_time = time.monotonic()
         window_remaining = max(0, self._window_duration - (current_time - self._api_call_window_start))
         
         return {
@@ -257,32 +703,42 @@ class BlueskyBot:
             'max_calls_per_window': self._max_calls_per_window,
             'window_remaining_seconds': window_remaining,
             'cache_entries': len(self._timeline_cache),
+            'stale_cache_hits': self._stale_cache_hits,
             'consecutive_errors': self._consecutive_errors,
+            'rate_limit_remaining': self._rate_limit_remaining,
             'last_api_call_ago_seconds': current_time - self._last_api_call if self._last_api_call > 0 else None,
             'media_user_cache_entries': len(self._media_user_cache),
             'media_feed_uris_configured': len(self._media_feed_uris)
         }
     
+    def reset_seen_posts(self):
+        """Let the non-paginated web fetchers return posts they've already returned"""
+        self._seen_post_uris.clear()
+    
     def reset_api_stats(self):
         """Reset API usage statistics (useful for testing or after errors)"""
         self._api_call_count = 0
-        self._api_call_window_start = time.time()
+        self._api_call_window_start = time.monotonic()
         self._consecutive_errors = 0
+        BlueskyBot._ssm_cache.clear()
     
     def get_media_user_stats(self) -> Dict[str, Any]:
         """Get statistics about cached media users"""
-        current_time = time.time()
+        current_time = time.monotonic()
         active_users = 0
         expired_users = 0
         
-        for user_handle, cache_entry in self._media_user_cache.items():
-            if current_time - cache_entry['timestamp'] > self._media_user_cache_ttl:
+        with self._media_user_cache.lock:
+            expiry_times = [expires_at for _, expires_at in self._media_user_cache.values()]
+        
+        for expires_at in expiry_times:
+            if current_time >= expires_at:
                 expired_users += 1
             else:
                 active_users += 1
         
         return {
-            'total_cached_users': len(self._media_user_cache),
+            'total_cached_users': len(expiry_times),
             'active_cached_users': active_users,
             'expired_cached_users': expired_users,
             'cache_ttl_seconds': self._media_user_cache_ttl,
@@ -292,21 +748,144 @@ class BlueskyBot:
     def add_media_feed_uri(self, feed_uri: str):
         """Add a custom media feed URI to the list of feeds to try"""
         if feed_uri not in self._media_feed_uris:
-            self._media_feed_uris.append(feed_uri)
-            logger.info(f"Added media feed URI: {feed_uri}")
+            self._media_feed_uris[feed_uri] = None
+            logger.info("Added media feed URI: %s", feed_uri)
     
     def remove_media_feed_uri(self, feed_uri: str):
         """Remove a custom media feed URI from the list"""
         if feed_uri in self._media_feed_uris:
-            self._media_feed_uris.remove(feed_uri)
-            logger.info(f"Removed media feed URI: {feed_uri}")
+            del self._media_feed_uris[feed_uri]
+            logger.info("Removed media feed URI: %s", feed_uri)
     
     def clear_media_feed_uris(self):
         """Clear all custom media feed URIs"""
         self._media_feed_uris.clear()
         logger.info("Cleared all media feed URIs")
         
-    def get_ssm_parameter(self, parameter_name: str) -> str:
+    def _open_like_index(self, did: str):
+        """Switch the like index and cached like statuses to the given account"""
+        self._flush_like_index()
+        with self._like_index_lock:
+            self._like_uri_index.clear()
+            self._like_index_file = os.path.join(self._like_index_dir, f"like_index_{did.replace(':', '_')}.json")
+            self._load_like_index()
+        with self._like_status_cache.lock:
+            self._like_status_cache.clear()
+    
+    def _load_like_index(self):
+        """Load the persisted post URI -> like record key index (caller holds _like_index_lock)"""
+        try:
+            if os.path.exists(self._like_index_file):
+                with open(self._like_index_file, 'r', encoding='utf-8') as f:
+                    self._like_uri_index.update(json.load(f))
+        except Exception as e:
+            logger.warning("Failed to load like index: %s", e)
+    
+    def _save_like_index(self):
+        """Persist the like index so it survives restarts (caller holds _like_index_lock)"""
+        # Written to a private file and renamed into place, so a crash or another save never
+        # leaves truncated JSON behind for the next load to throw away
+        if self._like_index_file is None:
+            return  # Not logged in, so there's no account to save the index for
+        try:
+            fd, partial_path = tempfile.mkstemp(prefix='.like_index_', dir=os.path.dirname(self._like_index_file))
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(self._like_uri_index, f)
+                os.replace(partial_path, self._like_index_file)
+            except Exception:
+                os.unlink(partial_path)
+                raise
+        except Exception as e:
+            logger.warning("Failed to save like index: %s", e)
+    
+    def _schedule_like_index_save(self):
+        """Save the like index shortly, batching changes made meanwhile (caller holds _like_index_lock)"""
+        if self._like_index_save_timer is None:
+            self._like_index_save_timer = threading.Timer(self._like_index_save_delay, self._flush_like_index)
+            self._like_index_save_timer.daemon = True
+            self._like_index_save_timer.start()
+    
+    def _flush_like_index(self):
+        """Write out any like index changes still waiting to be saved"""
+        with self._like_index_lock:
+            if self._like_index_save_timer is None:
+                return
+            self._like_index_save_timer.cancel()
+            self._like_index_save_timer = None
+            self._save_like_index()
+    
+    def _remember_like(self, post_uri: str, like_uri: str):
+        """Record the like record key for a post"""
+        self._remember_likes([(post_uri, like_uri)])
+    
+    def _remember_likes(self, likes: List[tuple]):
+        """Record (post URI, like URI) pairs in the like index"""
+        with self._like_index_lock:
+            for post_uri, like_uri in likes:
+                self._store_lookup(self._like_status_cache, post_uri, True, self._like_status_ttl)
+                self._like_uri_index[post_uri] = like_uri.rpartition('/')[2]
+                self._like_uri_index.move_to_end(post_uri)
+            while len(self._like_uri_index) > self._like_index_max_entries:
+                self._like_uri_index.popitem(last=False)
+            self._schedule_like_index_save()
+    
+    def _forget_like(self, post_uri: str):
+        """Drop a post from the like index"""
+        with self._like_index_lock:
+            self._store_lookup(self._like_status_cache, post_uri, False, self._like_status_ttl)
+            if self._like_uri_index.pop(post_uri, None) is not None:
+                self._schedule_like_index_save()
+    
+    def invalidate_like(self, post_uri: str):
+        """Forget the cached like status for a post so the next check asks the API"""
+        with self._like_status_cache.lock:
+            self._like_status_cache.pop(post_uri, None)
+    
+    def get_ssm_parameter(self, parameter_name: str, max_age: float = 300) -> str:
+        """Fetch parameter from AWS SSM Parameter Store, reusing a cached value up to max_age seconds old"""
+        cached = BlueskyBot._ssm_cache.get(parameter_name)
+        if cached and time.monotonic() - cached[0] < max_age:
+            return cached[1]
+        
+        value = self._fetch_ssm_parameter(parameter_name)
+        BlueskyBot._ssm_cache[parameter_name] = (time.monotonic(), value)
+        return value
+    
+    def get_ssm_parameters(self, parameter_names: List[str], max_age: float = 300) -> Dict[str, str]:
+        """Fetch several SSM parameters with batched get_parameters calls, reusing cached values"""
+        now = time.monotonic()
+        values = {}
+        missing = []
+        for name in parameter_names:
+            cached = BlueskyBot._ssm_cache.get(name)
+            if cached and now - cached[0] < max_age:
+                values[name] = cached[1]
+            else:
+                missing.append(name)
+        
+        # get_parameters accepts at most 10 names per call
+        for start in range(0, len(missing), 10):
+            names = missing[start:start + 10]
+            try:
+                response = self.ssm_client.get_parameters(Names=names, WithDecryption=True)
+                fetched = {p['Name']: p['Value'] for p in response.get('Parameters', [])}
+                invalid = response.get('InvalidParameters', [])
+                if invalid:
+                    logger.warning("SSM parameters not found: %s", ', '.join(invalid))
+            except Exception as e:
+                logger.warning("Error fetching SSM parameters %s: %s", ', '.join(names), e)
+                fetched = {}
+            
+            for name in names:
+                # Names the batch couldn't return go through the single lookup and its env fallback
+                value = fetched[name] if name in fetched else self._fetch_ssm_parameter(name)
+                BlueskyBot._ssm_cache[name] = (time.monotonic(), value)
+                values[name] = value
+        
+        return values
+    
+    def _fetch_ssm_parameter(self, parameter_name: str) -> str:
         """Fetch parameter from AWS SSM Parameter Store with environment variable fallback"""
         try:
             response = self.ssm_client.get_parameter(
@@ -315,14 +894,14 @@ class BlueskyBot:
             )
             return response['Parameter']['Value']
         except Exception as e:
-            print(f"Error fetching SSM parameter {parameter_name}: {e}")
-            print("Attempting to use environment variable fallback...")
+            logger.warning("Error fetching SSM parameter %s: %s", parameter_name, e)
+            logger.info("Attempting to use environment variable fallback...")
             
             # Fallback to environment variables for CI/GitHub Actions
             if parameter_name == 'BLUESKY_PASSWORD_BIKELIFE':
                 env_value = os.getenv('BLUESKY_PASSWORD_BIKELIFE')
                 if env_value:
-                    print("Using BLUESKY_PASSWORD_BIKELIFE from environment variable")
+                    logger.info("Using BLUESKY_PASSWORD_BIKELIFE from environment variable")
                     return env_value
             
             # If no fallback available, raise the original exception
@@ -331,22 +910,88 @@ class BlueskyBot:
     def authenticate(self, handle: str, password: str):
         """Authenticate with Bluesky"""
         try:
-            self.client = Client()
+            self.client = Client(request=self._create_api_request())
             self.client.login(handle, password)
-            logger.info(f"Successfully authenticated as {handle}")
-            print(f"Successfully authenticated as {handle}")
+            logger.info("Successfully authenticated as %s", handle)
+            self._open_like_index(self.client.me.did)
+            
+            # Images are requested right after login, so get the CDN connection ready now
+            self._warm_http_pool()
         except Exception as e:
-            logger.error(f"Authentication failed for {handle}: {e}")
-            print(f"Authentication failed: {e}")
+            logger.error("Authentication failed for %s: %s", handle, e)
             raise
     
+    @staticmethod
+    def _iso_now() -> str:
+        """Current UTC time as an AT Protocol datetime string with millisecond precision"""
+        now_ns = time.time_ns()
+        seconds, remainder_ns = divmod(now_ns, 1_000_000_000)
+        t = time.gmtime(seconds)
+        return f"{t.tm_year:04d}-{t.tm_mon:02d}-{t.tm_mday:02d}T{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d}.{remainder_ns // 1_000_000:03d}Z"
+    
+    def _get_lookup(self, cache: LookupCache, key: str):
+        """Return (found, value) for an unexpired lookup cache entry"""
+        with cache.lock:
+            entry = cache.get(key)
+            if entry is None:
+                return False, None
+            value, expires_at = entry
+            if time.monotonic() >= expires_at:
+                del cache[key]
+                return False, None
+            return True, value
+    
+    def _store_lookup(self, cache: LookupCache, key: str, value: Any, ttl: float):
+        """Store a lookup result, evicting the oldest entries past the size bound"""
+        # Lookup caches live only in memory, so expiry uses the monotonic clock
+        with cache.lock:
+            cache[key] = (value, time.monotonic() + ttl)
+            cache.move_to_end(key)
+            while len(cache) > self._lookup_cache_max_entries:
+                cache.popitem(last=False)
+    
     def _get_post_cid(self, post_uri: str) -> Optional[str]:
+        """Get the CID for a post URI, caching hits and briefly caching misses"""
+        found, cid = self._get_lookup(self._cid_cache, post_uri)
+        if found:
+            return cid
+        
+        cid = self._fetch_post_cid(post_uri)
+        ttl = self._cache_policies['post_cid'] if cid else self._lookup_miss_ttl
+        self._store_lookup(self._cid_cache, post_uri, cid, ttl)
+        return cid
+    
+    def _resolve_handles(self, dids) -> Dict[str, str]:
+        """Map DIDs to handles, looking up uncached ones in batches of 25 with get_profiles"""
+        handles = {}
+        missing = []
+        for did in dids:
+            found, handle = self._get_lookup(self._did_handle_cache, did)
+            if found:
+                handles[did] = handle
+            else:
+                missing.append(did)
+        
+        for start in range(0, len(missing), 25):
+            chunk = missing[start:start + 25]
+            try:
+                response = self.client.app.bsky.actor.get_profiles(params={'actors': chunk})
+            except Exception as e:
+                logger.warning("Failed to resolve handles for %s DIDs: %s", len(chunk), e)
+                continue
+            for profile in response.profiles:
+                handles[profile.did] = profile.handle
+                self._store_lookup(self._did_handle_cache, profile.did, profile.handle, self._cache_policies['did_handle'])
+        
+        return handles
+    
+    def _fetch_post_cid(self, post_uri: str) -> Optional[str]:
         """Get the CID for a post URI with improved error handling"""
         try:
             # Parse the post URI to get the repo and record info
             uri_parts = post_uri.split('/')
             if len(uri_parts) < 4:
-                logger.warning(f"Invalid post URI format: {post_uri}")
+                logger.warning("Invalid post URI format: %s", post_uri)
                 return None
             
             repo_did = uri_parts[2]  # The DID part
@@ -372,7 +1017,7 @@ class BlueskyBot:
             return post_record.cid
             
         except Exception as e:
-            logger.warning(f"Could not get CID for post {post_uri}: {e}")
+            logger.warning("Could not get CID for post %s: %s", post_uri, e)
             return None
     
     def _find_like_record(self, post_uri: str) -> Optional[Any]:
@@ -404,10 +1049,24 @@ class BlueskyBot:
                 # Record API call for rate limiting
                 self._record_api_call()
                 
-                # Find the like record for this specific post
+                # Find the like record for this specific post. Every like on the page is indexed,
+                # so later like checks and unlikes for those posts skip this scan
+                match = None
+                page_likes = []
                 for record in likes_response.records:
-                    if hasattr(record.value, 'subject') and record.value.subject.uri == post_uri:
-                        return record
+                    subject = getattr(record.value, 'subject', None)
+                    if subject is None:
+                        continue
+                    if subject.uri == post_uri:
+                        match = record
+                    else:
+                        page_likes.append((subject.uri, record.uri))
+                if match is not None:
+                    page_likes.append((post_uri, match.uri))  # Most recently used, so evicted last
+                if page_likes:
+                    self._remember_likes(page_likes)
+                if match is not None:
+                    return match
                 
                 # Check if there are more records to search
                 if hasattr(likes_response, 'cursor') and likes_response.cursor:
@@ -418,7 +1077,7 @@ class BlueskyBot:
             return None
             
         except Exception as e:
-            logger.error(f"Failed to find like record for {post_uri}: {e}")
+            logger.error("Failed to find like record for %s: %s", post_uri, e)
             return None
     
     def like_post(self, post_uri: str) -> Dict[str, Any]:
@@ -436,7 +1095,7 @@ class BlueskyBot:
             
             # Check if post is already liked to prevent duplicates
             if self._check_if_post_is_liked(post_uri):
-                logger.info(f"Post {post_uri} is already liked")
+                logger.info("Post %s is already liked", post_uri)
                 return {
                     "success": False,
                     "error": "Post is already liked",
@@ -446,7 +1105,7 @@ class BlueskyBot:
             # Get the CID for the post - this is REQUIRED for AT Protocol
             post_cid = self._get_post_cid(post_uri)
             if post_cid is None or not post_cid.strip():
-                logger.error(f"Could not retrieve CID for post {post_uri} - CID is required for likes")
+                logger.error("Could not retrieve CID for post %s - CID is required for likes", post_uri)
                 return {
                     "success": False,
                     "error": "Could not retrieve post CID - required for liking posts",
@@ -459,14 +1118,14 @@ class BlueskyBot:
                     "uri": post_uri,
                     "cid": post_cid
                 },
-                "createdAt": datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                "createdAt": self._iso_now()
             }
             
             # Record API call for rate limiting
             self._record_api_call()
             
             # Use the AT protocol client to create the like record
-            logger.debug(f"Creating like record for post {post_uri} with record: {like_record}")
+            logger.debug("Creating like record for post %s with record: %s", post_uri, like_record)
             response = self.client.com.atproto.repo.create_record(
                 data={
                     "repo": self.client.me.did,
@@ -475,7 +1134,8 @@ class BlueskyBot:
                 }
             )
             
-            logger.info(f"Successfully liked post: {post_uri}")
+            self._remember_like(post_uri, response.uri)
+            logger.info("Successfully liked post: %s", post_uri)
             return {
                 "success": True,
                 "like_uri": response.uri,
@@ -484,13 +1144,30 @@ class BlueskyBot:
             }
             
         except Exception as e:
-            logger.error(f"Failed to like post {post_uri}: {e}")
+            # The request may have reached the server, so the cached status can't be trusted
+            self.invalidate_like(post_uri)
+            logger.error("Failed to like post %s: %s", post_uri, e)
             return {
                 "success": False,
                 "error": str(e),
                 "post_uri": post_uri
             }
     
+    def _delete_like_record(self, like_rkey: str) -> bool:
+        """Delete one of our like records, returning False if no such record existed"""
+        # Record API call for rate limiting
+        self._record_api_call()
+        
+        response = self.client.com.atproto.repo.delete_record(
+            data={
+                "repo": self.client.me.did,
+                "collection": "app.bsky.feed.like",
+                "rkey": like_rkey
+            }
+        )
+        # Deleting a missing record succeeds as a no-op, which the PDS answers without a commit
+        return getattr(response, 'commit', None) is not None
+    
     def unlike_post(self, post_uri: str) -> Dict[str, Any]:
         """Unlike a post by finding and deleting the like record with improved error handling"""
         try:
@@ -504,37 +1181,24 @@ class BlueskyBot:
                     "error": "Rate limit exceeded. Please try again later."
                 }
             
-            # Check if post is actually liked first
-            if not self._check_if_post_is_liked(post_uri):
-                logger.info(f"Post {post_uri} is not liked")
-                return {
-                    "success": False,
-                    "error": "Post is not liked",
-                    "not_liked": True
-                }
-            
-            # Find and delete the like record
-            like_record_to_delete = self._find_like_record(post_uri)
-            
-            if not like_record_to_delete:
-                return {
-                    "success": False,
-                    "error": "No like record found for this post"
-                }
-            
-            # Record API call for rate limiting
-            self._record_api_call()
-            
-            # Delete the like record
-            self.client.com.atproto.repo.delete_record(
-                data={
-                    "repo": self.client.me.did,
-                    "collection": "app.bsky.feed.like",
-                    "rkey": like_record_to_delete.uri.split('/')[-1]  # Extract the record key
-                }
-            )
+            # Use the indexed like record key when we have it. Without one, or if the indexed
+            # record is already gone (the post was unliked, maybe liked again, elsewhere), scan the
+            # like records, which also tells us whether the post is liked at all
+            like_rkey = self._like_uri_index.get(post_uri)
+            if like_rkey is None or not self._delete_like_record(like_rkey):
+                like_record_to_delete = self._find_like_record(post_uri)
+                if not like_record_to_delete:
+                    self._forget_like(post_uri)
+                    logger.info("Post %s is not liked", post_uri)
+                    return {
+                        "success": False,
+                        "error": "Post is not liked",
+                        "not_liked": True
+                    }
+                self._delete_like_record(like_record_to_delete.uri.rpartition('/')[2])  # Extract the record key
+            self._forget_like(post_uri)
             
-            logger.info(f"Successfully unliked post: {post_uri}")
+            logger.info("Successfully unliked post: %s", post_uri)
             return {
                 "success": True,
                 "message": "Post unliked successfully",
@@ -542,7 +1206,9 @@ class BlueskyBot:
             }
             
         except Exception as e:
-            logger.error(f"Failed to unlike post {post_uri}: {e}")
+            # The request may have reached the server, so the cached status can't be trusted
+            self.invalidate_like(post_uri)
+            logger.error("Failed to unlike post %s: %s", post_uri, e)
             return {
                 "success": False,
                 "error": str(e),
@@ -552,71 +1218,175 @@ class BlueskyBot:
     def setup_temp_directory(self):
         """Create temporary directory for downloaded images"""
         self.temp_dir = tempfile.mkdtemp(prefix='bluesky_images_')
-        print(f"Created temporary directory: {self.temp_dir}")
+        logger.info("Created temporary directory: %s", self.temp_dir)
         return self.temp_dir
     
     def download_image(self, url: str, filename: str) -> Optional[str]:
         """Download image from URL and save to temp directory using optimized HTTP session"""
+        image_path, _ = self.download_image_with_info(url, filename)
+        return image_path
+    
+    def download_image_with_info(self, url: str, filename: str) -> tuple:
+        """Download an image and return (local path, image info) without re-reading the file"""
+        data = self._download_image_bytes(url)
+        if not data:
+            if data is not None:
+                logger.warning("Downloaded file %s is empty", filename)
+            return None, {}
+        
+        # Filenames are stable per post so the web app can serve them, which means the same post
+        # formatted twice at once writes the same path - write to a private file and rename it into
+        # place so a reader never sees a half-written image
+        file_path = os.path.join(self.temp_dir, filename)
         try:
-            # Use the optimized HTTP session with connection pooling and retry
-            response = self.http_session.get(url, timeout=(10, 30), stream=True)
-            response.raise_for_status()
-            
-            # Check content type to ensure it's an image
-            content_type = response.headers.get('content-type', '').lower()
-            if not content_type.startswith('image/'):
-                logger.warning(f"URL {url} does not return an image (content-type: {content_type})")
-                return None
-            
-            # Check file size to avoid downloading huge files
-            content_length = response.headers.get('content-length')
-            if content_length and int(content_length) > 10 * 1024 * 1024:  # 10MB limit
-                logger.warning(f"Image {url} is too large ({content_length} bytes), skipping")
-                return None
-            
-            file_path = os.path.join(self.temp_dir, filename)
-            
-            # Stream download for better memory usage
-            with open(file_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
-            
-            # Verify the file was created and has content
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                logger.debug(f"Downloaded image: {filename} ({os.path.getsize(file_path)} bytes)")
-                return file_path
-            else:
-                logger.warning(f"Downloaded file {filename} is empty or doesn't exist")
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                return None
+            fd, partial_path = tempfile.mkstemp(prefix='.partial_', dir=self.temp_dir)
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(partial_path, file_path)
+            except OSError:
+                os.unlink(partial_path)
+                raise
+        except OSError as e:
+            logger.warning("Failed to save image %s: %s", filename, e)
+            return None, {}
+        
+        logger.debug("Downloaded image: %s (%s bytes)", filename, len(data))
+        
+        # Dimensions come from the bytes already in memory
+        image_info = self._read_image_header(data)
+        if image_info:
+            image_info['file_size'] = len(data)
+        return file_path, image_info
+    
+    def _download_image_bytes(self, url: str) -> Optional[bytes]:
+        """Fetch an image body into memory, or None if it can't be downloaded"""
+        if self.http2_client is not None:
+            return self._download_image_bytes_http2(url)
+        
+        try:
+            # Use the optimized HTTP session with connection pooling and retry. The streamed response
+            # holds a pooled connection, so it is closed on every exit, including errors and rejections
+            with self.http_session.get(url, timeout=(10, 30), stream=True) as response:
+                response.raise_for_status()
+                
+                if not self._is_downloadable_image(url, response.headers):
+                    return None
+                
+                # Read the whole body in one call, letting urllib3 undo any gzip/deflate - the bytes are
+                # needed in memory for the header parse anyway, so a chunked copy would only add a second buffer.
+                # One byte past the limit is enough to tell an oversized body without Content-Length
+                response.raw.decode_content = True
+                data = response.raw.read(self._max_image_bytes + 1)
+                if len(data) > self._max_image_bytes:
+                    logger.warning("Image %s is over %s bytes, skipping", url, self._max_image_bytes)
+                    return None
+                return data
                 
         except requests.exceptions.Timeout:
-            logger.warning(f"Timeout downloading image {url}")
+            logger.warning("Timeout downloading image %s", url)
             return None
         except requests.exceptions.RequestException as e:
-            logger.warning(f"Request error downloading image {url}: {e}")
+            logger.warning("Request error downloading image %s: %s", url, e)
+            return None
+        except Exception as e:
+            logger.warning("Failed to download image %s: %s", url, e)
+            return None
+    
+    def _download_image_bytes_http2(self, url: str) -> Optional[bytes]:
+        """Fetch an image body over the shared HTTP/2 client"""
+        try:
+            for attempt in range(self._retry_status_attempts + 1):
+                with self.http2_client.stream('GET', url) as response:
+                    if response.status_code in self._retry_status_codes and attempt < self._retry_status_attempts:
+                        time.sleep(self._retry_delay(attempt + 1, response.headers.get('retry-after')))
+                        continue
+                    response.raise_for_status()
+                    
+                    if not self._is_downloadable_image(url, response.headers):
+                        return None
+                    
+                    # Stop reading as soon as the body passes the limit, whatever Content-Length said
+                    chunks = []
+                    size = 0
+                    for chunk in response.iter_bytes():
+                        size += len(chunk)
+                        if size > self._max_image_bytes:
+                            logger.warning("Image %s is over %s bytes, skipping", url, self._max_image_bytes)
+                            return None
+                        chunks.append(chunk)
+                    return b''.join(chunks)
+        
+        except httpx.TimeoutException:
+            logger.warning("Timeout downloading image %s", url)
+            return None
+        except httpx.HTTPError as e:
+            logger.warning("Request error downloading image %s: %s", url, e)
             return None
         except Exception as e:
-            logger.warning(f"Failed to download image {url}: {e}")
+            logger.warning("Failed to download image %s: %s", url, e)
             return None
     
+    def _retry_delay(self, retry_number: int, retry_after: Optional[str] = None) -> float:
+        """Seconds to wait before a status retry, following urllib3's Retry backoff"""
+        if retry_after is not None:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass  # An HTTP date rather than seconds, so fall back to the backoff
+        if retry_number <= 1:
+            return 0.0
+        return min(self._retry_backoff_max, self._retry_backoff_factor * 2 ** (retry_number - 1))
+    
+    def _is_downloadable_image(self, url: str, headers: Any) -> bool:
+        """Check response headers describe an image within the size limit"""
+        # Check content type to ensure it's an image
+        content_type = headers.get('content-type', '').lower()
+        if not content_type.startswith('image/'):
+            logger.warning("URL %s does not return an image (content-type: %s)", url, content_type)
+            return False
+        
+        # Check file size to avoid downloading huge files - bodies without a Content-Length are
+        # capped while they are read
+        content_length = headers.get('content-length')
+        if content_length and int(content_length) > self._max_image_bytes:
+            logger.warning("Image %s is too large (%s bytes), skipping", url, content_length)
+            return False
+        
+        return True
+    
+    def _read_image_header(self, data: bytes, source: Optional[str] = None) -> Dict[str, Any]:
+        """Get image dimensions and format from the start of an image, or {} if unreadable"""
+        try:
+            # Dimensions and format come from the header, so only the start of the image is parsed
+            parser = ImageFile.Parser()
+            parser.feed(data[:65536])
+            img = parser.image
+            if img is not None:
+                return {'width': img.size[0], 'height': img.size[1], 'format': img.format}
+            
+            # Header didn't fit in the first block (e.g. large EXIF block) - let PIL open the whole image
+            with Image.open(source or io.BytesIO(data)) as fallback_img:
+                return {'width': fallback_img.size[0], 'height': fallback_img.size[1], 'format': fallback_img.format}
+        except Exception as e:
+            logger.warning("Error getting image info: %s", e)
+            return {}
+    
     def get_image_info(self, image_path: str) -> Dict[str, Any]:
         """Get image dimensions and file size"""
         try:
-            with Image.open(image_path) as img:
-                width, height = img.size
-                file_size = os.path.getsize(image_path)
-                return {
-                    'width': width,
-                    'height': height,
-                    'file_size': file_size,
-                    'format': img.format
-                }
-        except Exception as e:
-            print(f"Error getting image info: {e}")
+            # Size comes from the open handle so the path is only resolved once
+            with open(image_path, 'rb') as fh:
+                file_size = os.fstat(fh.fileno()).st_size
+                header = fh.read(65536)
+        except OSError as e:
+            logger.warning("Error getting image info: %s", e)
             return {}
+        
+        image_info = self._read_image_header(header, source=image_path)
+        if image_info:
+            image_info['file_size'] = file_size
+        return image_info
     
     def format_post_text(self, post: models.AppBskyFeedDefs.FeedViewPost) -> str:
         """Format post text with metadata"""
@@ -635,6 +1405,44 @@ URI: {post.post.uri}
 """
         return text
     
+    def _build_image_spec(self, i: int, image: Any, post_did: str, rkey: str) -> tuple:
+        """Work out the download URL and filename for an image embed"""
+        filename = f"image_{rkey}_{i}.jpg"
+        try:
+            blob_hash = _get_image_blob_link(image) or ''
+        except AttributeError:
+            blob_hash = ''
+        if not blob_hash or not isinstance(blob_hash, str) or not blob_hash.startswith('http'):
+            image_url = _blob_url(post_did, blob_hash)
+        else:
+            image_url = blob_hash
+        alt_text = image.alt if hasattr(image, 'alt') else ''
+        return image_url, filename, alt_text, i
+    
+    @staticmethod
+    def _thumb_blob_link(thumb: Any) -> Optional[str]:
+        """CID of a thumbnail blob, from either a model ref or a raw {'$link': ...} ref"""
+        try:
+            return _get_blob_link(thumb)
+        except AttributeError:
+            ref = getattr(thumb, 'ref', None)
+            return ref.get('$link') if isinstance(ref, dict) else None
+    
+    def _fetch_image_spec(self, spec: tuple) -> tuple:
+        """Download an image spec and return (embed dict or None, index)"""
+        image_url, filename, alt_text, i = spec
+        image_path, image_info = self.download_image_with_info(image_url, filename)
+        if not image_path:
+            return None, i
+        return {
+            'type': 'image',
+            'url': image_url,
+            'alt_text': alt_text,
+            'local_path': image_path,
+            'filename': filename,
+            'info': image_info
+        }, i
+    
     def process_embeds(self, post: models.AppBskyFeedDefs.FeedViewPost) -> List[Dict[str, Any]]:
         """Process embedded media in a post"""
         embeds = []
@@ -645,43 +1453,25 @@ URI: {post.post.uri}
         
         embed = record.embed
         
+        # at://<did>/<collection>/<rkey> - split once for every embed below
+        post_uri = post.post.uri
+        post_did = post_uri.split('/', 3)[2]
+        rkey = post_uri.rpartition('/')[2]
+        
         # Handle images
         if hasattr(embed, 'images') and embed.images:
-            from concurrent.futures import ThreadPoolExecutor, as_completed
-
-            def build_image_task(i, image):
-                filename = f"image_{post.post.uri.split('/')[-1]}_{i}.jpg"
-                blob_hash = getattr(getattr(image, 'image', None), 'ref', None).link if hasattr(getattr(image, 'image', None), 'ref') else ''
-                if not blob_hash or not isinstance(blob_hash, str) or not blob_hash.startswith('http'):
-                    post_did = post.post.uri.split('/')[2]
-                    image_url = f"https://bsky.social/xrpc/com.atproto.sync.getBlob?did={post_did}&cid={blob_hash}"
-                else:
-                    image_url = blob_hash
-
-                image_path = self.download_image(image_url, filename)
-                if not image_path:
-                    return None, i
-                image_info = self.get_image_info(image_path)
-                return {
-                    'type': 'image',
-                    'url': image_url,
-                    'alt_text': image.alt if hasattr(image, 'alt') else '',
-                    'local_path': image_path,
-                    'filename': filename,
-                    'info': image_info
-                }, i
+            # Build URLs and filenames up front so workers only do the download and image read
+            specs = [self._build_image_spec(i, image, post_did, rkey) for i, image in enumerate(embed.images)]
 
             results_buffer = [None] * len(embed.images)
-            with ThreadPoolExecutor(max_workers=min(self._max_concurrent_downloads, len(embed.images))) as executor:
-                futures = [executor.submit(build_image_task, i, image) for i, image in enumerate(embed.images)]
-                for future in as_completed(futures):
-                    try:
-                        result, idx = future.result()
-                        if result is not None:
-                            results_buffer[idx] = result
-                    except Exception as e:
-                        print(f"Error processing image embed concurrently: {e}")
-                        continue
+            futures = [self._download_executor.submit(self._fetch_image_spec, spec) for spec in specs]
+            for future in as_completed(futures):
+                try:
+                    result, idx = future.result()
+                    if result is not None:
+                        results_buffer[idx] = result
+                except Exception as e:
+                    logger.warning("Error processing image embed concurrently: %s", e)
 
             for item in results_buffer:
                 if item is not None:
@@ -692,22 +1482,16 @@ URI: {post.post.uri}
             external = embed.external
             if hasattr(external, 'thumb') and external.thumb:
                 # Extract the blob reference from the thumb
-                thumb_ref = None
-                if hasattr(external.thumb, 'ref') and hasattr(external.thumb.ref, 'link'):
-                    thumb_ref = external.thumb.ref.link
-                elif hasattr(external.thumb, 'ref') and hasattr(external.thumb.ref, '$link'):
-                    thumb_ref = external.thumb.ref['$link']
+                thumb_ref = self._thumb_blob_link(external.thumb)
                 
                 if thumb_ref:
                     # Construct the blob URL
-                    post_did = post.post.uri.split('/')[2]
-                    blob_url = f"https://bsky.social/xrpc/com.atproto.sync.getBlob?did={post_did}&cid={thumb_ref}"
+                    blob_url = _blob_url(post_did, thumb_ref)
                     
-                    filename = f"external_{post.post.uri.split('/')[-1]}.jpg"
-                    image_path = self.download_image(blob_url, filename)
+                    filename = f"external_{rkey}.jpg"
+                    image_path, image_info = self.download_image_with_info(blob_url, filename)
                     
                     if image_path:
-                        image_info = self.get_image_info(image_path)
                         embeds.append({
                             'type': 'external',
                             'url': external.uri if hasattr(external, 'uri') else '',
@@ -723,22 +1507,16 @@ URI: {post.post.uri}
             video = embed.video
             if hasattr(video, 'thumb') and video.thumb:
                 # Extract the blob reference from the thumb
-                thumb_ref = None
-                if hasattr(video.thumb, 'ref') and hasattr(video.thumb.ref, 'link'):
-                    thumb_ref = video.thumb.ref.link
-                elif hasattr(video.thumb, 'ref') and hasattr(video.thumb.ref, '$link'):
-                    thumb_ref = video.thumb.ref['$link']
+                thumb_ref = self._thumb_blob_link(video.thumb)
                 
                 if thumb_ref:
                     # Construct the blob URL
-                    post_did = post.post.uri.split('/')[2]
-                    blob_url = f"https://bsky.social/xrpc/com.atproto.sync.getBlob?did={post_did}&cid={thumb_ref}"
+                    blob_url = _blob_url(post_did, thumb_ref)
                     
-                    filename = f"video_{post.post.uri.split('/')[-1]}.jpg"
-                    image_path = self.download_image(blob_url, filename)
+                    filename = f"video_{rkey}.jpg"
+                    image_path, image_info = self.download_image_with_info(blob_url, filename)
                     
                     if image_path:
-                        image_info = self.get_image_info(image_path)
                         embeds.append({
                             'type': 'video',
                             'url': video.uri if hasattr(video, 'uri') else '',
@@ -751,82 +1529,155 @@ URI: {post.post.uri}
         
         return embeds
     
-    def display_post_with_media(self, post: models.AppBskyFeedDefs.FeedViewPost):
-        """Display post text and associated media"""
-        print(self.format_post_text(post))
-        
-        embeds = self.process_embeds(post)
+    def display_post_with_media(self, post: models.AppBskyFeedDefs.FeedViewPost, embeds: Optional[List[Dict[str, Any]]] = None):
+        """Display post text and associated media, downloading the media unless already processed"""
+        if embeds is None:
+            embeds = self.process_embeds(post)
         
+        # Built up and printed in one call so a post's output isn't interleaved or written line by line
+        lines = [self.format_post_text(post)]
         if embeds:
-            print("📸 EMBEDDED MEDIA:")
+            lines.append("📸 EMBEDDED MEDIA:")
             for embed in embeds:
                 if embed['type'] == 'image':
-                    print(f"  🖼️  Image: {embed['filename']}")
-                    print(f"      Alt text: {embed['alt_text']}")
-                    print(f"      Dimensions: {embed['info'].get('width', '?')}x{embed['info'].get('height', '?')}")
-                    print(f"      File size: {embed['info'].get('file_size', 0)} bytes")
-                    print(f"      Local path: {embed['local_path']}")
-                elif embed['type'] == 'external':
-                    print(f"  🔗 External link: {embed['url']}")
-                    print(f"      Title: {embed['title']}")
-                    print(f"      Description: {embed['description']}")
-                    print(f"      Thumbnail: {embed['filename']}")
-                    print(f"      Thumbnail path: {embed['thumb_path']}")
-                elif embed['type'] == 'video':
-                    print(f"  🎥 Video: {embed['url']}")
-                    print(f"      Title: {embed['title']}")
-                    print(f"      Description: {embed['description']}")
-                    print(f"      Thumbnail: {embed['filename']}")
-                    print(f"      Thumbnail path: {embed['thumb_path']}")
-            print()
+                    info = embed['info']
+                    lines.append(
+                        f"  🖼️  Image: {embed['filename']}\n"
+                        f"      Alt text: {embed['alt_text']}\n"
+                        f"      Dimensions: {info.get('width', '?')}x{info.get('height', '?')}\n"
+                        f"      File size: {info.get('file_size', 0)} bytes\n"
+                        f"      Local path: {embed['local_path']}"
+                    )
+                elif embed['type'] in ('external', 'video'):
+                    label = "🔗 External link" if embed['type'] == 'external' else "🎥 Video"
+                    lines.append(
+                        f"  {label}: {embed['url']}\n"
+                        f"      Title: {embed['title']}\n"
+                        f"      Description: {embed['description']}\n"
+                        f"      Thumbnail: {embed['filename']}\n"
+                        f"      Thumbnail path: {embed['thumb_path']}"
+                    )
+            lines.append("")
         else:
-            print("No embedded media found in this post.\n")
+            lines.append("No embedded media found in this post.\n")
+        print("\n".join(lines))
     
-    def fetch_timeline(self, limit: int = 10, cursor: Optional[str] = None, algorithm: str = 'home') -> List[models.AppBskyFeedDefs.FeedViewPost]:
+    def fetch_timeline(self, limit: int = 10, cursor: Optional[str] = None, algorithm: str = 'home', media_only: bool = False) -> List[models.AppBskyFeedDefs.FeedViewPost]:
         """Fetch timeline posts from HOME timeline (followed users only) with caching and rate limiting"""
+        return self.fetch_timeline_page(limit, cursor, algorithm, media_only).feed
+    
+    def fetch_timeline_page(self, limit: int = 10, cursor: Optional[str] = None, algorithm: str = 'home', media_only: bool = False) -> TimelinePage:
+        """Fetch a HOME timeline page together with its next-page cursor
+        
+        With media_only=True the raw JSON response is pre-filtered on the record embed type
+        and only posts that can carry media are turned into models.
+        """
         try:
-            # Check cache first
-            cached_data = self._get_cached_timeline(limit, cursor, algorithm)
+            # Check cache first - the top page gets new posts first, so it is kept fresher
+            policy = 'timeline_home' if cursor else 'timeline_first_page'
+            cached_data = self._get_cached_timeline(limit, cursor, algorithm, media_only, policy=policy)
             if cached_data:
-                return cached_data.get('feed', [])
+                return TimelinePage(cached_data.get('feed', []), cached_data.get('cursor'))
             
             # Check rate limits before making API call
             if not self._check_rate_limit():
                 logger.warning("Rate limit exceeded, cannot fetch timeline")
-                return []
+                return TimelinePage([], None)
             
-            # Make API call
-            timeline = self.client.get_timeline(limit=limit, cursor=cursor, algorithm=algorithm)
-            self._record_api_call()
+            # Single-flight: concurrent misses for the same page wait on the first caller's request
+            cache_key = self._get_cache_key('get_timeline', limit=limit, cursor=cursor, algorithm=algorithm, media_only=media_only)
+            with self._inflight_lock:
+                inflight = self._inflight.get(cache_key)
+                is_owner = inflight is None
+                if is_owner:
+                    inflight = Future()
+                    self._inflight[cache_key] = inflight
             
-            # Cache the result
-            timeline_data = {
-                'feed': timeline.feed,
-                'cursor': getattr(timeline, 'cursor', None)
-            }
-            self._cache_timeline(limit, cursor, algorithm, timeline_data)
+            if not is_owner:
+                return inflight.result(timeout=30)
+            
+            try:
+                # Make API call - request time already spent counts towards the pacing interval
+                self._pace_timeline_call()
+                if media_only:
+                    feed, next_cursor = self._get_media_timeline(limit=limit, cursor=cursor, algorithm=algorithm)
+                else:
+                    timeline = self.client.get_timeline(limit=limit, cursor=cursor, algorithm=algorithm)
+                    feed, next_cursor = timeline.feed, getattr(timeline, 'cursor', None)
+                self._record_api_call()
+                
+                # Cache the result
+                timeline_data = {
+                    'feed': feed,
+                    'cursor': next_cursor
+                }
+                self._cache_timeline(limit, cursor, algorithm, timeline_data, media_only)
+                page = TimelinePage(feed, next_cursor)
+                inflight.set_result(page)
+            except Exception as e:
+                inflight.set_exception(e)
+                raise
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(cache_key, None)
             
-            return timeline.feed
+            return page
         except Exception as e:
             self._consecutive_errors += 1
-            logger.error(f"Error fetching timeline: {e}")
+            logger.error("Error fetching timeline: %s", e)
+            if isinstance(e, RateLimitExceededError) and e.response is not None:
+                # The 429 carries the reset time, so later calls wait for it instead of guessing
+                self._record_rate_limit(e.response.headers)
+            
+            # Serve an expired copy of this page rather than nothing while the API is failing
+            stale_data = self._get_cached_timeline(limit, cursor, algorithm, media_only, allow_stale=True)
+            if stale_data:
+                self._stale_cache_hits += 1
+                logger.warning("⚠️  Serving stale cached timeline while the API is unavailable")
+                return TimelinePage(stale_data.get('feed', []), stale_data.get('cursor'))
             
             # If we have too many consecutive errors, increase the delay
             if self._consecutive_errors >= self._max_consecutive_errors:
-                logger.warning(f"Too many consecutive errors ({self._consecutive_errors}), increasing delay")
+                logger.warning("Too many consecutive errors (%s), increasing delay", self._consecutive_errors)
                 time.sleep(min(5, self._consecutive_errors))
             
-            return []
+            return TimelinePage([], None)
     
-    def fetch_media_feed(self, limit: int = 50, cursor: Optional[str] = None) -> List[models.AppBskyFeedDefs.FeedViewPost]:
+    def _get_media_timeline(self, limit: int, cursor: Optional[str] = None, algorithm: str = 'home'):
+        """Fetch a raw timeline page and only build models for posts whose record embeds media"""
+        response = self.client.invoke_query(
+            'app.bsky.feed.getTimeline',
+            params=models.AppBskyFeedGetTimeline.Params(algorithm=algorithm, cursor=cursor, limit=limit),
+            output_encoding='application/json'
+        )
+        content = response.content if isinstance(response.content, dict) else {}
+        
+        feed = []
+        for item in content.get('feed', []):
+            embed = item.get('post', {}).get('record', {}).get('embed') or {}
+            if embed.get('$type') not in _MEDIA_EMBED_TYPES:
+                continue
+            
+            post = get_or_create(item, models.AppBskyFeedDefs.FeedViewPost, strict=True)
+            if self._has_media(post):
+                feed.append(post)
+        
+        return feed, content.get('cursor')
+    
+    def fetch_media_feed(self, limit: int = 50, cursor: Optional[str] = None) -> List[models.AppBskyFeedDefs.FeedViewPost]:
         """Fetch from custom media-focused feeds if available, fallback to optimized timeline"""
+        # Callers only keep posts with media, so the timeline fallback skips building models for the rest
+        return self.fetch_media_feed_page(limit, cursor, media_only=True).feed
+    
+    def fetch_media_feed_page(self, limit: int = 50, cursor: Optional[str] = None, media_only: bool = False) -> TimelinePage:
+        """Fetch a media feed page together with its next-page cursor (media_only applies to the timeline fallback)"""
         try:
             # Try custom media feeds first
             for feed_uri in self._media_feed_uris:
                 try:
                     if not self._check_rate_limit():
                         logger.warning("Rate limit exceeded, cannot fetch media feed")
-                        return []
+                        return TimelinePage([], None)
                     
                     feed = self.client.app.bsky.feed.get_feed(
                         feed=feed_uri,
@@ -835,144 +1686,205 @@ URI: {post.post.uri}
                     )
                     self._record_api_call()
                     
-                    logger.info(f"Successfully fetched from custom media feed: {feed_uri}")
-                    return feed.feed
+                    logger.info("Successfully fetched from custom media feed: %s", feed_uri)
+                    return TimelinePage(feed.feed, getattr(feed, 'cursor', None))
                     
                 except Exception as e:
-                    logger.warning(f"Failed to fetch from custom feed {feed_uri}: {e}")
+                    logger.warning("Failed to fetch from custom feed %s: %s", feed_uri, e)
                     continue
             
             # Fallback to optimized timeline with reliable algorithm
             logger.info("No custom media feeds available, using optimized timeline")
-            return self.fetch_timeline(limit=limit, cursor=cursor, algorithm='home')
+            return self.fetch_timeline_page(limit=limit, cursor=cursor, algorithm='home', media_only=media_only)
+            
+        except Exception as e:
+            logger.error("Error fetching media feed: %s", e)
+            return TimelinePage([], None)
+    
+    def _fetch_media_user_feed(self, handle: str, limit: int) -> List[models.AppBskyFeedDefs.FeedViewPost]:
+        """Fetch a user's recent media posts, or [] if they don't post media often"""
+        try:
+            # Check if user is cached as media user - users found not to post much media are
+            # cached too, so they aren't re-analyzed on every call
+            found, is_media_user = self._get_lookup(self._media_user_cache, handle)
+            if not found:
+                # Analyze user's media ratio
+                media_ratio = self._analyze_user_media_ratio(handle)
+                is_media_user = media_ratio > self._media_user_threshold
+                self._cache_media_user(handle, is_media_user)
+            
+            # Only fetch from users who frequently post media
+            if not is_media_user:
+                return []
+            if not self._check_rate_limit():
+                logger.warning("Rate limit exceeded, cannot fetch posts from %s", handle)
+                return []
             
+            # Let the AppView drop text-only posts so each page is all media
+            user_posts = self.client.app.bsky.feed.get_author_feed(
+                params={'actor': handle, 'limit': limit, 'filter': 'posts_with_media'}
+            )
+            self._record_api_call()
+            return user_posts.feed
+                
         except Exception as e:
-            logger.error(f"Error fetching media feed: {e}")
+            logger.warning("Failed to fetch posts from %s: %s", handle, e)
             return []
     
     def fetch_posts_from_media_users(self, user_handles: List[str], limit: int = 10) -> List[models.AppBskyFeedDefs.FeedViewPost]:
         """Fetch posts from users known to post media frequently"""
+        if not user_handles:
+            return []
+        
         posts = []
         
-        for handle in user_handles:
-            try:
-                # Check if user is cached as media user
-                if not self._is_media_user_cached(handle):
-                    # Analyze user's media ratio
-                    media_ratio = self._analyze_user_media_ratio(handle)
-                    self._cache_media_user(handle, media_ratio > self._media_user_threshold)
-                
-                # Only fetch from users who frequently post media
-                if self._is_media_user_cached(handle):
-                    if not self._check_rate_limit():
-                        logger.warning("Rate limit exceeded, cannot fetch user posts")
-                        break
-                    
-                    user_posts = self.client.app.bsky.feed.get_author_feed(
-                        actor=handle,
-                        limit=limit
-                    )
-                    self._record_api_call()
-                    
-                    # Filter for media posts
-                    for post in user_posts.feed:
-                        if self._has_media(post):
-                            posts.append(post)
-                            if len(posts) >= limit:
-                                break
+        # Author feeds are independent round-trips, so they're fetched together and read back in handle order
+        executor = ThreadPoolExecutor(max_workers=min(self._max_concurrent_user_fetches, len(user_handles)),
+                                      thread_name_prefix='media-users')
+        try:
+            futures = [executor.submit(self._fetch_media_user_feed, handle, limit) for handle in user_handles]
+            for future in futures:
+                # Filter for media posts
+                for post in future.result():
+                    if self._has_media(post):
+                        posts.append(post)
+                        if len(posts) >= limit:
+                            break
                 
                 if len(posts) >= limit:
                     break
-                    
-            except Exception as e:
-                logger.warning(f"Failed to fetch posts from {handle}: {e}")
-                continue
+        finally:
+            # Feeds for handles after the limit was reached are no longer needed
+            executor.shutdown(wait=False, cancel_futures=True)
         
         return posts[:limit]
     
-    def fetch_posts_with_images(self, target_count: int = 5, max_fetches: int = 10) -> List[models.AppBskyFeedDefs.FeedViewPost]:
+    def fetch_posts_with_images(self, target_count: int = 5, max_fetches: int = 10, max_posts_per_user: Optional[int] = None) -> List[models.AppBskyFeedDefs.FeedViewPost]:
         """Fetch posts until we have a good number of posts with images - OPTIMIZED VERSION"""
-        import time
+        return [
+            event['post']
+            for event in self.fetch_posts_with_images_stream_generator(target_count, max_fetches, max_posts_per_user)
+            if event['type'] == 'post_found'
+        ]
+    
+    def fetch_posts_with_images_stream_generator(self, target_count: int = 5, max_fetches: int = 10, max_posts_per_user: Optional[int] = None):
+        """Generator that yields each post with images as soon as it is found, followed by a completion event
         
-        posts_with_images = []
+        At most max_posts_per_user posts are taken from any one author (default: a third of
+        target_count) so a single prolific poster can't fill the whole result.
+        """
+        posts_found = 0
         cursor = None
         fetch_count = 0
-        
-        print(f"🔍 Searching for {target_count} posts with images (optimized)...")
-        
-        # Try media feed first for better efficiency
-        try:
-            media_feed = self.fetch_media_feed(limit=target_count * 2, cursor=cursor)
-            if media_feed:
-                for post in media_feed:
-                    if self._has_media(post):
-                        posts_with_images.append(post)
-                        print(f"📸 Found post with media from custom feed - {len(posts_with_images)}/{target_count}")
-                        if len(posts_with_images) >= target_count:
-                            break
-                
-                if len(posts_with_images) >= target_count:
-                    print(f"✅ Found {len(posts_with_images)} posts with images from custom media feed")
-                    return posts_with_images[:target_count]
-        except Exception as e:
-            logger.warning(f"Custom media feed failed, falling back to timeline: {e}")
-        
-        # Fallback to optimized timeline fetching
-        while len(posts_with_images) < target_count and fetch_count < max_fetches:
+        per_user_cap = max_posts_per_user or max(1, target_count // 3)
+        user_post_counts = Counter()  # Track how many posts we've taken from each author
+        capped_users = set()  # Authors that have reached the cap - a single membership test per post
+        
+        logger.info("🔍 Searching for %s posts with images (optimized)...", target_count)
+        yielded_uris = set()  # The media feed fallback is the top of the timeline, so both phases can return a post
+        
+        # Timeline pages are chained by cursor, so the next page is prefetched in the background
+        # while the current one is consumed
+        def fetch_page(page_cursor: Optional[str]):
+            # Use appropriate batch size - ensure we fetch enough posts to find media
+            remaining_needed = target_count - posts_found
+            batch_size = max(self._media_focused_batch_size, remaining_needed * 3)  # Fetch 3x what we need to account for non-media posts
+            return self.fetch_timeline_page(limit=batch_size, cursor=page_cursor, algorithm='home', media_only=True)
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='timeline-prefetch') as prefetcher:
+            # Custom media feeds are a separate request, so the first timeline page is fetched
+            # alongside them. Without custom feeds the media feed is the timeline itself
+            next_page = prefetcher.submit(fetch_page, cursor) if self._media_feed_uris else None
+            
+            # Try media feed first for better efficiency
             try:
-                # Use appropriate batch size - ensure we fetch enough posts to find media
-                remaining_needed = target_count - len(posts_with_images)
-                batch_size = max(self._media_focused_batch_size, remaining_needed * 3)  # Fetch 3x what we need to account for non-media posts
-                timeline_feed = self.fetch_timeline(limit=batch_size, cursor=cursor, algorithm='home')
-                
-                if not timeline_feed:
-                    print("No more posts available in timeline")
-                    break
-                
-                # Get cursor from cache for next iteration
-                cached_data = self._get_cached_timeline(batch_size, cursor, 'home')
-                if cached_data:
-                    cursor = cached_data.get('cursor')
-                
-                # Check each post for images with early exit
-                for post in timeline_feed:
-                    if self._has_media(post):
-                        posts_with_images.append(post)
-                        print(f"📸 Found post with media - {len(posts_with_images)}/{target_count}")
+                media_feed = self.fetch_media_feed(limit=target_count * 2, cursor=cursor)
+                if media_feed:
+                    for post in media_feed:
+                        author_did = _get_post_author_did(post)
+                        if author_did in capped_users:
+                            continue
                         
-                        # Early exit when target reached
-                        if len(posts_with_images) >= target_count:
-                            break
-                
-                # Early exit if we have enough posts
-                if len(posts_with_images) >= target_count:
-                    break
-                
-                # Update cursor for next fetch
-                if cached_data and cached_data.get('cursor'):
-                    cursor = cached_data.get('cursor')
-                else:
-                    # If no cursor available, we've reached the end of the timeline
-                    print("📄 Reached end of timeline - no more posts available")
-                    break
-                
-                fetch_count += 1
-                
-                # Be respectful - wait between requests (reduced since we have rate limiting)
-                if len(posts_with_images) < target_count and fetch_count < max_fetches:
-                    print(f"⏳ Waiting 1 second before next fetch... (fetch {fetch_count}/{max_fetches})")
-                    time.sleep(1)
-                
+                        if self._has_media(post):
+                            user_post_counts[author_did] += 1
+                            if user_post_counts[author_did] >= per_user_cap:
+                                capped_users.add(author_did)
+                            posts_found += 1
+                            yielded_uris.add(_get_post_uri(post))
+                            logger.debug("📸 Found post with media from custom feed - %s/%s", posts_found, target_count)
+                            yield {'type': 'post_found', 'post': post, 'posts_found': posts_found}
+                            if posts_found >= target_count:
+                                break
+                    
+                    if posts_found >= target_count:
+                        logger.info("✅ Found %s posts with images from custom media feed", posts_found)
+                        yield {'type': 'complete', 'count': posts_found, 'fetch_count': fetch_count}
+                        return
             except Exception as e:
-                print(f"Error fetching posts: {e}")
-                break
-        
-        print(f"✅ Found {len(posts_with_images)} posts with images after {fetch_count} fetches")
-        if len(posts_with_images) < target_count:
-            print(f"⚠️  Warning: Only found {len(posts_with_images)} posts, requested {target_count}")
-            print(f"   - Fetches attempted: {fetch_count}/{max_fetches}")
-            print(f"   - Timeline exhausted: {cursor is None}")
-        return posts_with_images
+                logger.warning("Custom media feed failed, falling back to timeline: %s", e)
+            
+            # Fallback to optimized timeline fetching
+            if next_page is None:
+                next_page = prefetcher.submit(fetch_page, cursor)
+            
+            while next_page is not None and posts_found < target_count and fetch_count < max_fetches:
+                try:
+                    timeline_feed, cursor = next_page.result()
+                    next_page = None
+                    fetch_count += 1
+                    
+                    if not timeline_feed and not cursor:
+                        logger.info("No more posts available in timeline")
+                        break
+                    
+                    # Start fetching the next page before consuming this one, unless this page alone
+                    # can satisfy the target
+                    if cursor and fetch_count < max_fetches and len(timeline_feed) < target_count - posts_found:
+                        next_page = prefetcher.submit(fetch_page, cursor)
+                    
+                    # Check each post for images with early exit
+                    for post in timeline_feed:
+                        author_did = _get_post_author_did(post)
+                        if author_did in capped_users:
+                            continue
+                        
+                        if self._has_media(post):
+                            post_uri = _get_post_uri(post)
+                            if post_uri in yielded_uris:
+                                continue
+                            yielded_uris.add(post_uri)
+                            user_post_counts[author_did] += 1
+                            if user_post_counts[author_did] >= per_user_cap:
+                                capped_users.add(author_did)
+                            posts_found += 1
+                            logger.debug("📸 Found post with media - %s/%s", posts_found, target_count)
+                            yield {'type': 'post_found', 'post': post, 'posts_found': posts_found}
+                            
+                            # Early exit when target reached
+                            if posts_found >= target_count:
+                                break
+                    
+                    if not cursor:
+                        # If no cursor available, we've reached the end of the timeline
+                        logger.info("📄 Reached end of timeline - no more posts available")
+                        break
+                    
+                    # The page was smaller than expected once per-user caps applied - fetch on
+                    if next_page is None and posts_found < target_count and fetch_count < max_fetches:
+                        next_page = prefetcher.submit(fetch_page, cursor)
+                    
+                except Exception as e:
+                    logger.error("Error fetching posts: %s", e)
+                    break
+        
+        logger.info("✅ Found %s posts with images after %s fetches", posts_found, fetch_count)
+        if posts_found < target_count:
+            logger.warning(
+                "⚠️  Only found %s posts, requested %s (fetches attempted: %s/%s, timeline exhausted: %s)",
+                posts_found, target_count, fetch_count, max_fetches, cursor is None
+            )
+        
+        yield {'type': 'complete', 'count': posts_found, 'fetch_count': fetch_count}
     
     def format_post_for_web(self, post: models.AppBskyFeedDefs.FeedViewPost) -> Dict[str, Any]:
         """Format post data for web display"""
@@ -981,8 +1893,8 @@ URI: {post.post.uri}
         
         embeds = self.process_embeds(post)
         
-        # Check if this post is liked by the current user
-        is_liked = self._check_if_post_is_liked(post.post.uri)
+        # Check if this post is liked by the current user - the feed's viewer state usually answers this
+        is_liked = self._check_if_post_is_liked(post.post.uri, post_view=post.post)
         
         return {
             'author': {
@@ -1002,20 +1914,62 @@ URI: {post.post.uri}
             'embeds': embeds
         }
     
-    def _check_if_post_is_liked(self, post_uri: str) -> bool:
+    def _check_if_post_is_liked(self, post_uri: str, post_view: Optional[Any] = None) -> bool:
         """Check if a post is already liked by the current user with improved efficiency"""
         try:
             if not self.client:
                 return False
             
-            # Use the optimized find_like_record method
-            like_record = self._find_like_record(post_uri)
-            return like_record is not None
+            # Authenticated post views carry viewer.like, so no API call is needed
+            viewer = getattr(post_view, 'viewer', None)
+            if viewer is not None:
+                like_uri = getattr(viewer, 'like', None)
+                self._apply_viewer_like(post_uri, like_uri)
+                return bool(like_uri)
+            
+            # A recent answer is reused instead of fetching the post or rescanning the likes
+            found, is_liked = self._get_lookup(self._like_status_cache, post_uri)
+            if found:
+                return is_liked
+            
+            # Fetch the post view for its viewer state, falling back to scanning the like records
+            like_uri = self._get_viewer_like(post_uri)
+            if like_uri is not None:
+                self._apply_viewer_like(post_uri, like_uri)
+                return bool(like_uri)
+            
+            is_liked = self._find_like_record(post_uri) is not None
+            self._store_lookup(self._like_status_cache, post_uri, is_liked, self._like_status_ttl)
+            return is_liked
             
         except Exception as e:
-            logger.warning(f"Could not check like status for post {post_uri}: {e}")
+            logger.warning("Could not check like status for post %s: %s", post_uri, e)
             return False
     
+    def _apply_viewer_like(self, post_uri: str, like_uri: Optional[str]):
+        """Bring the like index and cached like status in line with a post view's viewer.like"""
+        # The viewer state comes from the server, so it wins over likes and unlikes we remember
+        if not like_uri:
+            self._forget_like(post_uri)
+        elif isinstance(like_uri, str):
+            if self._like_uri_index.get(post_uri) != like_uri.rpartition('/')[2]:
+                self._remember_like(post_uri, like_uri)
+            else:
+                self._store_lookup(self._like_status_cache, post_uri, True, self._like_status_ttl)
+    
+    def _get_viewer_like(self, post_uri: str) -> Optional[str]:
+        """Return the viewer's like URI for a post ('' if not liked), or None if unknown"""
+        try:
+            response = self.client.get_posts([post_uri])
+        except Exception as e:
+            logger.debug("getPosts failed for %s: %s", post_uri, e)
+            return None
+        
+        for post_view in response.posts:
+            if post_view.uri == post_uri and post_view.viewer is not None:
+                return post_view.viewer.like or ''
+        return None
+    
     def refresh_like_status(self, post_uri: str) -> Dict[str, Any]:
         """Refresh the like status for a specific post"""
         try:
@@ -1034,7 +1988,7 @@ URI: {post.post.uri}
             }
             
         except Exception as e:
-            logger.error(f"Failed to refresh like status for {post_uri}: {e}")
+            logger.error("Failed to refresh like status for %s: %s", post_uri, e)
             return {
                 "success": False,
                 "error": str(e),
@@ -1085,7 +2039,7 @@ URI: {post.post.uri}
                         "cid": root_post_record.cid
                     }
                 },
-                "createdAt": datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                "createdAt": self._iso_now()
             }
             
             # Post the reply
@@ -1097,7 +2051,7 @@ URI: {post.post.uri}
                 }
             )
             
-            logger.info(f"Successfully posted reply to {post_uri}: {response.uri}")
+            logger.info("Successfully posted reply to %s: %s", post_uri, response.uri)
             
             # Store the reply for analytics tracking
             self._store_reply_for_analytics(post_uri, reply_text, response.uri)
@@ -1110,7 +2064,7 @@ URI: {post.post.uri}
             }
             
         except Exception as e:
-            logger.error(f"Failed to post reply to {post_uri}: {e}")
+            logger.error("Failed to post reply to %s: %s", post_uri, e)
             return {
                 "success": False,
                 "error": str(e),
@@ -1120,16 +2074,6 @@ URI: {post.post.uri}
     def _store_reply_for_analytics(self, post_uri: str, reply_text: str, reply_uri: str):
         """Store reply data for analytics tracking"""
         try:
-            # Create a simple JSON file to track replies
-            replies_file = os.path.join(os.path.dirname(__file__), '..', 'replies_tracking.json')
-            
-            # Load existing replies
-            replies_data = []
-            if os.path.exists(replies_file):
-                with open(replies_file, 'r', encoding='utf-8') as f:
-                    replies_data = json.load(f)
-            
-            # Add new reply
             reply_entry = {
                 "post_uri": post_uri,
                 "reply_text": reply_text,
@@ -1138,21 +2082,64 @@ URI: {post.post.uri}
                 "author_handle": self.client.me.handle if self.client and hasattr(self.client, 'me') else "unknown"
             }
             
-            replies_data.append(reply_entry)
-            
-            # Keep only last 30 days of replies to prevent file from growing too large
-            cutoff_date = datetime.now() - timedelta(days=30)
-            replies_data = [
-                reply for reply in replies_data 
-                if datetime.fromisoformat(reply['timestamp']) > cutoff_date
-            ]
-            
-            # Save back to file
-            with open(replies_file, 'w', encoding='utf-8') as f:
-                json.dump(replies_data, f, indent=2, ensure_ascii=False)
+            # Appending one line keeps each reply O(1) - old entries are dropped by periodic compaction
+            with self._replies_lock:
+                self._migrate_legacy_replies()
+                with open(self._replies_file, 'a', encoding='utf-8') as f:
+                    f.write(json.dumps(reply_entry, ensure_ascii=False) + '\n')
+                self._replies_since_compact += 1
+                if self._replies_since_compact >= self._replies_compact_every:
+                    self._compact_replies_log()
                 
         except Exception as e:
-            logger.warning(f"Failed to store reply for analytics: {e}")
+            logger.warning("Failed to store reply for analytics: %s", e)
+    
+    def _iter_replies(self):
+        """Yield each reply entry within the retention window, skipping unreadable lines"""
+        if not os.path.exists(self._replies_file):
+            return
+        cutoff = (datetime.now() - timedelta(days=self._replies_retention_days)).isoformat()
+        with open(self._replies_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    reply = json.loads(line)
+                except ValueError:
+                    continue  # A write cut short by a crash leaves a partial last line
+                # Timestamps are local isoformat strings, so they compare in time order
+                if reply.get('timestamp', '') > cutoff:
+                    yield reply
+    
+    def _compact_replies_log(self):
+        """Rewrite the replies log without entries past the retention window (caller holds _replies_lock)"""
+        kept = list(self._iter_replies())
+        
+        fd, partial_path = tempfile.mkstemp(prefix='.replies_', dir=os.path.dirname(self._replies_file))
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.writelines(json.dumps(reply, ensure_ascii=False) + '\n' for reply in kept)
+            os.replace(partial_path, self._replies_file)
+        except OSError:
+            os.unlink(partial_path)
+            raise
+        self._replies_since_compact = 0
+    
+    def _migrate_legacy_replies(self):
+        """Seed the JSONL log from the old replies_tracking.json array, once (caller holds _replies_lock)"""
+        if self._replies_migrated:
+            return
+        self._replies_migrated = True
+        
+        legacy_file = os.path.join(os.path.dirname(self._replies_file), 'replies_tracking.json')
+        if not os.path.exists(legacy_file) or os.path.exists(self._replies_file):
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                replies_data = json.load(f)
+            with open(self._replies_file, 'a', encoding='utf-8') as f:
+                f.writelines(json.dumps(reply, ensure_ascii=False) + '\n' for reply in replies_data)
+            logger.info("Migrated %s replies from %s", len(replies_data), legacy_file)
+        except Exception as e:
+            logger.warning("Failed to migrate replies tracking file: %s", e)
     
     def fetch_posts_with_images_web_filtered(self, target_count: int, max_fetches: int = 300, 
                                            max_posts_per_user: int = 1, start_cursor: Optional[str] = None,
@@ -1171,11 +2158,12 @@ URI: {post.post.uri}
             if replied_post_uris is None:
                 replied_post_uris = []
             
-            if followed_accounts is None:
-                followed_accounts = []
-            
             replied_post_uris_set = set(replied_post_uris)
-            followed_accounts_set = set(followed_accounts)
+            # Without an explicit list, filter by the follows already fetched for this bot
+            if followed_accounts is None:
+                followed_accounts_set = self._followed_handles or frozenset()
+            else:
+                followed_accounts_set = frozenset(followed_accounts)
             
             # Get reply analytics if threshold filtering is needed
             reply_analytics = {}
@@ -1184,6 +2172,20 @@ URI: {post.post.uri}
                 if analytics_result.get('success'):
                     reply_analytics = analytics_result.get('replies_per_user', {})
             
+            # Filters are resolved once here so the per-post check is a few set/dict lookups
+            get_reply_count = reply_analytics.get
+            def passes_filters(post: Dict[str, Any]) -> bool:
+                # Skip posts already replied to
+                if post.get('post', {}).get('uri') in replied_post_uris_set:
+                    return False
+                author_handle = post.get('author', {}).get('handle')
+                if not author_handle:
+                    return True
+                # Only followed accounts (if filtering is enabled), under the reply count threshold
+                if followed_accounts_set and author_handle not in followed_accounts_set:
+                    return False
+                return reply_filter_threshold <= 0 or get_reply_count(author_handle, 0) <= reply_filter_threshold
+            
             posts = []
             cursor = start_cursor
             total_checked = 0
@@ -1201,47 +2203,18 @@ URI: {post.post.uri}
                     seen_post_uris=seen_post_uris
                 )
                 
-                if not batch_result.get('posts'):
+                if not batch_result.posts:
                     break
                 
-                cursor = batch_result.get('cursor')
-                total_checked += batch_result.get('total_checked', 0)
-                
-                # Apply filters to the batch
-                filtered_batch = []
-                for post in batch_result['posts']:
-                    # Check if already replied to
-                    if post.get('post', {}).get('uri') in replied_post_uris_set:
-                        continue
-                    
-                    # Check if author is in followed accounts (if filtering is enabled)
-                    if followed_accounts_set:
-                        author_handle = post.get('author', {}).get('handle')
-                        if author_handle and author_handle not in followed_accounts_set:
-                            continue
-                    
-                    # Check reply count threshold
-                    if reply_filter_threshold > 0:
-                        author_handle = post.get('author', {}).get('handle')
-                        if author_handle:
-                            reply_count = reply_analytics.get(author_handle, 0)
-                            if reply_count > reply_filter_threshold:
-                                continue
-                    
-                    # Post passed all filters
-                    filtered_batch.append(post)
-                    if len(posts) + len(filtered_batch) >= target_count:
-                        break
+                cursor = batch_result.cursor
+                total_checked += batch_result.total_checked
                 
-                posts.extend(filtered_batch)
+                # Apply filters to the batch, stopping once the target is met
+                posts.extend(islice(filter(passes_filters, batch_result.posts), target_count - len(posts)))
                 
                 # Update seen posts
-                for post in batch_result['posts']:
-                    if 'post' in post and 'uri' in post['post']:
-                        seen_post_uris.add(post['post']['uri'])
-            
-            # Trim to exact target count
-            posts = posts[:target_count]
+                seen_post_uris.update(post['post']['uri'] for post in batch_result.posts
+                                      if 'post' in post and 'uri' in post['post'])
             
             return {
                 'posts': posts,
@@ -1252,7 +2225,7 @@ URI: {post.post.uri}
             }
             
         except Exception as e:
-            logger.error(f"Error in fetch_posts_with_images_web_filtered: {e}")
+            logger.error("Error in fetch_posts_with_images_web_filtered: %s", e)
             return {
                 'posts': [],
                 'cursor': None,
@@ -1265,24 +2238,27 @@ URI: {post.post.uri}
     def get_replied_post_uris(self) -> List[str]:
         """Get list of post URIs that have been replied to"""
         try:
-            replies_file = os.path.join(os.path.dirname(__file__), '..', 'replies_tracking.json')
+            with self._replies_lock:
+                self._migrate_legacy_replies()
             
-            if not os.path.exists(replies_file):
+            # The log only changes when a reply is added or it is compacted, so the URIs are
+            # re-read only when its modification time or size moves - or hourly, as entries age out
+            try:
+                stat = os.stat(self._replies_file)
+            except FileNotFoundError:
                 return []
-            
-            with open(replies_file, 'r', encoding='utf-8') as f:
-                replies_data = json.load(f)
+            file_key = (stat.st_mtime_ns, stat.st_size, int(time.time() // 3600))
+            cached = self._replied_uris_cache
+            if cached is not None and cached[0] == file_key:
+                return list(cached[1])
             
             # Extract unique post URIs
-            replied_uris = set()
-            for reply in replies_data:
-                if 'post_uri' in reply:
-                    replied_uris.add(reply['post_uri'])
-            
+            replied_uris = frozenset(reply['post_uri'] for reply in self._iter_replies() if 'post_uri' in reply)
+            self._replied_uris_cache = (file_key, replied_uris)
             return list(replied_uris)
             
         except Exception as e:
-            logger.warning(f"Failed to get replied post URIs: {e}")
+            logger.warning("Failed to get replied post URIs: %s", e)
             return []
     
     def get_reply_analytics(self, days: int = 3, limit: int = 5) -> Dict[str, Any]:
@@ -1294,8 +2270,9 @@ URI: {post.post.uri}
             # Calculate cutoff date (make it timezone-aware)
             cutoff_date = datetime.now().replace(tzinfo=None) - timedelta(days=days)
             
-            # Fetch user's posts (including replies) from their timeline
-            replies_per_user = {}
+            # Fetch user's posts (including replies) from their timeline. Parent authors are counted
+            # by DID and resolved to handles together once the walk is done
+            replies_per_did = Counter()
             total_replies = 0
             cursor = None
             
@@ -1330,27 +2307,10 @@ URI: {post.post.uri}
                                     # Format: at://did:plc:xxx/app.bsky.feed.post/rkey
                                     uri_parts = parent_uri.split('/')
                                     if len(uri_parts) >= 3:
-                                        parent_author_did = uri_parts[2]  # DID is at index 2
-                                        
-                                        # Try to resolve DID to handle
-                                        try:
-                                            # Get profile info for the parent author
-                                            profile_response = self.client.get_profile(actor=parent_author_did)
-                                            if profile_response and hasattr(profile_response, 'handle'):
-                                                author_handle = profile_response.handle
-                                            else:
-                                                # Fallback to truncated DID
-                                                author_handle = parent_author_did[:20] + "..."
-                                        except:
-                                            # Fallback to truncated DID if profile lookup fails
-                                            author_handle = parent_author_did[:20] + "..."
-                                        
-                                        if author_handle not in replies_per_user:
-                                            replies_per_user[author_handle] = 0
-                                        replies_per_user[author_handle] += 1
+                                        replies_per_did[uri_parts[2]] += 1  # DID is at index 2
                                         
                                 except Exception as e:
-                                    logger.warning(f"Failed to parse parent URI {parent_uri}: {e}")
+                                    logger.warning("Failed to parse parent URI %s: %s", parent_uri, e)
                                     continue
                     
                     # Check if we have more posts to fetch
@@ -1360,11 +2320,17 @@ URI: {post.post.uri}
                         break
                         
                 except Exception as e:
-                    logger.warning(f"Failed to fetch timeline batch {batch}: {e}")
+                    logger.warning("Failed to fetch timeline batch %s: %s", batch, e)
                     break
             
+            # Resolve DIDs to handles, falling back to the truncated DID
+            handles = self._resolve_handles(list(replies_per_did))
+            replies_per_user = Counter()
+            for did, count in replies_per_did.items():
+                replies_per_user[handles.get(did) or did[:20] + "..."] += count
+            
             # Sort by reply count (highest to lowest) and get top N
-            sorted_users = sorted(replies_per_user.items(), key=lambda x: x[1], reverse=True)[:limit]
+            sorted_users = replies_per_user.most_common(limit)
             
             return {
                 "success": True,
@@ -1374,584 +2340,361 @@ URI: {post.post.uri}
             }
             
         except Exception as e:
-            logger.error(f"Failed to get reply analytics: {e}")
+            logger.error("Failed to get reply analytics: %s", e)
             return {
                 "success": False,
                 "error": str(e)
             }
     
-    def fetch_posts_with_images_web_paginated(self, target_count: int = 5, max_fetches: int = 20, max_posts_per_user: int = 2, start_cursor: Optional[str] = None, seen_post_uris: Optional[set] = None) -> Dict[str, Any]:
-        """Fetch posts with images with pagination support - returns new posts and pagination info"""
-        import time
-        
+    def _iter_image_posts(self, target_count: int, max_fetches: int, max_posts_per_user: int,
+                          start_cursor: Optional[str] = None, seen_uris: Optional[set] = None,
+                          refresh_cursor_pages: bool = False):
+        """Shared search loop behind the web fetchers, yielding progress, keepalive, post and done events
+        
+        'post' events carry a formatted post; the final 'done' event carries the resume cursor,
+        the seen URIs and the totals. With refresh_cursor_pages, pages after a cursor bypass the cache.
+        Progress is reported once per batch plus once per post found; skips only go to the debug log.
+        """
         # Setup temp directory if not already set
         if not self.temp_dir:
             self.temp_dir = self.setup_temp_directory()
         
-        posts_with_images = []
-        user_post_counts = {}  # Track how many posts we've seen from each user
+        posts_found = 0
+        user_post_counts = Counter()  # Track how many posts we've seen from each user
+        capped_users = set()  # Users that have reached max_posts_per_user
         cursor = start_cursor
         fetch_count = 0
         total_posts_checked = 0
-        seen_uris = seen_post_uris or set()
+        if seen_uris is None:
+            seen_uris = set()
+        stalled_batches = 0  # Consecutive batches where every candidate came from a capped user
+        # Batch progress is throttled; skips and reposts accumulate until the next batch event
+        last_batch_event = time.monotonic()
+        pending_skipped = 0
+        pending_reposts = 0
+        
+        # Progress events are shallow copies of one template; found count and percentage are only
+        # refreshed when a post is found. The percentage is a whole number to keep SSE payloads small
+        event_template = {
+            'type': 'progress',
+            'message': '',
+            'posts_found': 0,
+            'posts_checked': 0,
+            'current_batch': 0,
+            'progress_percent': 0
+        }
         
-        print(f"🔍 Searching for {target_count} posts with images from FOLLOWED USERS ONLY (max {max_posts_per_user} per user, includes reposts from followed users)...")
+        def progress(message: str, event_type: str = 'progress', progress_percent: Optional[int] = None):
+            event_template['type'] = event_type
+            event_template['message'] = message
+            event_template['posts_checked'] = total_posts_checked
+            event_template['current_batch'] = fetch_count
+            event = event_template.copy()
+            if progress_percent is not None:
+                event['progress_percent'] = progress_percent
+            return event
+        
+        def fetch_batch(page_cursor: Optional[str]):
+            # For pagination, we need to make fresh API calls to get new posts
+            if page_cursor and refresh_cursor_pages:
+                logger.debug("🔄 Making fresh API call for pagination (cursor: %s...)", page_cursor[:20])
+                # Clear cache for this specific request to force fresh data
+                self._invalidate_cached_timeline(self._timeline_batch_size, page_cursor, 'home', media_only=True)
+            
+            # Fetch a batch of posts from HOME timeline (followed users only)
+            # Try media feed first, fallback to timeline. The timeline has no server-side media
+            # filter, so media_only drops text-only posts before they are turned into models
+            page = self.fetch_media_feed_page(limit=self._timeline_batch_size, cursor=page_cursor, media_only=True)
+            if not page.feed:
+                page = self.fetch_timeline_page(limit=self._timeline_batch_size, cursor=page_cursor, algorithm='home', media_only=True)
+            return page
+        
+        yield progress(f"🔍 Searching for {target_count} posts with images from FOLLOWED USERS ONLY (max {max_posts_per_user} per user, includes reposts from followed users)...", progress_percent=0)
         if start_cursor:
-            print(f"📍 Starting from cursor: {start_cursor[:50]}...")
+            yield progress(f"📍 Starting from cursor: {start_cursor[:50]}...", progress_percent=0)
         
-        while len(posts_with_images) < target_count and fetch_count < max_fetches:
-            try:
-                # For pagination, we need to make fresh API calls to get new posts
-                # Don't use cache when we have a cursor (fetch more scenario)
-                if cursor:
-                    print(f"🔄 Making fresh API call for pagination (cursor: {cursor[:20]}...)")
-                    # Clear cache for this specific request to force fresh data
-                    cache_key = self._get_cache_key('get_timeline', limit=self._timeline_batch_size, cursor=cursor, algorithm='home')
-                    if cache_key in self._timeline_cache:
-                        del self._timeline_cache[cache_key]
-                
-                # Fetch a batch of posts from HOME timeline (followed users only)
-                # Try media feed first, fallback to timeline
-                timeline_feed = self.fetch_media_feed(limit=self._timeline_batch_size, cursor=cursor)
-                if not timeline_feed:
-                    timeline_feed = self.fetch_timeline(limit=self._timeline_batch_size, cursor=cursor, algorithm='home')
-                fetch_count += 1  # Always increment fetch count when we attempt to fetch
-                
-                if not timeline_feed:
-                    print("No more posts available in home timeline (followed users)")
-                    break
-                
-                # Get cursor from cache (should be fresh now)
-                cached_data = self._get_cached_timeline(self._timeline_batch_size, cursor, 'home')
-                if cached_data:
-                    cursor = cached_data.get('cursor')
-                    print(f"📍 Updated cursor: {cursor[:20] if cursor else 'None'}...")
-                
-                # Check each post for images and deduplication
-                for post in timeline_feed:
-                    total_posts_checked += 1
-                    user_handle = post.post.author.handle
-                    post_uri = post.post.uri
-                    
-                    # Skip if we've already seen this post
-                    if post_uri in seen_uris:
-                        print(f"⏭️  Skipping already seen post from {user_handle} (URI: {post_uri[:30]}...)")
-                        continue
+        # Send a keep-alive message to prevent EventSource timeout
+        yield progress('Connection established, starting search...', event_type='keepalive', progress_percent=0)
+        
+        # Batches are chained by cursor, so the next one is prefetched in the background while
+        # the current one is filtered and formatted
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='timeline-prefetch') as prefetcher:
+            next_batch = prefetcher.submit(fetch_batch, cursor)
+            
+            while next_batch is not None and posts_found < target_count and fetch_count < max_fetches:
+                try:
+                    timeline_feed, next_cursor = next_batch.result()
+                    next_batch = None
+                    fetch_count += 1  # Always increment fetch count when we attempt to fetch
                     
-                    # Note: We include reposts from followed users since they appear in our home timeline
-                    if hasattr(post, 'reason') and post.reason:
-                        print(f"🔄 Including repost from {user_handle} (followed user)")
+                    # A media-only page can be empty while the timeline continues
+                    if not timeline_feed and not next_cursor:
+                        yield progress("No more posts available in home timeline (followed users)")
+                        break
                     
-                    # Check if we've already seen enough posts from this user
-                    if user_handle in user_post_counts and user_post_counts[user_handle] >= max_posts_per_user:
-                        print(f"⏭️  Skipping post from {user_handle} (already have {user_post_counts[user_handle]} posts)")
-                        continue
+                    # Prefetch the next batch only when this one can't reach the target by itself -
+                    # otherwise it would be an API call whose posts are never used
+                    if next_cursor:
+                        cursor = next_cursor
+                        if fetch_count < max_fetches and len(timeline_feed) < target_count - posts_found:
+                            next_batch = prefetcher.submit(fetch_batch, cursor)
                     
-                    # Check if post has images using optimized method
-                    has_images = self._has_media(post)
+                    # Check each post for images and deduplication. Caps and seen URIs are reserved
+                    # here, before formatting, so skipped posts never trigger an image download
+                    batch_capped = 0
+                    selected = []
+                    for post in timeline_feed:
+                        # Stop picking once the selected posts would reach the target
+                        if posts_found + len(selected) >= target_count:
+                            break
+                        
+                        total_posts_checked += 1
+                        user_handle = _get_post_handle(post)
+                        is_repost = getattr(post, 'reason', None) is not None
+                        post_uri = _get_post_uri(post)
+                        
+                        # Skip if we've already seen this post
+                        if post_uri in seen_uris:
+                            pending_skipped += 1
+                            logger.debug("⏭️  Skipping already seen post from %s (URI: %s...)", user_handle, post_uri[:30])
+                            continue
+                        
+                        # Note: We include reposts from followed users since they appear in our home timeline
+                        if is_repost:
+                            pending_reposts += 1
+                            logger.debug("🔄 Including repost from %s (followed user)", user_handle)
+                        
+                        # Check if we've already seen enough posts from this user
+                        if user_handle in capped_users:
+                            pending_skipped += 1
+                            batch_capped += 1
+                            logger.debug("⏭️  Skipping post from %s (already have %s posts)", user_handle, user_post_counts[user_handle])
+                            continue
+                        
+                        # Skip posts without images
+                        if not self._has_media(post):
+                            continue
+                        
+                        # Reserve the user's slot and the URI
+                        user_post_counts[user_handle] += 1
+                        if user_post_counts[user_handle] >= max_posts_per_user:
+                            capped_users.add(user_handle)
+                        seen_uris.add(post_uri)
+                        selected.append((post, user_handle, post_uri, is_repost, user_post_counts[user_handle]))
                     
-                    if has_images:
+                    # Format the selected posts (downloading their images) in parallel, reporting them in timeline order
+                    futures = [self._format_executor.submit(self.format_post_for_web, item[0]) for item in selected]
+                    for (post, user_handle, post_uri, is_repost, user_count), future in zip(selected, futures):
                         try:
-                            formatted_post = self.format_post_for_web(post)
-                            posts_with_images.append(formatted_post)
-                            
-                            # Update user post count and seen URIs
-                            user_post_counts[user_handle] = user_post_counts.get(user_handle, 0) + 1
-                            seen_uris.add(post_uri)
-                            
-                            post_type = "repost" if hasattr(post, 'reason') and post.reason else "original"
-                            image_count = self._get_safe_image_count(post)
-                            print(f"📸 Found {post_type} post with {image_count} image(s) from {user_handle} ({user_post_counts[user_handle]}/{max_posts_per_user}) - {len(posts_with_images)}/{target_count} total posts")
-                            
-                            # Early exit when target reached
-                            if len(posts_with_images) >= target_count:
-                                break
-                                
+                            formatted_post = future.result()
                         except Exception as e:
-                            print(f"❌ Error formatting post with images: {e}")
+                            # Release the reservation so the post can be picked up again later
+                            user_post_counts[user_handle] -= 1
+                            capped_users.discard(user_handle)
+                            seen_uris.discard(post_uri)
+                            yield progress(f"❌ Error formatting post with images: {e}")
                             continue
-                    else:
-                        # Skip posts without images
-                        continue
-                
-                # Update cursor for next fetch - get it from the actual timeline response
-                if cached_data and cached_data.get('cursor'):
-                    cursor = cached_data.get('cursor')
-                else:
-                    # If no cursor available, we've reached the end of the timeline
-                    print("📄 Reached end of timeline - no more posts available")
+                        
+                        posts_found += 1
+                        event_template['posts_found'] = posts_found
+                        event_template['progress_percent'] = min(100, posts_found * 100 // target_count)
+                        
+                        post_type = "repost" if is_repost else "original"
+                        image_count = self._get_safe_image_count(post)
+                        yield progress(f"📸 Found {post_type} post with {image_count} image(s) from {user_handle} ({user_count}/{max_posts_per_user}) - {posts_found}/{target_count} total posts")
+                        yield {'type': 'post', 'post': formatted_post}
+                    
+                    # Batch progress goes out at most every _progress_interval seconds (and every
+                    # _progress_every_batches batches) rather than after every page, plus after the last one
+                    now = time.monotonic()
+                    emit_batch_event = (now - last_batch_event >= self._progress_interval
+                                        or fetch_count % self._progress_every_batches == 0
+                                        or not next_cursor or fetch_count >= max_fetches or posts_found >= target_count)
+                    if emit_batch_event:
+                        batch_progress = progress(f"⏳ Checked {total_posts_checked} posts, found {posts_found} with images ({pending_skipped} skipped, {pending_reposts} reposts up to batch {fetch_count}/{max_fetches})")
+                        batch_progress.update(skipped=pending_skipped, reposts=pending_reposts)
+                        yield batch_progress
+                        last_batch_event = now
+                        pending_skipped = pending_reposts = 0
+                    
+                    # The timeline also carries reposts and posts from accounts the user doesn't follow,
+                    # so capping every followed user doesn't mean the search is done - only a run of
+                    # batches without an uncapped author does
+                    if selected:
+                        stalled_batches = 0
+                    elif batch_capped:
+                        stalled_batches += 1
+                    if stalled_batches >= self._max_stalled_batches:
+                        yield progress(f"🛑 Last {stalled_batches} batches only had posts from users at the per-user limit - stopping search")
+                        break
+                    
+                    if not next_cursor:
+                        # If no cursor available, we've reached the end of the timeline
+                        cursor = None
+                        yield progress("📄 Reached end of timeline - no more posts available")
+                        break
+                    
+                    if emit_batch_event and posts_found < target_count and fetch_count < max_fetches:
+                        # Send keep-alive message with the batch progress to prevent timeout
+                        yield progress(f'Still searching... ({fetch_count}/{max_fetches} batches completed)', event_type='keepalive')
+                    
+                    # Fell short of the target without a prefetch in flight - fetch the next batch now
+                    if next_batch is None and posts_found < target_count and fetch_count < max_fetches:
+                        next_batch = prefetcher.submit(fetch_batch, cursor)
+                    
+                except Exception as e:
+                    yield progress(f"Error fetching posts: {e}")
                     break
-                
-                # Be respectful - wait between requests (reduced since we have rate limiting)
-                if len(posts_with_images) < target_count and fetch_count < max_fetches:
-                    print(f"⏳ Checked {total_posts_checked} posts, found {len(posts_with_images)} with images. Fetching more... (batch {fetch_count}/{max_fetches})")
-                    time.sleep(0.5)  # Reduced wait time due to built-in rate limiting
-                
-            except Exception as e:
-                print(f"Error fetching posts: {e}")
-                break
         
-        # Print summary of user distribution
+        # Summary of user distribution - only the top contributors, so the message stays small
         if user_post_counts:
-            print(f"📊 User distribution: {dict(user_post_counts)}")
+            yield progress(f"📊 User distribution: {dict(user_post_counts.most_common(10))}")
         
-        print(f"✅ Found {len(posts_with_images)} posts with images from FOLLOWED USERS after checking {total_posts_checked} total posts in {fetch_count} batches")
-        print(f"   - Final cursor: {cursor[:20] if cursor else 'None'}...")
-        print(f"   - Seen URIs count: {len(seen_uris)}")
-        if len(posts_with_images) < target_count:
-            print(f"⚠️  Warning: Only found {len(posts_with_images)} posts, requested {target_count}")
-            print(f"   - Fetches attempted: {fetch_count}/{max_fetches}")
-            print(f"   - Timeline exhausted: {cursor is None}")
-            print(f"   - User post limits: {max_posts_per_user} per user")
+        yield progress(f"✅ Found {posts_found} posts with images from FOLLOWED USERS after checking {total_posts_checked} total posts in {fetch_count} batches", progress_percent=100)
+        if posts_found < target_count:
+            yield progress(f"⚠️  Warning: Only found {posts_found} posts, requested {target_count} (fetches attempted: {fetch_count}/{max_fetches}, timeline exhausted: {cursor is None}, user post limit: {max_posts_per_user})", progress_percent=100)
         
-        return {
-            'posts': posts_with_images,
+        yield {
+            'type': 'done',
             'cursor': cursor,
             'seen_uris': seen_uris,
             'total_checked': total_posts_checked,
             'fetch_count': fetch_count
         }
+    
+    def fetch_posts_with_images_web_paginated(self, target_count: int = 5, max_fetches: int = 20, max_posts_per_user: int = 2, start_cursor: Optional[str] = None, seen_post_uris: Optional[FrozenSet[str]] = None) -> FetchResult:
+        """Fetch posts with images with pagination support - returns new posts and pagination info"""
+        posts_with_images = []
+        # The search loop adds to the set it is given, so the caller's URIs are copied
+        for event in self._iter_image_posts(target_count, max_fetches, max_posts_per_user, start_cursor=start_cursor,
+                                            seen_uris=set(seen_post_uris or ()), refresh_cursor_pages=True):
+            if event['type'] == 'progress':
+                logger.info(event['message'])
+            elif event['type'] == 'post':
+                posts_with_images.append(event['post'])
+            elif event['type'] == 'done':
+                summary = event
+        
+        logger.info("   - Final cursor: %s...", summary['cursor'][:20] if summary['cursor'] else 'None')
+        logger.info("   - Seen URIs count: %s", len(summary['seen_uris']))
+        
+        return FetchResult(
+            posts=posts_with_images,
+            cursor=summary['cursor'],
+            seen_uris=frozenset(summary['seen_uris']),
+            total_checked=summary['total_checked'],
+            fetch_count=summary['fetch_count']
+        )
+
+    def _load_session_cursor(self, session_id: str, reset: bool = False) -> SessionCursor:
+        """Get the saved pagination state for a session, or a fresh one"""
+        now = time.monotonic()
+        with self._session_cursors_lock:
+            # Entries are kept in last-used order, so idle sessions sit at the front
+            while self._session_cursors:
+                oldest = next(iter(self._session_cursors.values()))
+                if now - oldest.last_used < self._session_cursor_idle_ttl:
+                    break
+                self._session_cursors.popitem(last=False)
+            
+            state = self._session_cursors.get(session_id)
+        if reset or state is None:
+            return SessionCursor(None, frozenset(), now)
+        return state
+    
+    def _save_session_cursor(self, session_id: str, cursor: Optional[str], seen_uris: FrozenSet[str]):
+        """Store a session's pagination state, evicting the least recently used sessions"""
+        with self._session_cursors_lock:
+            self._session_cursors[session_id] = SessionCursor(cursor, seen_uris, time.monotonic())
+            self._session_cursors.move_to_end(session_id)
+            while len(self._session_cursors) > self._session_cursor_max_entries:
+                self._session_cursors.popitem(last=False)
+    
+    def next_page(self, session_id: str, target_count: int = 5, max_fetches: int = 20, max_posts_per_user: int = 2, reset: bool = False) -> FetchResult:
+        """Fetch the next page of posts with images for a session, resuming from its saved cursor"""
+        state = self._load_session_cursor(session_id, reset)
+        result = self.fetch_posts_with_images_web_paginated(
+            target_count=target_count,
+            max_fetches=max_fetches,
+            max_posts_per_user=max_posts_per_user,
+            start_cursor=state.cursor,
+            seen_post_uris=state.seen_uris
+        )
+        self._save_session_cursor(session_id, result.cursor, result.seen_uris)
+        return result
 
     def fetch_posts_with_images_web(self, target_count: int = 5, max_fetches: int = 20, max_posts_per_user: int = 2) -> List[Dict[str, Any]]:
         """Fetch posts with images from followed users only (includes reposts from followed users) - Web version"""
-        import time
-        
-        # Setup temp directory if not already set
-        if not self.temp_dir:
-            self.temp_dir = self.setup_temp_directory()
-        
         posts_with_images = []
-        user_post_counts = {}  # Track how many posts we've seen from each user
-        cursor = None
-        fetch_count = 0
-        total_posts_checked = 0
-        
-        print(f"🔍 Searching for {target_count} posts with images from FOLLOWED USERS ONLY (max {max_posts_per_user} per user, includes reposts from followed users)...")
-        
-        while len(posts_with_images) < target_count and fetch_count < max_fetches:
-            try:
-                # Fetch a batch of posts from HOME timeline (followed users only)
-                # Use the optimized fetch_timeline method with caching and rate limiting
-                # Try media feed first, fallback to timeline
-                timeline_feed = self.fetch_media_feed(limit=self._timeline_batch_size, cursor=cursor)
-                if not timeline_feed:
-                    timeline_feed = self.fetch_timeline(limit=self._timeline_batch_size, cursor=cursor, algorithm='home')
-                
-                if not timeline_feed:
-                    print("No more posts available in home timeline (followed users)")
-                    break
-                
-                # Get cursor from cache if available
-                cached_data = self._get_cached_timeline(self._timeline_batch_size, cursor, 'home')
-                if cached_data:
-                    cursor = cached_data.get('cursor')
-                
-                # Check each post for images
-                for post in timeline_feed:
-                    total_posts_checked += 1
-                    user_handle = post.post.author.handle
-                    
-                    # Note: We include reposts from followed users since they appear in our home timeline
-                    if hasattr(post, 'reason') and post.reason:
-                        print(f"🔄 Including repost from {user_handle} (followed user)")
-                    
-                    # Check if we've already seen enough posts from this user
-                    if user_handle in user_post_counts and user_post_counts[user_handle] >= max_posts_per_user:
-                        print(f"⏭️  Skipping post from {user_handle} (already have {user_post_counts[user_handle]} posts)")
-                        continue
-                    
-                    # Check if post has images using optimized method
-                    has_images = self._has_media(post)
-                    
-                    if has_images:
-                        try:
-                            formatted_post = self.format_post_for_web(post)
-                            posts_with_images.append(formatted_post)
-                            
-                            # Update user post count
-                            user_post_counts[user_handle] = user_post_counts.get(user_handle, 0) + 1
-                            
-                            post_type = "repost" if hasattr(post, 'reason') and post.reason else "original"
-                            image_count = self._get_safe_image_count(post)
-                            print(f"📸 Found {post_type} post with {image_count} image(s) from {user_handle} ({user_post_counts[user_handle]}/{max_posts_per_user}) - {len(posts_with_images)}/{target_count} total posts")
-                            
-                            # Early exit when target reached
-                            if len(posts_with_images) >= target_count:
-                                break
-                                
-                        except Exception as e:
-                            print(f"❌ Error formatting post with images: {e}")
-                            continue
-                    else:
-                        # Skip posts without images
-                        continue
-                
-                # Update cursor for next fetch - get it from the actual timeline response
-                # The fetch_timeline method should return the cursor in the cached data
-                if cached_data and cached_data.get('cursor'):
-                    cursor = cached_data.get('cursor')
-                else:
-                    # If no cursor available, we've reached the end of the timeline
-                    print("📄 Reached end of timeline - no more posts available")
-                    break
-                fetch_count += 1
-                
-                # Be respectful - wait between requests (reduced since we have rate limiting)
-                if len(posts_with_images) < target_count and fetch_count < max_fetches:
-                    print(f"⏳ Checked {total_posts_checked} posts, found {len(posts_with_images)} with images. Fetching more... (batch {fetch_count}/{max_fetches})")
-                    time.sleep(0.5)  # Reduced wait time due to built-in rate limiting
-                
-            except Exception as e:
-                print(f"Error fetching posts: {e}")
-                break
-        
-        # Print summary of user distribution
-        if user_post_counts:
-            print(f"📊 User distribution: {dict(user_post_counts)}")
-        
-        print(f"✅ Found {len(posts_with_images)} posts with images from FOLLOWED USERS after checking {total_posts_checked} total posts in {fetch_count} batches")
-        if len(posts_with_images) < target_count:
-            print(f"⚠️  Warning: Only found {len(posts_with_images)} posts, requested {target_count}")
-            print(f"   - Fetches attempted: {fetch_count}/{max_fetches}")
-            print(f"   - Timeline exhausted: {cursor is None}")
-            print(f"   - User post limits: {max_posts_per_user} per user")
+        for event in self._iter_image_posts(target_count, max_fetches, max_posts_per_user,
+                                            seen_uris=self._seen_post_uris):
+            if event['type'] == 'progress':
+                logger.info(event['message'])
+            elif event['type'] == 'post':
+                posts_with_images.append(event['post'])
         return posts_with_images
     
     def fetch_posts_with_images_web_stream(self, target_count: int = 5, max_fetches: int = 20, max_posts_per_user: int = 2, progress_callback=None) -> List[Dict[str, Any]]:
         """Fetch posts with images with real-time progress updates - Web streaming version (includes reposts from followed users)"""
-        import time
-        
-        # Setup temp directory if not already set
-        if not self.temp_dir:
-            self.temp_dir = self.setup_temp_directory()
-        
         posts_with_images = []
-        user_post_counts = {}  # Track how many posts we've seen from each user
-        cursor = None
-        fetch_count = 0
-        total_posts_checked = 0
-        
-        if progress_callback:
-            progress_callback(f"🔍 Searching for {target_count} posts with images from FOLLOWED USERS ONLY (max {max_posts_per_user} per user, includes reposts from followed users)...", 
-                            posts_found=0, posts_checked=0, current_batch=0)
-        
-        while len(posts_with_images) < target_count and fetch_count < max_fetches:
-            try:
-                # Fetch a batch of posts from HOME timeline (followed users only)
-                # Use the optimized fetch_timeline method with caching and rate limiting
-                # Try media feed first, fallback to timeline
-                timeline_feed = self.fetch_media_feed(limit=self._timeline_batch_size, cursor=cursor)
-                if not timeline_feed:
-                    timeline_feed = self.fetch_timeline(limit=self._timeline_batch_size, cursor=cursor, algorithm='home')
-                
-                if not timeline_feed:
-                    if progress_callback:
-                        progress_callback("No more posts available in home timeline (followed users)", 
-                                        posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                    break
-                
-                # Get cursor from cache if available
-                cached_data = self._get_cached_timeline(self._timeline_batch_size, cursor, 'home')
-                if cached_data:
-                    cursor = cached_data.get('cursor')
-                
-                # Check each post for images
-                for post in timeline_feed:
-                    total_posts_checked += 1
-                    user_handle = post.post.author.handle
-                    
-                    # Note: We include reposts from followed users since they appear in our home timeline
-                    if hasattr(post, 'reason') and post.reason:
-                        if progress_callback:
-                            progress_callback(f"🔄 Including repost from {user_handle} (followed user)", 
-                                            posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                    
-                    # Check if we've already seen enough posts from this user
-                    if user_handle in user_post_counts and user_post_counts[user_handle] >= max_posts_per_user:
-                        if progress_callback:
-                            progress_callback(f"⏭️  Skipping post from {user_handle} (already have {user_post_counts[user_handle]} posts)", 
-                                            posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                        continue
-                    
-                    # Check if post has images using optimized method
-                    has_images = self._has_media(post)
-                    
-                    if has_images:
-                        try:
-                            formatted_post = self.format_post_for_web(post)
-                            posts_with_images.append(formatted_post)
-                            
-                            # Update user post count
-                            user_post_counts[user_handle] = user_post_counts.get(user_handle, 0) + 1
-                            
-                            post_type = "repost" if hasattr(post, 'reason') and post.reason else "original"
-                            if progress_callback:
-                                image_count = self._get_safe_image_count(post)
-                                progress_callback(f"📸 Found {post_type} post with {image_count} image(s) from {user_handle} ({user_post_counts[user_handle]}/{max_posts_per_user}) - {len(posts_with_images)}/{target_count} total posts", 
-                                                posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                            
-                            # Early exit when target reached
-                            if len(posts_with_images) >= target_count:
-                                break
-                                
-                        except Exception as e:
-                            if progress_callback:
-                                progress_callback(f"❌ Error formatting post with images: {e}", 
-                                                posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                            continue
-                    else:
-                        # Skip posts without images
-                        continue
-                
-                # Update cursor for next fetch - get it from the actual timeline response
-                if cached_data and cached_data.get('cursor'):
-                    cursor = cached_data.get('cursor')
-                else:
-                    # If no cursor available, we've reached the end of the timeline
-                    if progress_callback:
-                        progress_callback("📄 Reached end of timeline - no more posts available", 
-                                        posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                    break
-                fetch_count += 1
-                
-                # Be respectful - wait between requests (reduced since we have rate limiting)
-                if len(posts_with_images) < target_count and fetch_count < max_fetches:
-                    if progress_callback:
-                        progress_callback(f"⏳ Checked {total_posts_checked} posts, found {len(posts_with_images)} with images. Fetching more... (batch {fetch_count}/{max_fetches})", 
-                                        posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                    time.sleep(0.5)  # Reduced wait time due to built-in rate limiting
-                
-            except Exception as e:
-                if progress_callback:
-                    progress_callback(f"Error fetching posts: {e}", 
-                                    posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-                break
-        
-        # Print summary of user distribution
-        if user_post_counts and progress_callback:
-            progress_callback(f"📊 User distribution: {dict(user_post_counts)}", 
-                            posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-        
-        if progress_callback:
-            progress_callback(f"✅ Found {len(posts_with_images)} posts with images from FOLLOWED USERS after checking {total_posts_checked} total posts in {fetch_count} batches", 
-                            posts_found=len(posts_with_images), posts_checked=total_posts_checked, current_batch=fetch_count)
-        
+        for event in self._iter_image_posts(target_count, max_fetches, max_posts_per_user,
+                                            seen_uris=self._seen_post_uris):
+            if event['type'] == 'progress' and progress_callback:
+                progress_callback(event['message'], posts_found=event['posts_found'],
+                                  posts_checked=event['posts_checked'], current_batch=event['current_batch'])
+            elif event['type'] == 'post':
+                posts_with_images.append(event['post'])
         return posts_with_images
     
-    def fetch_posts_with_images_web_stream_generator(self, target_count: int = 5, max_fetches: int = 20, max_posts_per_user: int = 2):
-        """Generator that yields progress updates and final results for streaming (includes reposts from followed users)"""
-        import time
-        
-        # Setup temp directory if not already set
-        if not self.temp_dir:
-            self.temp_dir = self.setup_temp_directory()
+    def fetch_posts_with_images_web_stream_generator(self, target_count: int = 5, max_fetches: int = 20, max_posts_per_user: int = 2,
+                                                     session_id: Optional[str] = None, reset: bool = False):
+        """Generator that yields progress updates and final results for streaming (includes reposts from followed users)
+        
+        With a session_id the search resumes from that session's saved cursor (or starts over with reset).
+        Without one, reset forgets the posts returned by earlier calls.
+        """
+        if session_id:
+            state = self._load_session_cursor(session_id, reset)
+            events = self._iter_image_posts(target_count, max_fetches, max_posts_per_user, start_cursor=state.cursor,
+                                            seen_uris=set(state.seen_uris), refresh_cursor_pages=True)
+        else:
+            if reset:
+                self.reset_seen_posts()
+            events = self._iter_image_posts(target_count, max_fetches, max_posts_per_user,
+                                            seen_uris=self._seen_post_uris)
         
         posts_with_images = []
-        user_post_counts = {}  # Track how many posts we've seen from each user
-        cursor = None
-        fetch_count = 0
-        total_posts_checked = 0
-        
-        yield {
-            'type': 'progress',
-            'message': f"🔍 Searching for {target_count} posts with images from FOLLOWED USERS ONLY (max {max_posts_per_user} per user, includes reposts from followed users)...",
-            'posts_found': 0,
-            'posts_checked': 0,
-            'current_batch': 0,
-            'progress_percent': 0
-        }
-        
-        # Send a keep-alive message to prevent EventSource timeout
-        yield {
-            'type': 'keepalive',
-            'message': 'Connection established, starting search...',
-            'posts_found': 0,
-            'posts_checked': 0,
-            'current_batch': 0,
-            'progress_percent': 0
-        }
-        
-        while len(posts_with_images) < target_count and fetch_count < max_fetches:
-            try:
-                # Fetch a batch of posts from HOME timeline (followed users only)
-                # Use the optimized fetch_timeline method with caching and rate limiting
-                # Try media feed first, fallback to timeline
-                timeline_feed = self.fetch_media_feed(limit=self._timeline_batch_size, cursor=cursor)
-                if not timeline_feed:
-                    timeline_feed = self.fetch_timeline(limit=self._timeline_batch_size, cursor=cursor, algorithm='home')
-                
-                if not timeline_feed:
-                    yield {
-                        'type': 'progress',
-                        'message': "No more posts available in home timeline (followed users)",
-                        'posts_found': len(posts_with_images),
-                        'posts_checked': total_posts_checked,
-                        'current_batch': fetch_count,
-                        'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                    }
-                    break
-                
-                # Get cursor from cache if available
-                cached_data = self._get_cached_timeline(self._timeline_batch_size, cursor, 'home')
-                if cached_data:
-                    cursor = cached_data.get('cursor')
-                
-                # Check each post for images
-                for post in timeline_feed:
-                    total_posts_checked += 1
-                    user_handle = post.post.author.handle
-                    
-                    # Note: We include reposts from followed users since they appear in our home timeline
-                    if hasattr(post, 'reason') and post.reason:
-                        yield {
-                            'type': 'progress',
-                            'message': f"🔄 Including repost from {user_handle} (followed user)",
-                            'posts_found': len(posts_with_images),
-                            'posts_checked': total_posts_checked,
-                            'current_batch': fetch_count,
-                            'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                        }
-                    
-                    # Check if we've already seen enough posts from this user
-                    if user_handle in user_post_counts and user_post_counts[user_handle] >= max_posts_per_user:
-                        yield {
-                            'type': 'progress',
-                            'message': f"⏭️  Skipping post from {user_handle} (already have {user_post_counts[user_handle]} posts)",
-                            'posts_found': len(posts_with_images),
-                            'posts_checked': total_posts_checked,
-                            'current_batch': fetch_count,
-                            'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                        }
-                        continue
-                    
-                    # Check if post has images using optimized method
-                    has_images = self._has_media(post)
-                    
-                    if has_images:
-                        try:
-                            formatted_post = self.format_post_for_web(post)
-                            posts_with_images.append(formatted_post)
-                            
-                            # Update user post count
-                            user_post_counts[user_handle] = user_post_counts.get(user_handle, 0) + 1
-                            
-                            post_type = "repost" if hasattr(post, 'reason') and post.reason else "original"
-                            image_count = self._get_safe_image_count(post)
-                            yield {
-                                'type': 'progress',
-                                'message': f"📸 Found {post_type} post with {image_count} image(s) from {user_handle} ({user_post_counts[user_handle]}/{max_posts_per_user}) - {len(posts_with_images)}/{target_count} total posts",
-                                'posts_found': len(posts_with_images),
-                                'posts_checked': total_posts_checked,
-                                'current_batch': fetch_count,
-                                'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                            }
-                            
-                            # Early exit when target reached
-                            if len(posts_with_images) >= target_count:
-                                break
-                                
-                        except Exception as e:
-                            yield {
-                                'type': 'progress',
-                                'message': f"❌ Error formatting post with images: {e}",
-                                'posts_found': len(posts_with_images),
-                                'posts_checked': total_posts_checked,
-                                'current_batch': fetch_count,
-                                'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                            }
-                            continue
-                    else:
-                        # Skip posts without images
-                        continue
-                
-                # Update cursor for next fetch - get it from the actual timeline response
-                if cached_data and cached_data.get('cursor'):
-                    cursor = cached_data.get('cursor')
-                else:
-                    # If no cursor available, we've reached the end of the timeline
-                    yield {
-                        'type': 'progress',
-                        'message': "📄 Reached end of timeline - no more posts available",
-                        'posts_found': len(posts_with_images),
-                        'posts_checked': total_posts_checked,
-                        'current_batch': fetch_count,
-                        'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                    }
-                    break
-                fetch_count += 1
-                
-                # Be respectful - wait between requests (reduced since we have rate limiting)
-                if len(posts_with_images) < target_count and fetch_count < max_fetches:
-                    yield {
-                        'type': 'progress',
-                        'message': f"⏳ Checked {total_posts_checked} posts, found {len(posts_with_images)} with images. Fetching more... (batch {fetch_count}/{max_fetches})",
-                        'posts_found': len(posts_with_images),
-                        'posts_checked': total_posts_checked,
-                        'current_batch': fetch_count,
-                        'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                    }
-                    
-                    # Send keep-alive message every batch to prevent timeout
-                    yield {
-                        'type': 'keepalive',
-                        'message': f'Still searching... ({fetch_count}/{max_fetches} batches completed)',
-                        'posts_found': len(posts_with_images),
-                        'posts_checked': total_posts_checked,
-                        'current_batch': fetch_count,
-                        'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-                    }
-                    
-                    time.sleep(0.5)  # Reduced wait time due to built-in rate limiting
-                
-            except Exception as e:
+        for event in events:
+            if event['type'] == 'post':
+                posts_with_images.append(event['post'])
+            elif event['type'] == 'done':
+                if session_id:
+                    self._save_session_cursor(session_id, event['cursor'], frozenset(event['seen_uris']))
+                # Final result
                 yield {
-                    'type': 'progress',
-                    'message': f"Error fetching posts: {e}",
-                    'posts_found': len(posts_with_images),
-                    'posts_checked': total_posts_checked,
-                    'current_batch': fetch_count,
-                    'progress_percent': min(100, len(posts_with_images) / target_count * 100)
+                    'type': 'complete',
+                    'posts': posts_with_images,
+                    'count': len(posts_with_images),
+                    'cursor': event['cursor'],
+                    'total_checked': event['total_checked'],
+                    'fetch_count': event['fetch_count']
                 }
-                break
-        
-        # Print summary of user distribution
-        if user_post_counts:
-            yield {
-                'type': 'progress',
-                'message': f"📊 User distribution: {dict(user_post_counts)}",
-                'posts_found': len(posts_with_images),
-                'posts_checked': total_posts_checked,
-                'current_batch': fetch_count,
-                'progress_percent': min(100, len(posts_with_images) / target_count * 100)
-            }
-        
-        yield {
-            'type': 'progress',
-            'message': f"✅ Found {len(posts_with_images)} posts with images from FOLLOWED USERS after checking {total_posts_checked} total posts in {fetch_count} batches",
-            'posts_found': len(posts_with_images),
-            'posts_checked': total_posts_checked,
-            'current_batch': fetch_count,
-            'progress_percent': 100
-        }
-        
-        # Final result
-        yield {
-            'type': 'complete',
-            'posts': posts_with_images,
-            'count': len(posts_with_images)
-        }
+            else:
+                yield event
     
-    def _authenticate_and_setup(self, handle: str):
+    def _authenticate_and_setup(self, handle: str, create_temp_dir: bool = True):
         """Common authentication and setup logic"""
-        # Get password from SSM
-        print("Fetching password from AWS SSM...")
-        password = self.get_ssm_parameter('BLUESKY_PASSWORD_BIKELIFE')
+        # Get every secret the bot needs from SSM in one batch
+        logger.info("Fetching password from AWS SSM...")
+        secrets = self.get_ssm_parameters(['BLUESKY_PASSWORD_BIKELIFE'])
+        password = secrets['BLUESKY_PASSWORD_BIKELIFE']
         
         # Authenticate
         self.authenticate(handle, password)
         
         # Setup temp directory
-        self.temp_dir = self.setup_temp_directory()
+        if create_temp_dir:
+            self.temp_dir = self.setup_temp_directory()
     
     def initialize(self, handle: str):
         """Initialize the bot with authentication"""
@@ -1959,39 +2702,59 @@ URI: {post.post.uri}
             self._authenticate_and_setup(handle)
             return True
         except Exception as e:
-            print(f"Error initializing bot: {e}")
+            logger.error("Error initializing bot: %s", e)
             return False
     
     def run(self, handle: str, target_posts_with_images: int = 5):
         """Main bot execution - fetches posts with images"""
         try:
-            self._authenticate_and_setup(handle)
-            
-            # Fetch posts with images
-            posts_with_images = self.fetch_posts_with_images(target_posts_with_images)
-            
-            if not posts_with_images:
-                print("No posts with images found")
-                return
+            self._authenticate_and_setup(handle, create_temp_dir=False)
             
-            print(f"\n📝 Processing {len(posts_with_images)} posts with images:\n")
-            
-            # Process each post with images
-            for i, post in enumerate(posts_with_images, 1):
-                print(f"📝 POST {i}/{len(posts_with_images)}")
-                self.display_post_with_media(post)
-            
-            print(f"✅ Processed {len(posts_with_images)} posts with images")
-            print(f"📁 Images saved to: {self.temp_dir}")
+            # Downloaded images only live for this run, so the directory is removed when it ends
+            with tempfile.TemporaryDirectory(prefix='bluesky_images_', ignore_cleanup_errors=True) as temp_dir:
+                self.temp_dir = temp_dir
+                logger.info("Created temporary directory: %s", temp_dir)
+                
+                # Stream posts with images - each post's media starts downloading as soon as it is found,
+                # alongside the other posts, and posts are displayed in the order they were found
+                processed = 0
+                pending = deque()  # (number, post, future of its processed embeds)
+                
+                def display_next():
+                    number, post, embeds_future = pending.popleft()
+                    logger.info("📝 POST %s/%s", number, target_posts_with_images)
+                    self.display_post_with_media(post, embeds_future.result())
+                
+                try:
+                    for event in self.fetch_posts_with_images_stream_generator(target_posts_with_images):
+                        if event['type'] != 'post_found':
+                            continue
+                        
+                        processed += 1
+                        pending.append((processed, event['post'], self._format_executor.submit(self.process_embeds, event['post'])))
+                        while pending and pending[0][2].done():
+                            display_next()
+                    
+                    while pending:
+                        display_next()
+                finally:
+                    # Downloads still running would write into the directory while it is removed
+                    for _, _, embeds_future in pending:
+                        embeds_future.cancel()
+                    wait([embeds_future for _, _, embeds_future in pending])
+                
+                if not processed:
+                    logger.info("No posts with images found")
+                    return
+                
+                logger.info("✅ Processed %s posts with images", processed)
+                logger.info("🗑️  Removing temporary files in: %s", temp_dir)
             
         except Exception as e:
-            print(f"Error in bot execution: {e}")
+            logger.error("Error in bot execution: %s", e)
             raise
         finally:
-            # Cleanup
-            if self.temp_dir and os.path.exists(self.temp_dir):
-                print(f"\n🗑️  Temporary files are in: {self.temp_dir}")
-                print("   (Files will be cleaned up automatically by the system)")
+            self.temp_dir = None
 
     def get_followed_accounts(self, limit: int = 1000) -> List[str]:
         """Get list of account handles that the user follows"""
@@ -2033,11 +2796,13 @@ URI: {post.post.uri}
                 # Rate limiting
                 time.sleep(0.1)
             
-            logger.info(f"Fetched {len(followed_handles)} followed accounts")
+            logger.info("Fetched %s followed accounts", len(followed_handles))
+            if len(followed_handles) < limit:
+                self._followed_handles = frozenset(followed_handles)
             return followed_handles
             
         except Exception as e:
-            logger.error(f"Error fetching followed accounts: {e}")
+            logger.error("Error fetching followed accounts: %s", e)
             return []
 
 
@@ -18,6 +18,11 @@ BLUESKY_PASSWORD_ENV = os.getenv('BLUESKY_PASSWORD_BIKELIFE')
 DEFAULT_TIMELINE_LIMIT = 5
 IMAGE_DOWNLOAD_TIMEOUT = 10
 TEMP_DIR_PREFIX = 'bluesky_images_'
+# Per-user directory for caches that outlive the process (the timeline cache holds the private home timeline)
+CACHE_DIR = os.getenv('BLUESKY_CACHE_DIR', os.path.join(
+    os.getenv('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache'), 'bluesky-image-reply-bot'))
+# Set to 'false' to download images over the requests session instead of HTTP/2
+IMAGE_DOWNLOAD_HTTP2 = os.getenv('IMAGE_DOWNLOAD_HTTP2', 'true').lower() != 'false'
 
 # Flask Web App Settings
 FLASK_HOST = '0.0.0.0'
@@ -17,7 +17,14 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 # Import Flask app
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
-from app import app
+from app import app, sse_event
+import config
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path, monkeypatch):
+    """Keep caches written by bots the endpoints create out of the user's cache directory"""
+    monkeypatch.setattr(config, 'CACHE_DIR', str(tmp_path))
 
 
 class TestFlaskAPIUnit:
@@ -296,6 +303,36 @@ class TestFlaskAPIUnit:
             data = json.loads(response.data)
             assert 'error' in data
 
+    
+    @pytest.mark.unit
+    def test_posts_stream_forwards_events_as_they_arrive(self, client):
+        """Test the stream endpoint relays keepalives and sends the posts in the complete event"""
+        events = [
+            {'type': 'progress', 'message': 'Fetching batch 1...', 'posts_found': 0},
+            {'type': 'keepalive', 'message': 'Still searching...'},
+            {'type': 'complete', 'posts': [{'post': {'uri': 'at://test/post1'}}], 'count': 1, 'cursor': 'next'}
+        ]
+        with patch('app.init_bot', return_value=True), patch('app.bluesky_bot') as mock_bot:
+            mock_bot.fetch_posts_with_images_web_stream_generator.return_value = iter(events)
+            response = client.get('/api/posts/stream?count=1&fetch_more=true&session_id=s1')
+            body = response.get_data(as_text=True)
+        
+        messages = [json.loads(line[len('data: '):]) for line in body.split('\n\n') if line]
+        assert [m['type'] for m in messages] == ['start', 'progress', 'keepalive', 'complete']
+        assert messages[-1] == {'type': 'complete', 'posts': events[2]['posts'], 'count': 1, 'is_fetch_more': True}
+        assert response.headers['X-Accel-Buffering'] == 'no'
+        assert mock_bot.fetch_posts_with_images_web_stream_generator.call_args.kwargs['reset'] is False
+    
+    @pytest.mark.unit
+    def test_sse_event_prefers_orjson(self):
+        """Test stream events are encoded with orjson when it is installed"""
+        fake_orjson = Mock(OPT_NON_STR_KEYS=1)
+        fake_orjson.dumps.return_value = b'{"type":"keepalive"}'
+        with patch('app.orjson', fake_orjson):
+            assert sse_event({'type': 'keepalive'}) == b'data: {"type":"keepalive"}\n\n'
+        with patch('app.orjson', None):
+            assert sse_event({'type': 'keepalive'}) == 'data: {"type":"keepalive"}\n\n'
+
 
 class TestFlaskErrorHandling:
     """Unit tests for Flask error handling"""
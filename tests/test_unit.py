@@ -9,16 +9,74 @@ import tempfile
 import os
 import shutil
 import sys
-from unittest.mock import Mock, patch, MagicMock
+import time
+from unittest.mock import Mock, patch, MagicMock, call
 
 # Add the src directory to the Python path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 # Import modules
-from bluesky_bot import BlueskyBot
+from bluesky_bot import BlueskyBot, TimelinePage, FetchResult
+from atproto import models
+from atproto_client.models.utils import get_or_create
 from ai_config import AIConfigManager, AIConfig
 
 
+def make_image_response(headers, body):
+    """Build a streamed requests response for an image download, usable as a context manager"""
+    import io
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.headers = headers
+    response.raw = io.BytesIO(body)
+    return response
+
+
+def make_feed_post(n=1, handle='artist.bsky.social', did='did:plc:abc', reason=None):
+    """Build a fake feed item for an image post, with a URI numbered by n"""
+    post = Mock()
+    post.post.author.handle = handle
+    post.post.author.did = did
+    post.post.uri = f'at://{did}/app.bsky.feed.post/{n}'
+    post.post.record.embed.images = [Mock()]
+    post.reason = reason
+    return post
+
+
+def make_web_post(handle, n=1):
+    """Build a post as formatted for the web UI, with a URI numbered by n"""
+    return {'author': {'handle': handle}, 'post': {'uri': f'at://{handle}/{n}'}}
+
+
+@pytest.fixture
+def failing_http_server():
+    """Local HTTP server answering every GET with a 404 or a non-image 200, by path"""
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, so leaked responses hold on to pooled connections
+        
+        def do_GET(self):
+            status, content_type = (404, 'text/plain') if self.path.startswith('/missing') else (200, 'text/html')
+            body = b'not an image'
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        
+        def log_message(self, *args):
+            pass
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+
 class TestBlueskyBotUnit:
     """Unit tests for BlueskyBot class methods"""
     
@@ -27,9 +85,13 @@ class TestBlueskyBotUnit:
         self.bot = BlueskyBot()
         self.temp_dir = tempfile.mkdtemp()
         self.bot.temp_dir = self.temp_dir
+        self.bot._disk_cache_path = os.path.join(self.temp_dir, 'timeline_cache.sqlite3')
+        self.bot._like_index_dir = self.temp_dir
+        BlueskyBot._ssm_cache.clear()
     
     def teardown_method(self):
         """Clean up after each test method"""
+        self.bot._flush_like_index()  # Save pending like index changes before their directory goes
         if os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir)
     
@@ -141,6 +203,54 @@ class TestBlueskyBotUnit:
         result = self.bot._has_media(mock_post)
         assert result is False
     
+    @pytest.mark.unit
+    def test_has_media_dispatches_on_embed_type(self):
+        """Test _has_media reads the lexicon type of real embed models"""
+        images = get_or_create({'$type': 'app.bsky.embed.images', 'images': [
+            {'alt': '', 'image': {'$type': 'blob', 'ref': {'$link': 'bafkreib'}, 'mimeType': 'image/jpeg', 'size': 1}}
+        ]}, models.AppBskyEmbedImages.Main, strict=True)
+        quote = models.AppBskyEmbedRecord.Main(record=models.ComAtprotoRepoStrongRef.Main(uri='at://did:plc:abc/app.bsky.feed.post/1', cid='bafy'))
+        
+        mock_post = Mock()
+        mock_post.post.record.embed = images
+        assert self.bot._has_media(mock_post) is True
+        mock_post.post.record.embed = quote
+        assert self.bot._has_media(mock_post) is False
+    
+    @pytest.mark.unit
+    def test_has_media_memoizes_by_cid(self):
+        """Test a post's embed is only inspected once per CID, within the cache bound"""
+        self.bot._embed_info_cache_max_entries = 2
+        posts = []
+        for n in range(3):
+            post = Mock()
+            post.post.cid = f'bafycid{n}'
+            posts.append(post)
+        
+        with patch.object(self.bot, '_inspect_embed', return_value=(True, 1)) as mock_check:
+            assert self.bot._has_media(posts[0]) is True
+            assert self.bot._has_media(posts[0]) is True
+            assert mock_check.call_count == 1
+            
+            self.bot._has_media(posts[1])
+            self.bot._has_media(posts[2])
+        
+        assert list(self.bot._embed_info_cache) == ['bafycid1', 'bafycid2']
+    
+    @pytest.mark.unit
+    def test_image_count_reuses_has_media_walk(self):
+        """Test _has_media and _get_safe_image_count share one embed walk per CID"""
+        post = Mock()
+        post.post.cid = 'bafyimages'
+        post.post.record.embed.py_type = 'app.bsky.embed.images'
+        post.post.record.embed.images = [Mock(), Mock()]
+        
+        with patch.object(self.bot, '_inspect_embed', wraps=self.bot._inspect_embed) as mock_inspect:
+            assert self.bot._has_media(post) is True
+            assert self.bot._get_safe_image_count(post) == 2
+        
+        mock_inspect.assert_called_once_with(post)
+    
     @pytest.mark.unit
     def test_has_media_exception_handling(self):
         """Test _has_media handles exceptions gracefully"""
@@ -151,6 +261,1371 @@ class TestBlueskyBotUnit:
         result = self.bot._has_media(mock_post)
         assert result is False
     
+    @pytest.mark.unit
+    def test_fetch_posts_with_images_stream_generator_yields_posts(self):
+        """Test the stream generator yields each post with media before completing"""
+        media_posts = [make_feed_post(did=f'did:plc:user{i}') for i in range(2)]
+        
+        with patch.object(self.bot, 'fetch_media_feed', return_value=media_posts):
+            events = list(self.bot.fetch_posts_with_images_stream_generator(target_count=2))
+        
+        assert [event['type'] for event in events] == ['post_found', 'post_found', 'complete']
+        assert events[0]['post'] is media_posts[0]
+        assert events[-1]['count'] == 2
+    
+    @pytest.mark.unit
+    def test_fetch_posts_with_images_caps_posts_per_user(self):
+        """Test a single prolific author can't fill the whole result"""
+        prolific_post = make_feed_post(did='did:plc:prolific')
+        
+        with patch.object(self.bot, 'fetch_media_feed', return_value=[prolific_post] * 3), \
+             patch.object(self.bot, 'fetch_timeline_page', return_value=TimelinePage([], None)):
+            posts = self.bot.fetch_posts_with_images(target_count=3, max_posts_per_user=1)
+        
+        assert posts == [prolific_post]
+    
+    @pytest.mark.unit
+    def test_fetch_posts_with_images_skips_timeline_repeats_of_media_feed(self):
+        """Test the first timeline page overlaps the media feed without repeating its posts"""
+        feed_post, timeline_post = make_feed_post(did='did:plc:a'), make_feed_post(did='did:plc:b')
+        self.bot._media_feed_uris = dict.fromkeys(['at://did:plc:feed/app.bsky.feed.generator/media'])
+        
+        with patch.object(self.bot, 'fetch_media_feed', return_value=[feed_post]), \
+             patch.object(self.bot, 'fetch_timeline_page',
+                          return_value=TimelinePage([feed_post, timeline_post], None)) as mock_fetch:
+            posts = self.bot.fetch_posts_with_images(target_count=3)
+        
+        assert posts == [feed_post, timeline_post]
+        mock_fetch.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_run_downloads_posts_concurrently_and_displays_in_order(self):
+        """Test run() processes every found post's media in the pool and shows the posts in order"""
+        first, second = Mock(), Mock()
+        events = [{'type': 'post_found', 'post': first, 'posts_found': 1},
+                  {'type': 'post_found', 'post': second, 'posts_found': 2},
+                  {'type': 'complete', 'count': 2, 'fetch_count': 1}]
+        
+        with patch.object(self.bot, '_authenticate_and_setup'), \
+             patch.object(self.bot, 'fetch_posts_with_images_stream_generator', return_value=iter(events)), \
+             patch.object(self.bot, 'process_embeds', side_effect=lambda post: [{'post': post}]) as mock_process, \
+             patch.object(self.bot, 'display_post_with_media') as mock_display:
+            self.bot.run('test.bsky.social', target_posts_with_images=2)
+        
+        assert mock_process.call_count == 2
+        assert mock_display.call_args_list == [call(first, [{'post': first}]), call(second, [{'post': second}])]
+    
+    @pytest.mark.unit
+    def test_run_removes_its_temp_directory(self):
+        """Test run() downloads into a temporary directory that is gone once it returns"""
+        run_dirs = []
+        
+        def fake_generator(target_count):
+            run_dirs.append(self.bot.temp_dir)
+            assert os.path.isdir(self.bot.temp_dir)
+            return iter([{'type': 'complete', 'count': 0, 'fetch_count': 1}])
+        
+        with patch.object(self.bot, '_authenticate_and_setup') as mock_setup, \
+             patch.object(self.bot, 'fetch_posts_with_images_stream_generator', side_effect=fake_generator):
+            self.bot.run('test.bsky.social')
+        
+        mock_setup.assert_called_once_with('test.bsky.social', create_temp_dir=False)
+        assert not os.path.exists(run_dirs[0])
+        assert self.bot.temp_dir is None
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_filtered_uses_cached_follows(self):
+        """Test the filtered fetch falls back to the cached followed handles"""
+        followed, stranger = make_web_post('friend.bsky.social'), make_web_post('stranger.bsky.social')
+        batch = FetchResult(posts=[stranger, followed], cursor=None, seen_uris=frozenset(), total_checked=2, fetch_count=1)
+        self.bot.client = Mock()
+        self.bot._followed_handles = frozenset({'friend.bsky.social'})
+        
+        empty = FetchResult(posts=[], cursor=None, seen_uris=frozenset(), total_checked=0, fetch_count=1)
+        with patch.object(self.bot, 'fetch_posts_with_images_web_paginated', side_effect=[batch, empty]):
+            result = self.bot.fetch_posts_with_images_web_filtered(target_count=2, max_fetches=2)
+        
+        assert result['posts'] == [followed]
+        assert result['total_checked'] == 2
+        assert 'error' not in result
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_filtered_applies_reply_filters(self):
+        """Test replied posts and authors over the reply threshold are dropped, up to the target"""
+        replied, chatty, fresh, other, extra = (make_web_post(handle, n) for n, handle in enumerate('a busy b c d'.split(), 1))
+        batch = FetchResult(posts=[replied, chatty, fresh, other, extra], cursor='next', seen_uris=frozenset(),
+                            total_checked=5, fetch_count=1)
+        self.bot.client = Mock()
+        
+        with patch.object(self.bot, 'fetch_posts_with_images_web_paginated', return_value=batch), \
+             patch.object(self.bot, 'get_reply_analytics', return_value={'success': True, 'replies_per_user': {'busy': 3}}):
+            result = self.bot.fetch_posts_with_images_web_filtered(
+                target_count=2, max_fetches=1, reply_filter_threshold=2,
+                replied_post_uris=['at://a/1'], followed_accounts=[])
+        
+        assert result['posts'] == [fresh, other]
+        assert result['seen_uris'] == {f'at://{p}' for p in ('a/1', 'busy/2', 'b/3', 'c/4', 'd/5')}
+    
+    @pytest.mark.unit
+    def test_display_post_with_media_prints_once(self):
+        """Test a post and its media are written with a single print call"""
+        embeds = [
+            {'type': 'image', 'filename': 'image_1_0.jpg', 'alt_text': 'a bike', 'local_path': '/tmp/image_1_0.jpg',
+             'info': {'width': 20, 'height': 10, 'file_size': 123}},
+            {'type': 'video', 'url': 'https://v', 'title': 'Ride', 'description': 'desc',
+             'filename': 'video_1.jpg', 'thumb_path': '/tmp/video_1.jpg'},
+        ]
+        with patch.object(self.bot, 'format_post_text', return_value='POST'), \
+             patch('builtins.print') as mock_print:
+            self.bot.display_post_with_media(Mock(), embeds=embeds)
+            self.bot.display_post_with_media(Mock(), embeds=[])
+        
+        assert mock_print.call_args_list == [
+            call("POST\n📸 EMBEDDED MEDIA:\n"
+                 "  🖼️  Image: image_1_0.jpg\n      Alt text: a bike\n      Dimensions: 20x10\n"
+                 "      File size: 123 bytes\n      Local path: /tmp/image_1_0.jpg\n"
+                 "  🎥 Video: https://v\n      Title: Ride\n      Description: desc\n"
+                 "      Thumbnail: video_1.jpg\n      Thumbnail path: /tmp/video_1.jpg\n"),
+            call("POST\nNo embedded media found in this post.\n"),
+        ]
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_filtered_stops_fetching_at_target(self):
+        """Test no further batch is fetched once the filtered posts reach the target"""
+        posts = [make_web_post(f'user{n}') for n in range(3)]
+        batch = FetchResult(posts=posts, cursor='next', seen_uris=frozenset(), total_checked=3, fetch_count=1)
+        self.bot.client = Mock()
+        
+        with patch.object(self.bot, 'fetch_posts_with_images_web_paginated', return_value=batch) as mock_fetch:
+            result = self.bot.fetch_posts_with_images_web_filtered(target_count=2, max_fetches=5, followed_accounts=[])
+        
+        assert result['posts'] == posts[:2]
+        assert result['fetch_count'] == 1
+        mock_fetch.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_fetch_media_feed_falls_back_to_raw_media_timeline(self):
+        """Test the timeline fallback parses raw JSON and only builds models for media posts"""
+        self.bot._min_api_interval = 0
+        with patch.object(self.bot, '_get_media_timeline', return_value=([], None)) as mock_raw:
+            self.bot.client = Mock()
+            assert self.bot.fetch_media_feed(limit=10) == []
+        
+        mock_raw.assert_called_once_with(limit=10, cursor=None, algorithm='home')
+        self.bot.client.get_timeline.assert_not_called()
+    
+    @pytest.mark.unit
+    def test_fetch_posts_with_images_walks_timeline_pages(self):
+        """Test timeline pages are followed by cursor until the target is reached"""
+        pages = {None: 'page2', 'page2': None}
+        
+        def fake_fetch_timeline_page(limit, cursor=None, algorithm='home', media_only=False):
+            return TimelinePage([make_feed_post(did=f'did:plc:{cursor}')], pages[cursor])
+        
+        with patch.object(self.bot, 'fetch_media_feed', return_value=[]), \
+             patch.object(self.bot, 'fetch_timeline_page', side_effect=fake_fetch_timeline_page) as mock_fetch:
+            posts = self.bot.fetch_posts_with_images(target_count=2)
+        
+        assert len(posts) == 2
+        assert [c.kwargs['cursor'] for c in mock_fetch.call_args_list] == [None, 'page2']
+    
+    @pytest.mark.unit
+    def test_fetch_posts_from_media_users_filters_server_side(self):
+        """Test author feeds are requested with the posts_with_media filter"""
+        media_post = make_feed_post()
+        self.bot.client = Mock()
+        self.bot.client.app.bsky.feed.get_author_feed.return_value = Mock(feed=[media_post])
+        self.bot._cache_media_user('artist.bsky.social', True)
+        
+        posts = self.bot.fetch_posts_from_media_users(['artist.bsky.social'], limit=5)
+        
+        assert posts == [media_post]
+        params = self.bot.client.app.bsky.feed.get_author_feed.call_args.kwargs['params']
+        assert params == {'actor': 'artist.bsky.social', 'limit': 5, 'filter': 'posts_with_media'}
+    
+    @pytest.mark.unit
+    def test_lookup_cache_safe_under_concurrent_eviction(self):
+        """Test lookup caches can be filled and read from many threads while evicting"""
+        import threading
+        self.bot._lookup_cache_max_entries = 2
+        errors = []
+        
+        def churn(worker):
+            try:
+                for n in range(300):
+                    self.bot._cache_media_user(f'user{(worker + n) % 5}', True)
+                    self.bot._get_lookup(self.bot._media_user_cache, f'user{n % 5}')
+                    self.bot.get_media_user_stats()
+            except Exception as e:
+                errors.append(e)
+        
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=churn, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        
+        assert errors == []
+        assert len(self.bot._media_user_cache) <= 2
+    
+    @pytest.mark.unit
+    def test_fetch_posts_from_media_users_fetches_feeds_concurrently(self):
+        """Test author feeds are fetched in parallel but returned in handle order"""
+        import threading
+        handles = ['a.bsky.social', 'b.bsky.social', 'c.bsky.social']
+        posts_by_handle = {handle: make_feed_post(handle=handle) for handle in handles}
+        for handle in handles:
+            self.bot._cache_media_user(handle, True)
+        
+        # Every fetch waits for the others, so this only completes if they run at the same time
+        barrier = threading.Barrier(len(handles), timeout=5)
+        def get_author_feed(params):
+            barrier.wait()
+            return Mock(feed=[posts_by_handle[params['actor']]])
+        self.bot.client = Mock()
+        self.bot.client.app.bsky.feed.get_author_feed.side_effect = get_author_feed
+        
+        posts = self.bot.fetch_posts_from_media_users(handles, limit=5)
+        
+        assert posts == [posts_by_handle[handle] for handle in handles]
+    
+    @pytest.mark.unit
+    def test_get_reply_analytics_resolves_handles_in_one_batch(self):
+        """Test parent authors are resolved with a single get_profiles call and cached"""
+        from datetime import datetime, timezone
+        now = datetime.now(timezone.utc).isoformat().replace('+00:00', 'Z')
+        def reply_to(did):
+            item = Mock()
+            item.post.indexed_at = now
+            item.post.record.reply.parent.uri = f'at://{did}/app.bsky.feed.post/1'
+            return item
+        self.bot.client = Mock()
+        self.bot.client.get_author_feed.return_value = Mock(
+            feed=[reply_to('did:plc:alice'), reply_to('did:plc:bob'), reply_to('did:plc:alice')], cursor=None)
+        self.bot.client.app.bsky.actor.get_profiles.return_value = Mock(profiles=[
+            Mock(did='did:plc:alice', handle='alice.bsky.social'),
+            Mock(did='did:plc:bob', handle='bob.bsky.social'),
+        ])
+        
+        first = self.bot.get_reply_analytics()
+        second = self.bot.get_reply_analytics()
+        
+        assert first['replies_per_user'] == {'alice.bsky.social': 2, 'bob.bsky.social': 1}
+        assert first['total_replies'] == 3
+        assert second == first
+        self.bot.client.app.bsky.actor.get_profiles.assert_called_once_with(
+            params={'actors': ['did:plc:alice', 'did:plc:bob']})
+        self.bot.client.get_profile.assert_not_called()
+    
+    @pytest.mark.unit
+    def test_replies_log_appends_and_compacts(self):
+        """Test replies are appended as JSON lines, compacting on the first write and then periodically"""
+        import json
+        self.bot._replies_file = os.path.join(self.temp_dir, 'replies_tracking.jsonl')
+        self.bot._replies_compact_every = 3
+        with open(self.bot._replies_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'post_uri': 'at://old', 'timestamp': '2000-01-01T00:00:00'}) + '\n')
+        
+        def line_count():
+            with open(self.bot._replies_file, encoding='utf-8') as f:
+                return len(f.readlines())
+        
+        self.bot._store_reply_for_analytics('at://a', 'first', 'at://reply/a')
+        assert line_count() == 1
+        self.bot._store_reply_for_analytics('at://b', 'second', 'at://reply/b')
+        assert line_count() == 2
+        
+        assert sorted(self.bot.get_replied_post_uris()) == ['at://a', 'at://b']
+        assert not [name for name in os.listdir(self.temp_dir) if name.startswith('.replies_')]
+    
+    @pytest.mark.unit
+    def test_replied_post_uris_skip_expired_replies(self):
+        """Test replies past the retention window are ignored before any compaction runs"""
+        import json
+        from datetime import datetime
+        self.bot._replies_file = os.path.join(self.temp_dir, 'replies_tracking.jsonl')
+        with open(self.bot._replies_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'post_uri': 'at://old', 'timestamp': '2000-01-01T00:00:00'}) + '\n')
+            f.write(json.dumps({'post_uri': 'at://new', 'timestamp': datetime.now().isoformat()}) + '\n')
+        
+        assert self.bot.get_replied_post_uris() == ['at://new']
+    
+    @pytest.mark.unit
+    def test_replies_log_migrates_legacy_json(self):
+        """Test replies from the old JSON array file are carried into the JSONL log"""
+        import json
+        from datetime import datetime
+        self.bot._replies_file = os.path.join(self.temp_dir, 'replies_tracking.jsonl')
+        with open(os.path.join(self.temp_dir, 'replies_tracking.json'), 'w', encoding='utf-8') as f:
+            json.dump([{'post_uri': 'at://legacy', 'timestamp': datetime.now().isoformat()}], f)
+        
+        assert self.bot.get_replied_post_uris() == ['at://legacy']
+        assert os.path.exists(self.bot._replies_file)
+    
+    @pytest.mark.unit
+    def test_like_status_is_cached_and_updated_by_likes(self):
+        """Test like checks are cached for both outcomes and kept in step with likes and unlikes"""
+        uri = 'at://did:plc:abc/app.bsky.feed.post/1'
+        self.bot.client = Mock()
+        self.bot._like_index_file = os.path.join(self.temp_dir, 'like_index.json')
+        
+        with patch.object(self.bot, '_get_viewer_like', return_value='') as mock_viewer:
+            assert self.bot._check_if_post_is_liked(uri) is False
+            assert self.bot._check_if_post_is_liked(uri) is False
+            assert mock_viewer.call_count == 1
+            
+            self.bot._remember_like(uri, 'at://did:plc:me/app.bsky.feed.like/3kabc')
+            assert self.bot._check_if_post_is_liked(uri) is True
+            self.bot._forget_like(uri)
+            assert self.bot._check_if_post_is_liked(uri) is False
+            assert mock_viewer.call_count == 1
+            
+            self.bot.invalidate_like(uri)
+            self.bot._check_if_post_is_liked(uri)
+            assert mock_viewer.call_count == 2
+    
+    @pytest.mark.unit
+    def test_replied_post_uris_reread_only_when_log_changes(self):
+        """Test the replies log is parsed again only after it is written"""
+        self.bot._replies_file = os.path.join(self.temp_dir, 'replies_tracking.jsonl')
+        self.bot._store_reply_for_analytics('at://a', 'first', 'at://reply/a')
+        
+        with patch.object(self.bot, '_iter_replies', wraps=self.bot._iter_replies) as mock_iter:
+            assert self.bot.get_replied_post_uris() == ['at://a']
+            assert self.bot.get_replied_post_uris() == ['at://a']
+            assert mock_iter.call_count == 1
+            
+            self.bot._store_reply_for_analytics('at://b', 'second', 'at://reply/b')
+            assert sorted(self.bot.get_replied_post_uris()) == ['at://a', 'at://b']
+            assert mock_iter.call_count == 2
+    
+    @pytest.mark.unit
+    def test_analyze_user_media_ratio(self):
+        """Test the media ratio is the share of sampled posts with media"""
+        media_post, text_post = Mock(), Mock()
+        self.bot.client = Mock()
+        self.bot.client.app.bsky.feed.get_author_feed.return_value = Mock(feed=[media_post, text_post, text_post, media_post])
+        
+        with patch.object(self.bot, '_has_media', side_effect=lambda post: post is media_post):
+            assert self.bot._analyze_user_media_ratio('artist.bsky.social') == 0.5
+        
+        self.bot.client.app.bsky.feed.get_author_feed.return_value = Mock(feed=[])
+        assert self.bot._analyze_user_media_ratio('quiet.bsky.social') == 0.0
+    
+    @pytest.mark.unit
+    def test_fetch_posts_from_media_users_caches_non_media_users(self):
+        """Test a user found not to post media is not re-analyzed while cached"""
+        self.bot.client = Mock()
+        with patch.object(self.bot, '_analyze_user_media_ratio', return_value=0.0) as mock_analyze:
+            assert self.bot.fetch_posts_from_media_users(['writer.bsky.social']) == []
+            assert self.bot.fetch_posts_from_media_users(['writer.bsky.social']) == []
+        
+        mock_analyze.assert_called_once_with('writer.bsky.social')
+        self.bot.client.app.bsky.feed.get_author_feed.assert_not_called()
+        assert self.bot.get_media_user_stats()['active_cached_users'] == 1
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_paginated_follows_cursor(self):
+        """Test paginated web fetch walks cursor-chained batches and returns the resume cursor"""
+        pages = {None: 'page2', 'page2': 'page3', 'page3': None}
+        
+        def fake_fetch_timeline_page(limit, cursor=None, algorithm='home', media_only=False):
+            return TimelinePage([make_feed_post(cursor, handle=f'user-{cursor}.bsky.social')], pages[cursor])
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([], None)), \
+             patch.object(self.bot, 'fetch_timeline_page', side_effect=fake_fetch_timeline_page), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda post: {'uri': post.post.uri}):
+            result = self.bot.fetch_posts_with_images_web_paginated(target_count=2)
+        
+        assert [p['uri'] for p in result.posts] == ['at://did:plc:abc/app.bsky.feed.post/None', 'at://did:plc:abc/app.bsky.feed.post/page2']
+        assert result.cursor == 'page3'
+        assert result.fetch_count == 2
+        assert result.seen_uris == frozenset(p['uri'] for p in result.posts)
+        assert result.to_dict()['cursor'] == 'page3'
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_stream_generator_shares_search_loop(self):
+        """Test the streaming generator forwards progress events and completes with the posts found"""
+        post = make_feed_post()
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([post], None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=1))
+        
+        assert {e['type'] for e in events[:-1]} <= {'progress', 'keepalive'}
+        assert events[-1]['type'] == 'complete'
+        assert events[-1]['posts'] == [{'uri': 'at://did:plc:abc/app.bsky.feed.post/1'}]
+        assert events[-1]['count'] == 1
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_skips_posts_returned_by_earlier_calls(self):
+        """Test repeated web fetches don't re-format posts already returned"""
+        post = make_feed_post()
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([post], None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}) as mock_format:
+            first = self.bot.fetch_posts_with_images_web(target_count=1, max_fetches=1)
+            second = self.bot.fetch_posts_with_images_web(target_count=1, max_fetches=1)
+        
+        assert first == [{'uri': 'at://did:plc:abc/app.bsky.feed.post/1'}]
+        assert second == []
+        assert mock_format.call_count == 1
+    
+    @pytest.mark.unit
+    def test_seen_post_uris_are_bounded_and_resettable(self):
+        """Test the non-paginated fetchers only remember recent posts and can be reset"""
+        self.bot._seen_post_uris.max_entries = 2
+        for n in range(3):
+            self.bot._seen_post_uris.add(f'at://did:plc:abc/app.bsky.feed.post/{n}')
+        assert list(self.bot._seen_post_uris) == ['at://did:plc:abc/app.bsky.feed.post/1', 'at://did:plc:abc/app.bsky.feed.post/2']
+        
+        post = make_feed_post(2)
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([post], None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            assert self.bot.fetch_posts_with_images_web(target_count=1, max_fetches=1) == []
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=1, max_fetches=1, reset=True))
+        
+        assert events[-1]['posts'] == [{'uri': post.post.uri}]
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_logs_skips_instead_of_printing(self, capsys):
+        """Test the web fetch sends per-post skip notices to the debug log rather than stdout"""
+        post = make_feed_post()
+        self.bot._seen_post_uris.add(post.post.uri)
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([post], None)), \
+             patch('bluesky_bot.logger') as mock_logger:
+            posts = self.bot.fetch_posts_with_images_web(target_count=1, max_fetches=1)
+        
+        assert posts == []
+        assert capsys.readouterr().out == ''
+        assert any('Skipping already seen' in c.args[0] for c in mock_logger.debug.call_args_list)
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_stream_generator_reports_skips_per_batch(self):
+        """Test skipped posts are summarised in one progress event per batch"""
+        feed = [make_feed_post(n, handle='prolific.bsky.social') for n in range(5)]
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage(feed, None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=5, max_fetches=1, max_posts_per_user=1))
+        
+        batch_events = [e for e in events if 'skipped' in e]
+        assert len(batch_events) == 1
+        assert batch_events[0]['skipped'] == 4
+        assert not any('Skipping' in e.get('message', '') for e in events)
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_stream_generator_throttles_batch_progress(self):
+        """Test quick batches share one progress event that accumulates their skips"""
+        seen_post = Mock()
+        seen_post.post.author.handle = 'artist.bsky.social'
+        seen_post.post.uri = 'at://did:plc:abc/app.bsky.feed.post/seen'
+        seen_post.reason = None
+        self.bot._seen_post_uris.add(seen_post.post.uri)
+        self.bot._progress_interval = 60
+        self.bot._progress_every_batches = 3
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([seen_post], 'more')):
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=1, max_fetches=4))
+        
+        batch_events = [e for e in events if 'skipped' in e]
+        assert [(e['current_batch'], e['skipped']) for e in batch_events] == [(3, 3), (4, 1)]
+        assert sum(e['type'] == 'keepalive' for e in events) == 2  # Connection keepalive plus batch 3
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_skips_prefetch_when_batch_reaches_target(self):
+        """Test no further page is requested when the current batch already holds the target"""
+        page = TimelinePage([make_feed_post(n, handle=f'user{n}.bsky.social') for n in (1, 2)], 'more')
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=page) as mock_fetch, \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            posts = self.bot.fetch_posts_with_images_web(target_count=2, max_fetches=5)
+        
+        assert len(posts) == 2
+        mock_fetch.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_stream_generator_summarises_top_users(self):
+        """Test the user distribution summary only lists the top contributors"""
+        feed = [make_feed_post(n, handle=f'user{n}.bsky.social') for n in range(12)]
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage(feed, None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=12, max_fetches=1, max_posts_per_user=1))
+        
+        summary = next(e['message'] for e in events if 'User distribution' in e.get('message', ''))
+        assert summary.count('.bsky.social') == 10
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_requests_media_only_pages(self):
+        """Test the web fetch pre-filters timeline pages and keeps going past pages without media"""
+        post = make_feed_post()
+        pages = {None: TimelinePage([], 'page2'), 'page2': TimelinePage([post], None)}
+        
+        with patch.object(self.bot, 'fetch_timeline_page', side_effect=lambda limit, cursor=None, algorithm='home', media_only=False: pages[cursor]) as mock_fetch, \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            posts = self.bot.fetch_posts_with_images_web(target_count=1, max_fetches=3)
+        
+        assert posts == [{'uri': 'at://did:plc:abc/app.bsky.feed.post/1'}]
+        assert all(c.kwargs['media_only'] for c in mock_fetch.call_args_list)
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_stream_generator_labels_reposts(self):
+        """Test found posts are labelled as reposts only when the feed item has a repost reason"""
+        feed = [make_feed_post(1, handle='user1.bsky.social'),
+                make_feed_post(2, handle='user2.bsky.social', reason=Mock())]
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage(feed, None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=2, max_fetches=1))
+        
+        found = [e['message'] for e in events if e.get('message', '').startswith('📸')]
+        assert found[0].startswith('📸 Found original post')
+        assert found[1].startswith('📸 Found repost post')
+        assert [e for e in events if 'reposts' in e][0]['reposts'] == 1
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_progress_events_are_independent_copies(self):
+        """Test progress events carry the current counts and are not shared between yields"""
+        posts = [make_feed_post(n, handle=f'user{n}.bsky.social') for n in range(2)]
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage(posts, None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=4, max_fetches=1))
+        
+        found = [e for e in events if e.get('message', '').startswith('📸')]
+        assert [(e['posts_found'], e['progress_percent']) for e in found] == [(1, 25), (2, 50)]
+        assert all(isinstance(e['progress_percent'], int) for e in events if 'progress_percent' in e)
+        assert events[0]['posts_found'] == 0
+        assert events[0] is not events[1]
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_formats_batch_in_parallel(self):
+        """Test posts in a batch are formatted concurrently but reported in timeline order"""
+        import threading
+        posts = [make_feed_post(n, handle=f'user{n}.bsky.social') for n in range(3)]
+        all_started = threading.Barrier(3, timeout=5)
+        
+        def slow_format(post):
+            # Only returns once all three posts are being formatted at the same time
+            all_started.wait()
+            return {'uri': post.post.uri}
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage(posts, None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=slow_format):
+            result = self.bot.fetch_posts_with_images_web(target_count=3, max_fetches=1)
+        
+        assert [p['uri'] for p in result] == [p.post.uri for p in posts]
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_progress_percent_is_whole_number(self):
+        """Test progress percentages are truncated to integers and reach 100 on completion"""
+        post = make_feed_post()
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([post], None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            events = list(self.bot.fetch_posts_with_images_web_stream_generator(target_count=3, max_fetches=1))
+        
+        found = [e for e in events if e.get('message', '').startswith('📸')]
+        assert found[0]['progress_percent'] == 33
+        assert events[-2]['progress_percent'] == 100
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_stops_when_users_are_capped(self):
+        """Test the search stops fetching once batches only hold posts from capped users"""
+        def fake_fetch_timeline_page(limit, cursor=None, algorithm='home', media_only=False):
+            n = int(cursor or 0)
+            feed = [make_feed_post(n, handle='prolific.bsky.social')]
+            if n == 1:
+                feed.append(make_feed_post(100, handle='stranger.bsky.social', reason=Mock()))  # Repost of an unfollowed account
+            return TimelinePage(feed, str(n + 1))
+        
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage([], None)), \
+             patch.object(self.bot, 'fetch_timeline_page', side_effect=fake_fetch_timeline_page), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}):
+            # Every followed user being capped doesn't stop the search while other authors turn up
+            self.bot._followed_handles = frozenset({'prolific.bsky.social'})
+            stalled = self.bot.fetch_posts_with_images_web_paginated(target_count=5, max_fetches=10, max_posts_per_user=1)
+        
+        assert len(stalled.posts) == 2
+        assert stalled.fetch_count == 2 + self.bot._max_stalled_batches
+    
+    @pytest.mark.unit
+    def test_post_accessors_read_feed_item_fields(self):
+        """Test the attrgetter accessors used in the search loops read the nested post fields"""
+        from bluesky_bot import _get_post_handle, _get_post_author_did, _get_post_uri
+        item = Mock()
+        item.post.author.handle = 'artist.bsky.social'
+        item.post.author.did = 'did:plc:abc'
+        item.post.uri = 'at://did:plc:abc/app.bsky.feed.post/1'
+        
+        assert _get_post_handle(item) == 'artist.bsky.social'
+        assert _get_post_author_did(item) == 'did:plc:abc'
+        assert _get_post_uri(item) == 'at://did:plc:abc/app.bsky.feed.post/1'
+    
+    @pytest.mark.unit
+    def test_fetch_posts_web_caps_posts_per_user(self):
+        """Test the web fetch stops formatting a user's posts once they hit the per-user cap"""
+        feed = [make_feed_post(n, handle='prolific.bsky.social') for n in range(3)]
+        with patch.object(self.bot, 'fetch_media_feed_page', return_value=TimelinePage(feed, None)), \
+             patch.object(self.bot, 'format_post_for_web', side_effect=lambda p: {'uri': p.post.uri}) as mock_format:
+            posts = self.bot.fetch_posts_with_images_web(target_count=3, max_fetches=1, max_posts_per_user=2)
+        
+        assert len(posts) == 2
+        assert mock_format.call_count == 2
+    
+    @pytest.mark.unit
+    def test_next_page_resumes_from_session_cursor(self):
+        """Test next_page keeps each session's cursor and seen posts between calls"""
+        results = [
+            FetchResult(posts=[], cursor='page2', seen_uris=frozenset({'uri-1'}), total_checked=20, fetch_count=1),
+            FetchResult(posts=[], cursor='page3', seen_uris=frozenset({'uri-1', 'uri-2'}), total_checked=20, fetch_count=1),
+            FetchResult(posts=[], cursor='page2', seen_uris=frozenset({'uri-1'}), total_checked=20, fetch_count=1),
+        ]
+        
+        with patch.object(self.bot, 'fetch_posts_with_images_web_paginated', side_effect=results) as mock_fetch:
+            self.bot.next_page('session-a', target_count=3)
+            self.bot.next_page('session-a', target_count=3)
+            self.bot.next_page('session-a', target_count=3, reset=True)
+        
+        calls = mock_fetch.call_args_list
+        assert calls[0].kwargs['start_cursor'] is None
+        assert calls[1].kwargs['start_cursor'] == 'page2'
+        assert calls[1].kwargs['seen_post_uris'] == {'uri-1'}
+        assert calls[2].kwargs['start_cursor'] is None
+        assert calls[2].kwargs['seen_post_uris'] == set()
+        
+        # Idle sessions are dropped
+        self.bot._session_cursor_idle_ttl = 0
+        assert self.bot._load_session_cursor('session-a').cursor is None
+        assert 'session-a' not in self.bot._session_cursors
+    
+    @pytest.mark.unit
+    def test_session_cursors_safe_under_concurrent_requests(self):
+        """Test many threads can save and load session cursors while idle sessions expire"""
+        import threading
+        self.bot._session_cursor_idle_ttl = 0  # Every load expires all sessions, so the dict keeps emptying
+        self.bot._session_cursor_max_entries = 4
+        errors = []
+        
+        def churn(worker):
+            try:
+                for n in range(1000):
+                    session_id = f'session-{(worker + n) % 8}'
+                    self.bot._save_session_cursor(session_id, str(n), frozenset())
+                    self.bot._load_session_cursor(f'session-{n % 8}')
+            except Exception as e:
+                errors.append(e)
+        
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=churn, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        
+        assert errors == []
+        assert len(self.bot._session_cursors) <= 4
+    
+    @pytest.mark.unit
+    def test_fetch_timeline_media_only_skips_text_posts(self):
+        """Test media_only timeline fetch only builds models for posts with media embeds"""
+        image_item = {
+            'post': {
+                'uri': 'at://did:plc:abc/app.bsky.feed.post/123',
+                'cid': 'bafyreib2rxk3rh6kzwq',
+                'author': {'did': 'did:plc:abc', 'handle': 'test.bsky.social'},
+                'record': {
+                    '$type': 'app.bsky.feed.post',
+                    'text': 'Test post',
+                    'createdAt': '2024-01-01T00:00:00Z',
+                    'embed': {
+                        '$type': 'app.bsky.embed.images',
+                        'images': [{'alt': '', 'image': {'$type': 'blob', 'ref': {'$link': 'bafkreib2rxk3rh6kzwq'}, 'mimeType': 'image/jpeg', 'size': 10}}]
+                    }
+                },
+                'indexedAt': '2024-01-01T00:00:00Z'
+            }
+        }
+        text_item = {'post': {'uri': 'at://did:plc:abc/app.bsky.feed.post/456', 'record': {'text': 'No media'}}}
+        
+        self.bot.client = Mock()
+        self.bot.client.invoke_query.return_value = Mock(content={'feed': [text_item, image_item], 'cursor': 'next'})
+        
+        feed = self.bot.fetch_timeline(limit=5, media_only=True)
+        
+        assert len(feed) == 1
+        assert feed[0].post.uri == 'at://did:plc:abc/app.bsky.feed.post/123'
+        assert self.bot._get_cached_timeline(5, None, 'home', media_only=True)['cursor'] == 'next'
+    
+    @pytest.mark.unit
+    def test_timeline_cache_evicts_least_recently_used(self):
+        """Test the timeline cache stays bounded and keeps recently used entries"""
+        self.bot._disk_cache_path = None  # Memory level only
+        self.bot._cache_max_entries = 2
+        self.bot._cache_timeline(10, 'a', data={'feed': [], 'cursor': 'a'})
+        self.bot._cache_timeline(10, 'b', data={'feed': [], 'cursor': 'b'})
+        
+        # Touch 'a' so 'b' becomes the least recently used entry
+        assert self.bot._get_cached_timeline(10, 'a') is not None
+        self.bot._cache_timeline(10, 'c', data={'feed': [], 'cursor': 'c'})
+        
+        assert len(self.bot._timeline_cache) == 2
+        assert self.bot._get_cached_timeline(10, 'a') is not None
+        assert self.bot._get_cached_timeline(10, 'b') is None
+        assert self.bot._get_cached_timeline(10, 'c') is not None
+    
+    @pytest.mark.unit
+    def test_timeline_cache_safe_under_concurrent_eviction(self):
+        """Test concurrent reads and writes with constant eviction never raise"""
+        import threading
+        self.bot._disk_cache_path = None  # Memory level only
+        self.bot._cache_max_entries = 2
+        errors = []
+        
+        def churn(worker):
+            try:
+                for n in range(300):
+                    cursor = str((worker + n) % 5)
+                    self.bot._cache_timeline(10, cursor, data={'feed': [], 'cursor': cursor})
+                    self.bot._get_cached_timeline(10, str(n % 5))
+            except Exception as e:
+                errors.append(e)
+        
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            threads = [threading.Thread(target=churn, args=(worker,)) for worker in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            sys.setswitchinterval(switch_interval)
+        
+        assert errors == []
+        assert len(self.bot._timeline_cache) <= 2
+    
+    @pytest.mark.unit
+    def test_timeline_cache_survives_restart_on_disk(self):
+        """Test a new bot instance picks up timeline pages cached on disk"""
+        from atproto import models
+        post = models.AppBskyFeedDefs.FeedViewPost(post=models.AppBskyFeedDefs.PostView(
+            uri='at://did:plc:abc/app.bsky.feed.post/123',
+            cid='bafyreib2rxk3rh6kzwq',
+            author=models.AppBskyActorDefs.ProfileViewBasic(did='did:plc:abc', handle='test.bsky.social'),
+            record={'$type': 'app.bsky.feed.post', 'text': 'Test post', 'createdAt': '2024-01-01T00:00:00Z'},
+            indexed_at='2024-01-01T00:00:00Z'
+        ))
+        self.bot._cache_timeline(10, None, data={'feed': [post], 'cursor': 'next'})
+        self.bot._disk_cache_executor.shutdown(wait=True)  # Let the background write land
+        
+        restarted_bot = BlueskyBot()
+        restarted_bot._disk_cache_path = self.bot._disk_cache_path
+        cached = restarted_bot._get_cached_timeline(10, None)
+        
+        assert cached['cursor'] == 'next'
+        assert cached['feed'][0].post.uri == post.post.uri
+        
+        # Invalidation clears the disk copy as well
+        restarted_bot._invalidate_cached_timeline(10, None)
+        restarted_bot.close()
+        self.bot._timeline_cache.clear()
+        assert self.bot._get_cached_timeline(10, None) is None
+    
+    @pytest.mark.unit
+    def test_timeline_disk_cache_is_private_and_written_in_background(self):
+        """Test caching a page doesn't wait for the disk write, which goes to an owner-only file"""
+        import stat
+        import threading
+        self.bot._disk_cache_path = os.path.join(self.temp_dir, 'cache', 'timeline_cache.sqlite3')
+        release = threading.Event()
+        write_disk_cache = self.bot._write_disk_cache
+        
+        def slow_write(*args):
+            release.wait(5)
+            write_disk_cache(*args)
+        
+        with patch.object(self.bot, '_write_disk_cache', side_effect=slow_write):
+            self.bot._cache_timeline(10, None, data={'feed': [], 'cursor': 'next'})
+            assert self.bot._get_cached_timeline(10, None)['cursor'] == 'next'
+            release.set()
+            self.bot._disk_cache_executor.shutdown(wait=True)
+        
+        self.bot._timeline_cache.clear()
+        assert self.bot._get_cached_timeline(10, None)['cursor'] == 'next'
+        assert stat.S_IMODE(os.stat(self.bot._disk_cache_path).st_mode) == 0o600
+        assert stat.S_IMODE(os.stat(os.path.dirname(self.bot._disk_cache_path)).st_mode) == 0o700
+    
+    @pytest.mark.unit
+    def test_fetch_timeline_serves_stale_page_when_api_fails(self):
+        """Test an expired timeline page is returned if the refresh call fails"""
+        stale_post = Mock()
+        self.bot._cache_timeline(10, None, data={'feed': [stale_post], 'cursor': 'next'})
+        cache_entry = next(iter(self.bot._timeline_cache.values()))
+        cache_entry['timestamp'] -= self.bot._cache_policies['timeline_home'] + 1
+        
+        assert self.bot._get_cached_timeline(10, None) is None
+        
+        self.bot.client = Mock()
+        self.bot.client.get_timeline.side_effect = Exception('502 Bad Gateway')
+        
+        assert self.bot.fetch_timeline(limit=10) == [stale_post]
+        assert self.bot.get_api_usage_stats()['stale_cache_hits'] == 1
+    
+    @pytest.mark.unit
+    def test_fetch_timeline_page_returns_cursor_without_cache_lookup(self):
+        """Test timeline pages carry the next cursor both from the API and from the cache"""
+        self.bot.client = Mock()
+        self.bot.client.get_timeline.return_value = Mock(feed=[Mock()], cursor='next')
+        
+        with patch.object(self.bot, '_get_cached_timeline', wraps=self.bot._get_cached_timeline) as mock_cached:
+            page = self.bot.fetch_timeline_page(limit=10)
+        
+        assert page == TimelinePage(self.bot.client.get_timeline.return_value.feed, 'next')
+        assert mock_cached.call_count == 1
+        assert self.bot.fetch_timeline_page(limit=10).cursor == 'next'
+        assert self.bot.client.get_timeline.call_count == 1
+    
+    @pytest.mark.unit
+    def test_timeline_pacing_only_waits_for_remaining_interval(self):
+        """Test timeline requests are spaced by the minimum interval without sleeping once it has passed"""
+        self.bot._min_api_interval = 0.5
+        
+        with patch('bluesky_bot.time.monotonic', side_effect=[100.0, 100.2, 101.0]), \
+             patch('bluesky_bot.time.sleep') as mock_sleep:
+            self.bot._pace_timeline_call()
+            self.bot._pace_timeline_call()
+            self.bot._pace_timeline_call()
+        
+        mock_sleep.assert_called_once()
+        assert mock_sleep.call_args.args[0] == pytest.approx(0.3)
+    
+    @pytest.mark.unit
+    def test_authenticate_uses_keepalive_api_transport(self):
+        """Test the API client keeps idle connections and records rate-limit headers"""
+        with patch('bluesky_bot.Client') as mock_client_class, \
+             patch.object(self.bot, '_warm_http_pool'):
+            self.bot.authenticate('test.bsky.social', 'password')
+        
+        request = mock_client_class.call_args.kwargs['request']
+        pool = request._client._transport._pool
+        assert pool._keepalive_expiry == self.bot._keepalive_expiry
+        
+        request._client.event_hooks['response'][0](Mock(headers={'ratelimit-remaining': '7', 'ratelimit-reset': '100'}))
+        assert self.bot._rate_limit_remaining == 7
+        request.close()
+    
+    @pytest.mark.unit
+    def test_timeline_pacing_spreads_low_rate_limit_budget(self):
+        """Test a nearly spent rate-limit budget is spread over the rest of its window"""
+        self.bot._min_api_interval = 0
+        with patch('bluesky_bot.time.time', return_value=1000.0):
+            self.bot._record_rate_limit({'ratelimit-remaining': '50', 'ratelimit-reset': '1020'})
+            assert self.bot._rate_limit_interval() == 0.0
+            
+            self.bot._record_rate_limit({'ratelimit-remaining': '4', 'ratelimit-reset': '1020'})
+            assert self.bot._rate_limit_interval() == pytest.approx(5.0)
+            
+            with patch('bluesky_bot.time.monotonic', side_effect=[100.0, 100.0]), \
+                 patch('bluesky_bot.time.sleep') as mock_sleep:
+                self.bot._pace_timeline_call()
+                self.bot._pace_timeline_call()
+        
+        assert mock_sleep.call_args.args[0] == pytest.approx(5.0)
+    
+    @pytest.mark.unit
+    def test_fetch_timeline_first_page_uses_short_ttl(self):
+        """Test the first timeline page is re-fetched sooner than cursor pages"""
+        self.bot._min_api_interval = 0
+        self.bot.client = Mock()
+        self.bot.client.get_timeline.return_value = Mock(feed=[Mock()], cursor='next')
+        
+        self.bot.fetch_timeline_page(limit=10)
+        self.bot.fetch_timeline_page(limit=10, cursor='page2')
+        age = self.bot._cache_policies['timeline_first_page'] + 1
+        for entry in self.bot._timeline_cache.values():
+            entry['timestamp'] -= age
+        self.bot.fetch_timeline_page(limit=10)
+        self.bot.fetch_timeline_page(limit=10, cursor='page2')
+        
+        assert [c.kwargs['cursor'] for c in self.bot.client.get_timeline.call_args_list] == [None, 'page2', None]
+    
+    @pytest.mark.unit
+    def test_concurrent_timeline_misses_share_one_request(self):
+        """Test concurrent fetches of the same uncached page make a single API call"""
+        import threading
+        release = threading.Event()
+        timeline = Mock(feed=[Mock()], cursor='next')
+        
+        def slow_get_timeline(**kwargs):
+            release.wait(5)
+            return timeline
+        
+        self.bot.client = Mock()
+        self.bot.client.get_timeline.side_effect = slow_get_timeline
+        
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.bot.fetch_timeline(limit=10))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        while not self.bot._inflight:
+            release.wait(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        assert self.bot.client.get_timeline.call_count == 1
+        assert results == [timeline.feed] * 4
+    
+    @pytest.mark.unit
+    def test_http_session_shared_across_instances(self):
+        """Test all bot instances reuse one pooled HTTP session"""
+        other_bot = BlueskyBot()
+        
+        assert other_bot.http_session is self.bot.http_session
+        adapter = self.bot.http_session.get_adapter('https://bsky.social')
+        assert adapter._pool_block is False
+    
+    @pytest.mark.unit
+    def test_http2_client_pool_limits_reach_transport(self):
+        """Test the HTTP/2 client's pool size and keepalive are set on its transport"""
+        client = self.bot._create_http2_client()
+        try:
+            pool = client._transport._pool
+            assert pool._max_connections == 16
+            assert pool._keepalive_expiry == self.bot._keepalive_expiry
+        finally:
+            client.close()
+    
+    @pytest.mark.unit
+    def test_bots_are_closed_at_exit_without_being_kept_alive(self):
+        """Test the exit hook closes live bots but holds them only weakly"""
+        import gc
+        import weakref
+        import bluesky_bot
+        other_bot = BlueskyBot()
+        bot_ref = weakref.ref(other_bot)
+        
+        with patch.object(BlueskyBot, 'close') as mock_close:
+            bluesky_bot._close_live_bots()
+        assert mock_close.call_count >= 2  # self.bot and other_bot
+        
+        del other_bot
+        gc.collect()
+        assert bot_ref() is None
+    
+    @pytest.mark.unit
+    def test_http_pool_warmed_once_per_process(self):
+        """Test the CDN connection warmup only starts one background thread"""
+        with patch.object(BlueskyBot, '_http_pool_warmed', False), \
+             patch('bluesky_bot.threading.Thread') as mock_thread:
+            self.bot._warm_http_pool()
+            BlueskyBot()._warm_http_pool()
+        
+        mock_thread.assert_called_once()
+        assert mock_thread.call_args.kwargs['daemon'] is True
+    
+    @pytest.mark.unit
+    def test_unlike_uses_like_index_without_scanning(self):
+        """Test unlike deletes the indexed like record without listing like records"""
+        self.bot._like_index_file = os.path.join(self.temp_dir, 'like_index.json')
+        self.bot.client = Mock()
+        self.bot.client.me.did = 'did:plc:me'
+        
+        self.bot._remember_like('at://did:plc:abc/app.bsky.feed.post/123', 'at://did:plc:me/app.bsky.feed.like/rkey1')
+        result = self.bot.unlike_post('at://did:plc:abc/app.bsky.feed.post/123')
+        
+        assert result['success'] is True
+        self.bot.client.com.atproto.repo.list_records.assert_not_called()
+        delete_data = self.bot.client.com.atproto.repo.delete_record.call_args.kwargs['data']
+        assert delete_data['rkey'] == 'rkey1'
+        assert 'at://did:plc:abc/app.bsky.feed.post/123' not in self.bot._like_uri_index
+    
+    @pytest.mark.unit
+    def test_unlike_rescans_when_indexed_like_is_stale(self):
+        """Test unlike finds the live like record when the indexed one was already deleted"""
+        uri = 'at://did:plc:abc/app.bsky.feed.post/123'
+        self.bot._like_index_file = os.path.join(self.temp_dir, 'like_index.json')
+        self.bot.client = Mock()
+        self.bot.client.me.did = 'did:plc:me'
+        # Unliked and liked again from another client, so the indexed key no longer exists
+        self.bot._remember_like(uri, 'at://did:plc:me/app.bsky.feed.like/old')
+        live_like = Mock(uri='at://did:plc:me/app.bsky.feed.like/new', value=Mock(subject=Mock(uri=uri)))
+        self.bot.client.com.atproto.repo.list_records.return_value = Mock(records=[live_like], cursor=None)
+        self.bot.client.com.atproto.repo.delete_record.side_effect = (
+            lambda data: Mock(commit=None if data['rkey'] == 'old' else Mock()))
+        
+        result = self.bot.unlike_post(uri)
+        
+        assert result['success'] is True
+        deleted = [c.kwargs['data']['rkey'] for c in self.bot.client.com.atproto.repo.delete_record.call_args_list]
+        assert deleted == ['old', 'new']
+        assert uri not in self.bot._like_uri_index
+    
+    @pytest.mark.unit
+    def test_like_index_is_kept_per_account(self):
+        """Test each account loads and saves its own like index"""
+        uri = 'at://did:plc:abc/app.bsky.feed.post/1'
+        self.bot._like_index_dir = self.temp_dir
+        self.bot._open_like_index('did:plc:alice')
+        self.bot._remember_like(uri, 'at://did:plc:alice/app.bsky.feed.like/3kabc')
+        
+        self.bot._open_like_index('did:plc:bob')
+        assert uri not in self.bot._like_uri_index
+        assert self.bot._get_lookup(self.bot._like_status_cache, uri) == (False, None)
+        
+        self.bot._open_like_index('did:plc:alice')
+        assert self.bot._like_uri_index[uri] == '3kabc'
+        assert os.listdir(self.temp_dir) == ['like_index_did_plc_alice.json']
+    
+    @pytest.mark.unit
+    def test_like_index_saves_are_batched_and_atomic(self):
+        """Test several new likes are saved in one atomic write of the like index"""
+        import json
+        self.bot._like_index_file = os.path.join(self.temp_dir, 'like_index.json')
+        self.bot._like_index_save_delay = 60
+        
+        with patch('bluesky_bot.os.replace', wraps=os.replace) as mock_replace:
+            for n in range(5):
+                self.bot._remember_like(f'at://did:plc:abc/app.bsky.feed.post/{n}', f'at://did:plc:me/app.bsky.feed.like/rkey{n}')
+            self.bot._forget_like('at://did:plc:abc/app.bsky.feed.post/0')
+            assert not os.path.exists(self.bot._like_index_file)
+            
+            self.bot._flush_like_index()
+            self.bot._flush_like_index()
+        
+        mock_replace.assert_called_once()
+        with open(self.bot._like_index_file, encoding='utf-8') as f:
+            assert json.load(f) == {f'at://did:plc:abc/app.bsky.feed.post/{n}': f'rkey{n}' for n in range(1, 5)}
+        assert os.listdir(self.temp_dir) == ['like_index.json']
+    
+    @pytest.mark.unit
+    def test_find_like_record_indexes_every_scanned_like(self):
+        """Test scanning the like records indexes the other likes on the page too"""
+        self.bot._like_index_file = os.path.join(self.temp_dir, 'like_index.json')
+        self.bot.client = Mock()
+        self.bot.client.me.did = 'did:plc:me'
+        
+        def like(n):
+            return Mock(uri=f'at://did:plc:me/app.bsky.feed.like/rkey{n}',
+                        value=Mock(subject=Mock(uri=f'at://did:plc:abc/app.bsky.feed.post/{n}')))
+        
+        self.bot.client.com.atproto.repo.list_records.return_value = Mock(records=[like(1), like(2), like(3)], cursor=None)
+        record = self.bot._find_like_record('at://did:plc:abc/app.bsky.feed.post/2')
+        
+        assert record.uri.endswith('rkey2')
+        assert list(self.bot._like_uri_index.items()) == [
+            ('at://did:plc:abc/app.bsky.feed.post/1', 'rkey1'),
+            ('at://did:plc:abc/app.bsky.feed.post/3', 'rkey3'),
+            ('at://did:plc:abc/app.bsky.feed.post/2', 'rkey2'),
+        ]
+        
+        assert self.bot.unlike_post('at://did:plc:abc/app.bsky.feed.post/3')['success'] is True
+        self.bot.client.com.atproto.repo.list_records.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_download_image_streams_raw_body_to_disk(self):
+        """Test download_image copies the raw response body into the temp directory"""
+        mock_response = make_image_response({'content-type': 'image/jpeg', 'content-length': '9'}, b'imagedata')
+        self.bot.http2_client = None
+        
+        with patch.object(self.bot.http_session, 'get', return_value=mock_response):
+            file_path = self.bot.download_image('https://cdn.example/img.jpg', 'img.jpg')
+        
+        assert file_path == os.path.join(self.temp_dir, 'img.jpg')
+        with open(file_path, 'rb') as f:
+            assert f.read() == b'imagedata'
+        assert mock_response.raw.decode_content is True
+    
+    @pytest.mark.unit
+    def test_download_image_caps_body_without_content_length(self):
+        """Test a body with no Content-Length is still rejected once it passes the size limit"""
+        mock_response = make_image_response({'content-type': 'image/jpeg'}, b'x' * 17)
+        self.bot.http2_client = None
+        self.bot._max_image_bytes = 16
+        
+        with patch.object(self.bot.http_session, 'get', return_value=mock_response):
+            assert self.bot.download_image('https://cdn.example/big.jpg', 'big.jpg') is None
+        
+        assert not os.path.exists(os.path.join(self.temp_dir, 'big.jpg'))
+        mock_response.__exit__.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_download_image_closes_rejected_responses(self):
+        """Test error statuses and non-image responses release their connection"""
+        import requests
+        not_found = make_image_response({'content-type': 'text/plain'}, b'')
+        not_found.raise_for_status.side_effect = requests.exceptions.HTTPError('404 Not Found')
+        html = make_image_response({'content-type': 'text/html'}, b'<html>')
+        self.bot.http2_client = None
+        
+        with patch.object(self.bot.http_session, 'get', side_effect=[not_found, html]):
+            assert self.bot.download_image('https://cdn.example/gone.jpg', 'gone.jpg') is None
+            assert self.bot.download_image('https://cdn.example/page.jpg', 'page.jpg') is None
+        
+        not_found.__exit__.assert_called_once()
+        html.__exit__.assert_called_once()
+    
+    @pytest.mark.unit
+    def test_failed_downloads_do_not_exhaust_connection_pool(self, failing_http_server):
+        """Test more failing downloads than pooled connections still all return promptly"""
+        import threading
+        self.bot.http2_client = None
+        self.bot.http_session = self.bot._create_http_session()
+        pool_size = self.bot.http_session.get_adapter(failing_http_server)._pool_maxsize
+        results = []
+        
+        def download_all():
+            for n in range(pool_size + 4):
+                path = 'missing' if n % 2 else 'page'
+                results.append(self.bot.download_image(f'{failing_http_server}/{path}/{n}.jpg', f'{n}.jpg'))
+        
+        worker = threading.Thread(target=download_all, daemon=True)
+        worker.start()
+        worker.join(timeout=20)
+        self.bot.http_session.close()
+        
+        assert not worker.is_alive(), "downloads blocked waiting for a pooled connection"
+        assert results == [None] * (pool_size + 4)
+    
+    @pytest.mark.unit
+    def test_get_post_cid_caches_misses_briefly(self):
+        """Test failed CID lookups are cached for a short time only"""
+        uri = 'at://did:plc:abc/app.bsky.feed.post/123'
+        self.bot.client = Mock()
+        self.bot.client.com.atproto.repo.get_record.side_effect = Exception('RecordNotFound')
+        
+        assert self.bot._get_post_cid(uri) is None
+        assert self.bot._get_post_cid(uri) is None
+        assert self.bot.client.com.atproto.repo.get_record.call_count == 1
+        
+        # Once the miss expires the record is looked up again
+        self.bot._cid_cache[uri] = (None, 0)
+        self.bot.client.com.atproto.repo.get_record.side_effect = None
+        self.bot.client.com.atproto.repo.get_record.return_value = Mock(cid='bafycid')
+        assert self.bot._get_post_cid(uri) == 'bafycid'
+        assert self.bot._get_post_cid(uri) == 'bafycid'
+        assert self.bot.client.com.atproto.repo.get_record.call_count == 2
+    
+    @pytest.mark.unit
+    def test_lookup_cache_ignores_wall_clock_jumps(self):
+        """Test in-memory lookup entries expire on the monotonic clock"""
+        self.bot._store_lookup(self.bot._cid_cache, 'at://did:plc:abc/app.bsky.feed.post/1', 'bafycid', ttl=60)
+        
+        with patch('bluesky_bot.time.time', return_value=time.time() + 86400):
+            assert self.bot._get_lookup(self.bot._cid_cache, 'at://did:plc:abc/app.bsky.feed.post/1') == (True, 'bafycid')
+        with patch('bluesky_bot.time.monotonic', return_value=time.monotonic() + 61):
+            assert self.bot._get_lookup(self.bot._cid_cache, 'at://did:plc:abc/app.bsky.feed.post/1') == (False, None)
+    
+    @pytest.mark.unit
+    def test_process_embeds_keeps_image_order(self):
+        """Test image embeds are built from specs and returned in post order"""
+        post = Mock()
+        post.post.uri = 'at://did:plc:abc/app.bsky.feed.post/123'
+        images = [Mock(alt=f'alt {i}') for i in range(3)]
+        for i, image in enumerate(images):
+            image.image.ref.link = f'bafkrei{i}'
+        post.post.record.embed.images = images
+        
+        with patch.object(self.bot, 'download_image_with_info', side_effect=lambda url, filename: (os.path.join(self.temp_dir, filename), {})):
+            embeds = self.bot.process_embeds(post)
+        
+        assert [e['filename'] for e in embeds] == ['image_123_0.jpg', 'image_123_1.jpg', 'image_123_2.jpg']
+        assert embeds[1]['url'] == 'https://bsky.social/xrpc/com.atproto.sync.getBlob?did=did:plc:abc&cid=bafkrei1'
+        assert embeds[2]['alt_text'] == 'alt 2'
+    
+    @pytest.mark.unit
+    def test_process_embeds_external_thumb_uses_blob_url(self):
+        """Test link card thumbnails are downloaded from the post author's getBlob URL"""
+        post = Mock()
+        post.post.uri = 'at://did:plc:abc/app.bsky.feed.post/123'
+        embed = Mock(spec=['external'])
+        embed.external.thumb.ref.link = 'bafythumb'
+        post.post.record.embed = embed
+        
+        with patch.object(self.bot, 'download_image_with_info', return_value=('/tmp/x.jpg', {})) as mock_download:
+            embeds = self.bot.process_embeds(post)
+        
+        mock_download.assert_called_once_with(
+            'https://bsky.social/xrpc/com.atproto.sync.getBlob?did=did:plc:abc&cid=bafythumb', 'external_123.jpg')
+        assert embeds[0]['type'] == 'external'
+    
+    @pytest.mark.unit
+    def test_close_shuts_down_download_pool(self):
+        """Test close stops the persistent download and formatting executors"""
+        assert self.bot._download_executor.submit(lambda: 42).result() == 42
+        
+        self.bot.close()
+        
+        with pytest.raises(RuntimeError):
+            self.bot._download_executor.submit(lambda: 42)
+        with pytest.raises(RuntimeError):
+            self.bot._format_executor.submit(lambda: 42)
+    
+    @pytest.mark.unit
+    def test_get_image_info_reads_header(self):
+        """Test get_image_info reports dimensions, format and size from the file"""
+        from PIL import Image
+        image_path = os.path.join(self.temp_dir, 'test.png')
+        Image.new('RGB', (32, 16)).save(image_path)
+        
+        info = self.bot.get_image_info(image_path)
+        
+        assert info == {
+            'width': 32,
+            'height': 16,
+            'file_size': os.path.getsize(image_path),
+            'format': 'PNG'
+        }
+    
+    @pytest.mark.unit
+    def test_like_status_read_from_viewer_state(self):
+        """Test like status comes from the post view without any API calls"""
+        self.bot.client = Mock()
+        self.bot._like_index_file = os.path.join(self.temp_dir, 'like_index.json')
+        uri = 'at://did:plc:abc/app.bsky.feed.post/123'
+        post_view = Mock()
+        post_view.viewer.like = 'at://did:plc:me/app.bsky.feed.like/3kabc'
+        
+        assert self.bot._check_if_post_is_liked(uri, post_view=post_view) is True
+        assert self.bot._like_uri_index[uri] == '3kabc'
+        
+        # Liked again from another client, then unliked: both caches follow the viewer state
+        post_view.viewer.like = 'at://did:plc:me/app.bsky.feed.like/3kdef'
+        assert self.bot._check_if_post_is_liked(uri, post_view=post_view) is True
+        assert self.bot._like_uri_index[uri] == '3kdef'
+        
+        post_view.viewer.like = None
+        assert self.bot._check_if_post_is_liked(uri, post_view=post_view) is False
+        assert uri not in self.bot._like_uri_index
+        assert self.bot._get_lookup(self.bot._like_status_cache, uri) == (True, False)
+        
+        self.bot.client.get_posts.assert_not_called()
+        self.bot.client.com.atproto.repo.list_records.assert_not_called()
+    
+    @pytest.mark.unit
+    def test_iso_now_format(self):
+        """Test _iso_now produces a UTC timestamp with millisecond precision"""
+        from datetime import datetime, timezone
+        timestamp = BlueskyBot._iso_now()
+        
+        assert timestamp.endswith('Z')
+        assert len(timestamp) == len('2024-01-01T00:00:00.000Z')
+        parsed = datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%S.%fZ').replace(tzinfo=timezone.utc)
+        assert abs((datetime.now(timezone.utc) - parsed).total_seconds()) < 5
+    
+    @pytest.mark.unit
+    def test_download_image_with_info_reads_dimensions_from_memory(self):
+        """Test image info is taken from the downloaded bytes rather than the saved file"""
+        import io
+        from PIL import Image
+        png = io.BytesIO()
+        Image.new('RGB', (20, 10)).save(png, format='PNG')
+        mock_response = make_image_response({'content-type': 'image/png'}, png.getvalue())
+        self.bot.http2_client = None
+        
+        with patch.object(self.bot.http_session, 'get', return_value=mock_response), \
+             patch.object(self.bot, 'get_image_info') as mock_get_info:
+            file_path, info = self.bot.download_image_with_info('https://cdn.example/img.png', 'img.png')
+        
+        mock_get_info.assert_not_called()
+        assert os.path.getsize(file_path) == len(png.getvalue())
+        assert info == {'width': 20, 'height': 10, 'format': 'PNG', 'file_size': len(png.getvalue())}
+    
+    @pytest.mark.unit
+    def test_download_image_with_info_replaces_file_without_leftovers(self):
+        """Test images are renamed into place over an existing file and no partial files remain"""
+        existing = os.path.join(self.temp_dir, 'img.jpg')
+        with open(existing, 'wb') as f:
+            f.write(b'old')
+        
+        with patch.object(self.bot, '_download_image_bytes', return_value=b'new image bytes'):
+            file_path, _ = self.bot.download_image_with_info('https://cdn.example/img.jpg', 'img.jpg')
+        
+        assert file_path == existing
+        with open(file_path, 'rb') as f:
+            assert f.read() == b'new image bytes'
+        assert not [name for name in os.listdir(self.temp_dir) if name.startswith('.partial_')]
+    
+    @pytest.mark.unit
+    def test_thumb_blob_link_handles_model_and_raw_refs(self):
+        """Test thumbnail CIDs are read from model refs and raw $link dict refs"""
+        model_thumb = Mock()
+        model_thumb.ref.link = 'bafymodel'
+        raw_thumb = Mock(spec=['ref'])
+        raw_thumb.ref = {'$link': 'bafyraw'}
+        
+        assert self.bot._thumb_blob_link(model_thumb) == 'bafymodel'
+        assert self.bot._thumb_blob_link(raw_thumb) == 'bafyraw'
+        assert self.bot._thumb_blob_link(Mock(spec=[])) is None
+    
+    @pytest.mark.unit
+    def test_media_feed_uris_keep_order_without_duplicates(self):
+        """Test media feed URIs are added once, in order, and can be removed"""
+        for uri in ('at://feed/a', 'at://feed/b', 'at://feed/a', 'at://feed/c'):
+            self.bot.add_media_feed_uri(uri)
+        self.bot.remove_media_feed_uri('at://feed/b')
+        self.bot.remove_media_feed_uri('at://feed/missing')
+        
+        assert list(self.bot._media_feed_uris) == ['at://feed/a', 'at://feed/c']
+    
+    @pytest.mark.unit
+    def test_http2_downloads_can_be_disabled_by_config(self):
+        """Test IMAGE_DOWNLOAD_HTTP2=false routes downloads through the requests session"""
+        with patch('bluesky_bot.config.IMAGE_DOWNLOAD_HTTP2', False):
+            self.bot._setup_http_session()
+        
+        assert self.bot.http2_client is None
+        assert self.bot.http_session is BlueskyBot._shared_http_session
+    
+    @pytest.mark.unit
+    def test_download_image_over_http2_client(self):
+        """Test download_image uses the HTTP/2 client when one is configured"""
+        httpx = pytest.importorskip('httpx')
+        
+        def handler(request):
+            if request.url.path == '/text':
+                return httpx.Response(200, headers={'content-type': 'text/html'}, content=b'<html>')
+            return httpx.Response(200, headers={'content-type': 'image/png'}, content=b'pngdata')
+        
+        self.bot.http2_client = httpx.Client(transport=httpx.MockTransport(handler))
+        with patch('bluesky_bot.httpx', httpx):
+            file_path = self.bot.download_image('https://cdn.example/img.png', 'img.png')
+            not_image = self.bot.download_image('https://cdn.example/text', 'text.png')
+        
+        with open(file_path, 'rb') as f:
+            assert f.read() == b'pngdata'
+        assert not_image is None
+    
+    @pytest.mark.unit
+    def test_http2_download_retries_transient_statuses(self):
+        """Test the HTTP/2 path retries 429/5xx responses like the requests Retry policy"""
+        httpx = pytest.importorskip('httpx')
+        statuses = {'/flaky': [503, 429], '/down': [500] * 10}
+        requests_seen = []
+        
+        def handler(request):
+            requests_seen.append(request.url.path)
+            pending = statuses[request.url.path]
+            if pending:
+                return httpx.Response(pending.pop(0), headers={'retry-after': '0'} if request.url.path == '/flaky' else {})
+            return httpx.Response(200, headers={'content-type': 'image/png'}, content=b'pngdata')
+        
+        self.bot.http2_client = httpx.Client(transport=httpx.MockTransport(handler))
+        with patch('bluesky_bot.httpx', httpx), patch('bluesky_bot.time.sleep') as mock_sleep:
+            assert self.bot._download_image_bytes('https://cdn.example/flaky') == b'pngdata'
+            assert self.bot._download_image_bytes('https://cdn.example/down') is None
+        
+        assert requests_seen == ['/flaky'] * 3 + ['/down'] * 4
+        assert [c.args[0] for c in mock_sleep.call_args_list] == [0.0, 0.0, 0.0, 0.6, 1.2]
+    
     @pytest.mark.unit
     def test_setup_temp_directory(self):
         """Test setup_temp_directory creates a valid temp directory"""
@@ -161,6 +1636,55 @@ class TestBlueskyBotUnit:
         assert os.path.isdir(temp_dir)
         assert temp_dir.startswith('/tmp/bluesky_images_')
     
+    @pytest.mark.unit
+    def test_get_ssm_parameter_cached_until_reset(self):
+        """Test repeated SSM lookups reuse the first result until stats are reset"""
+        self.bot.ssm_client = Mock()
+        self.bot.ssm_client.get_parameter.return_value = {'Parameter': {'Value': 'test_password'}}
+        
+        assert self.bot.get_ssm_parameter('TEST_PARAM') == 'test_password'
+        assert self.bot.get_ssm_parameter('TEST_PARAM') == 'test_password'
+        assert self.bot.ssm_client.get_parameter.call_count == 1
+        
+        self.bot.reset_api_stats()
+        self.bot.get_ssm_parameter('TEST_PARAM')
+        assert self.bot.ssm_client.get_parameter.call_count == 2
+    
+    @pytest.mark.unit
+    def test_get_ssm_parameter_shared_across_bots_until_max_age(self):
+        """Test cached SSM values are reused by other bots and refreshed once older than max_age"""
+        self.bot.ssm_client = Mock()
+        self.bot.ssm_client.get_parameter.return_value = {'Parameter': {'Value': 'test_password'}}
+        other_bot = BlueskyBot()
+        other_bot.ssm_client = self.bot.ssm_client
+        
+        self.bot.get_ssm_parameter('TEST_PARAM')
+        assert other_bot.get_ssm_parameter('TEST_PARAM') == 'test_password'
+        assert self.bot.ssm_client.get_parameter.call_count == 1
+        
+        other_bot.get_ssm_parameter('TEST_PARAM', max_age=0)
+        assert self.bot.ssm_client.get_parameter.call_count == 2
+    
+    @pytest.mark.unit
+    def test_get_ssm_parameters_batches_uncached_names(self):
+        """Test several parameters are fetched in one get_parameters call and invalid names fall back"""
+        self.bot.ssm_client = Mock()
+        self.bot.ssm_client.get_parameters.return_value = {
+            'Parameters': [{'Name': 'A', 'Value': 'a'}, {'Name': 'B', 'Value': 'b'}],
+            'InvalidParameters': ['BLUESKY_PASSWORD_BIKELIFE']
+        }
+        self.bot.ssm_client.get_parameter.side_effect = Exception('ParameterNotFound')
+        BlueskyBot._ssm_cache['C'] = (time.monotonic(), 'c')
+        
+        with patch.dict(os.environ, {'BLUESKY_PASSWORD_BIKELIFE': 'env_password'}):
+            values = self.bot.get_ssm_parameters(['A', 'B', 'C', 'BLUESKY_PASSWORD_BIKELIFE'])
+        
+        assert values == {'A': 'a', 'B': 'b', 'C': 'c', 'BLUESKY_PASSWORD_BIKELIFE': 'env_password'}
+        self.bot.ssm_client.get_parameters.assert_called_once_with(
+            Names=['A', 'B', 'BLUESKY_PASSWORD_BIKELIFE'], WithDecryption=True
+        )
+        assert self.bot.get_ssm_parameter('A') == 'a'
+    
     @pytest.mark.unit
     @patch('boto3.client')
     def test_get_ssm_parameter_success(self, mock_boto_client):
@@ -284,6 +1808,15 @@ class TestEdgeCases:
     def setup_method(self):
         """Set up test fixtures before each test method"""
         self.bot = BlueskyBot()
+        self.temp_dir = tempfile.mkdtemp()
+        self.bot._disk_cache_path = os.path.join(self.temp_dir, 'timeline_cache.sqlite3')
+        self.bot._like_index_dir = self.temp_dir
+    
+    def teardown_method(self):
+        """Clean up after each test method"""
+        self.bot.close()
+        if os.path.exists(self.temp_dir):
+            shutil.rmtree(self.temp_dir)
     
     @pytest.mark.unit
     def test_empty_timeline_handling(self):